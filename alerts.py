@@ -0,0 +1,322 @@
+"""
+Alerts
+User-defined crossing rules evaluated bar by bar on incrementally updated indicators
+
+    engine = AlertEngine([AlertRule.parse("RSI crosses above 70"),
+                          AlertRule.parse("AAPL: Close crosses above R1")])
+    engine.update(("AAPL", "1d"), df)        # after each refresh
+    engine.on_bar(("AAPL", "1d"), bar, is_new)   # for each live bar
+"""
+
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import indicators
+from indicators import INDICATOR_COLUMNS, IndicatorEngine
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.financial_analysis_pro', 'alerts.json')
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Floor pivot levels of the previous bar
+PIVOT_LEVELS = ['Pivot', 'R1', 'R2', 'R3', 'S1', 'S2', 'S3']
+
+OPERANDS = OHLCV_COLUMNS + INDICATOR_COLUMNS + PIVOT_LEVELS
+
+DIRECTIONS = ('above', 'below')
+
+
+def pivot_levels(high, low, close):
+    """Floor pivots from one bar's high, low and close (same formulas as the technical report)"""
+    pivot = (high + low + close) / 3
+    return {
+        'Pivot': pivot,
+        'R1': 2 * pivot - low, 'R2': pivot + (high - low), 'R3': high + 2 * (pivot - low),
+        'S1': 2 * pivot - high, 'S2': pivot - (high - low), 'S3': low - 2 * (high - pivot),
+    }
+
+
+class AlertRule:
+    """`left crosses above|below right`, optionally for some symbols only
+
+    Operands are bar columns, indicators, the previous bar's pivot levels
+    (Pivot, R1-R3, S1-S3) or numbers. The rule triggers on the bar where
+    left - right changes sign in the given direction.
+    """
+
+    def __init__(self, left, direction, right, symbols=None):
+        for operand in (left, right):
+            if not isinstance(operand, float) and operand not in OPERANDS:
+                raise ValueError(f"Unknown value: {operand}")
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direction must be above or below, not {direction}")
+        self.left = left
+        self.direction = direction
+        self.right = right
+        self.symbols = frozenset(symbols or ())
+
+    @classmethod
+    def parse(cls, text):
+        """Rule from text such as 'RSI crosses above 70' or 'AAPL, MSFT: MACD crosses below MACD_Signal'"""
+        symbols = None
+        if ':' in text:
+            prefix, text = text.split(':', 1)
+            symbols = prefix.replace(',', ' ').upper().split()
+
+        words = text.split()
+        if len(words) != 4 or words[1].lower() != 'crosses':
+            raise ValueError("Rules look like: [SYMBOLS:] RSI crosses above 70")
+        return cls(cls._operand(words[0]), words[2].lower(), cls._operand(words[3]), symbols)
+
+    @staticmethod
+    def _operand(word):
+        try:
+            return float(word)
+        except ValueError:
+            return word
+
+    def applies_to(self, symbol):
+        return not self.symbols or symbol in self.symbols
+
+    def value(self, context, operand):
+        return operand if isinstance(operand, float) else context.get(operand, np.nan)
+
+    def spread(self, context):
+        """left - right for one bar's values (NaN while an operand is warming up)"""
+        return self.value(context, self.left) - self.value(context, self.right)
+
+    def crossed(self, previous, current):
+        before = self.spread(previous)
+        after = self.spread(current)
+        if self.direction == 'above':
+            return before <= 0 < after
+        return before >= 0 > after
+
+    def __str__(self):
+        def name(operand):
+            return f"{operand:g}" if isinstance(operand, float) else operand
+
+        text = f"{name(self.left)} crosses {self.direction} {name(self.right)}"
+        return f"{', '.join(sorted(self.symbols))}: {text}" if self.symbols else text
+
+
+class SeriesState:
+    """Indicator engine and the last two bars' values of one (symbol, interval)"""
+
+    def __init__(self, engine, previous, current, date):
+        self.engine = engine
+        self.previous = previous
+        self.current = current
+        self.date = date
+        self.bar = 0
+        self.fired = {}
+
+
+def _context(bar, values, prior_bar):
+    context = {col: float(bar[col]) for col in OHLCV_COLUMNS}
+    context.update(values)
+    if prior_bar is not None:
+        context.update(pivot_levels(prior_bar['High'], prior_bar['Low'], prior_bar['Close']))
+    return context
+
+
+class AlertEngine:
+    """Evaluates rules on each new or revised bar of every tracked series
+
+    Series are keyed by (symbol, interval). Each keeps an IndicatorEngine,
+    so a bar costs one indicator update plus one check per rule whatever the
+    history length. A rule fires at most once per bar (debounce), however
+    often live ticks move the bar back and forth across the level. Alerts go
+    to `queue` for the UI and are appended to `log_path` as JSON lines.
+    Safe to call from the fetch and watchlist worker threads.
+    """
+
+    def __init__(self, rules=(), path=DEFAULT_PATH, log_path=None):
+        self.rules = list(rules)
+        self.path = path
+        self.log_path = log_path
+        self.queue = queue.Queue()
+        self._series = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    # Rules
+    def load(self):
+        """Load saved rules, if any"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                texts = json.load(f).get('rules', [])
+        except (OSError, ValueError):
+            texts = []
+
+        rules = []
+        for text in texts:
+            try:
+                rules.append(AlertRule.parse(text))
+            except ValueError:
+                continue
+        with self._lock:
+            self.rules = rules
+        return self.rules
+
+    def save(self):
+        with self._lock:
+            texts = [str(rule) for rule in self.rules]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'rules': texts}, f, indent=2)
+
+    def add(self, text):
+        """Parse and save a rule; a rule that cannot be saved is not kept"""
+        rule = AlertRule.parse(text)
+        with self._lock:
+            self.rules.append(rule)
+        try:
+            self.save()
+        except OSError:
+            with self._lock:
+                self.rules = [kept for kept in self.rules if kept is not rule]
+            raise
+        return rule
+
+    def remove(self, indices):
+        indices = set(indices)
+        with self._lock:
+            # Fired-bar bookkeeping is per rule position
+            for state in self._series.values():
+                state.fired.clear()
+            self.rules = [rule for i, rule in enumerate(self.rules) if i not in indices]
+        self.save()
+
+    # Evaluation
+    def update(self, key, df):
+        """Catch a series up with a refreshed frame (OHLCV, with or without indicator columns)
+
+        The first frame seeds the series without alerting; later frames only
+        feed their bars from the last one seen onwards.
+        """
+        if not len(df):
+            return []
+
+        dates = df['Date'].to_numpy()
+        with self._lock:
+            state = self._series.get(key)
+            if state is not None:
+                start = np.searchsorted(dates, state.date)
+                if start < len(dates) and dates[start] == state.date:
+                    alerts = self._feed(key, state, df.iloc[start:])
+                else:
+                    alerts = [] if dates[-1] < state.date else None
+
+        if state is not None and alerts is not None:
+            self._log(alerts)
+            return alerts
+
+        # First sight, or the frame no longer reaches the last bar seen. Seeding
+        # runs the full indicator calculation, so other series are not held up
+        seeded = self._seed(df)
+        with self._lock:
+            # Keep a series another thread seeded or advanced in the meantime
+            if self._series.get(key) is state:
+                self._series[key] = seeded
+        return []
+
+    def on_bar(self, key, bar, is_new):
+        """Evaluate a new (is_new) or revised latest bar of a seeded series"""
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                return []
+            alerts = self._apply(key, state, bar, is_new)
+        self._log(alerts)
+        return alerts
+
+    def forget(self, key):
+        with self._lock:
+            self._series.pop(key, None)
+
+    def _seed(self, df):
+        if 'EMA_12' not in df.columns:
+            df = indicators.calculate_indicators(df[['Date'] + OHLCV_COLUMNS].copy())
+        engine = IndicatorEngine.from_frame(df)
+
+        last = df.iloc[-1]
+        prior = df.iloc[-2] if len(df) > 1 else None
+        current = _context(last, engine.last, prior)
+        previous = {}
+        if prior is not None:
+            previous = _context(prior, {col: float(prior[col]) for col in INDICATOR_COLUMNS if col in prior},
+                                df.iloc[-3] if len(df) > 2 else None)
+        return SeriesState(engine, previous, current, np.datetime64(last['Date'], 'us'))
+
+    def _feed(self, key, state, bars):
+        """Apply frame rows starting at the series' current bar"""
+        alerts = []
+        for i, (_, bar) in enumerate(bars.iterrows()):
+            if i == 0:
+                if all(float(bar[col]) == state.current[col] for col in OHLCV_COLUMNS):
+                    continue
+                alerts += self._apply(key, state, bar, is_new=False)
+            else:
+                alerts += self._apply(key, state, bar, is_new=True)
+        return alerts
+
+    def _apply(self, key, state, bar, is_new):
+        if is_new:
+            # The current bar is complete: it becomes the reference for crossings
+            state.previous = state.current
+            state.bar += 1
+            values = state.engine.append(bar)
+            state.date = np.datetime64(bar['Date'], 'us')
+        else:
+            values = state.engine.update_last(bar)
+        state.current = _context(bar, values, state.previous or None)
+
+        symbol = key[0]
+        alerts = []
+        for index, rule in enumerate(self.rules):
+            if not rule.applies_to(symbol) or state.fired.get(index) == state.bar:
+                continue
+            if rule.crossed(state.previous, state.current):
+                state.fired[index] = state.bar
+                alerts.append(self._emit(key, rule, state))
+        return alerts
+
+    def _emit(self, key, rule, state):
+        alert = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'symbol': key[0],
+            'interval': key[1],
+            'rule': str(rule),
+            'bar': str(np.datetime64(state.date, 's')).replace('T', ' '),
+            'close': state.current['Close'],
+            'value': rule.value(state.current, rule.left),
+        }
+        self.queue.put(alert)
+        return alert
+
+    def _log(self, alerts):
+        """Append alerts to the log file (called without holding the engine lock)"""
+        if not alerts or not self.log_path:
+            return
+        try:
+            with self._log_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.writelines(json.dumps(alert) + '\n' for alert in alerts)
+        except OSError:
+            pass
+
+    def drain(self):
+        """Return every alert raised since the last call (call from the UI thread)"""
+        alerts = []
+        while True:
+            try:
+                alerts.append(self.queue.get_nowait())
+            except queue.Empty:
+                return alerts
@@ -0,0 +1,128 @@
+"""
+Analysis helpers
+GUI-free calculations shared by the dashboard, the watchlist and batch tools
+"""
+
+import numpy as np
+
+
+def compute_metrics(df, meta):
+    """Headline metrics shown in the metrics panel"""
+    current_price = df['Close'].iloc[-1]
+    prev_close = meta.get('chartPreviousClose', df['Close'].iloc[-2])
+    change = current_price - prev_close
+    change_pct = (change / prev_close) * 100
+
+    # 52-week high/low
+    high_52w = df['High'].tail(252).max() if len(df) >= 252 else df['High'].max()
+    low_52w = df['Low'].tail(252).min() if len(df) >= 252 else df['Low'].min()
+
+    return {
+        'price': current_price,
+        'prev_close': prev_close,
+        'change': change,
+        'change_pct': change_pct,
+        'volume': df['Volume'].iloc[-1],
+        'market_cap': meta.get('marketCap', 0),
+        'pe_ratio': meta.get('trailingPE', 0),
+        'high_52w': high_52w,
+        'low_52w': low_52w
+    }
+
+
+def format_market_cap(market_cap):
+    """Format a market cap as $1.23T / $4.56B / $7.89M"""
+    if market_cap > 0:
+        if market_cap >= 1e12:
+            return f"${market_cap/1e12:.2f}T"
+        elif market_cap >= 1e9:
+            return f"${market_cap/1e9:.2f}B"
+        elif market_cap >= 1e6:
+            return f"${market_cap/1e6:.2f}M"
+        else:
+            return f"${market_cap:,.0f}"
+    return "N/A"
+
+
+# Columns the five trading-signal rules read, in count_signals argument order
+SIGNAL_COLUMNS = ['Close', 'SMA_20', 'RSI', 'MACD', 'MACD_Signal', 'Stoch_K', 'BB_Lower', 'BB_Upper']
+
+
+def count_signals(close, sma20, rsi, macd, macd_signal, stoch_k, bb_lower, bb_upper,
+                  rsi_low=30, rsi_high=70, stoch_low=20, stoch_high=80):
+    """Bullish and bearish rule counts (out of 5 each)
+
+    Works on the latest scalar values or on whole NumPy arrays at once.
+    """
+    bullish_signals = sum([
+        rsi < rsi_low,
+        macd > macd_signal,
+        close > sma20,
+        stoch_k < stoch_low,
+        close <= bb_lower
+    ])
+
+    bearish_signals = sum([
+        rsi > rsi_high,
+        macd < macd_signal,
+        close < sma20,
+        stoch_k > stoch_high,
+        close >= bb_upper
+    ])
+
+    return bullish_signals, bearish_signals
+
+
+def signal_counts(df):
+    """Number of bullish and bearish rules met on the last bar"""
+    return count_signals(*(df[col].iloc[-1] for col in SIGNAL_COLUMNS))
+
+
+def rating(bullish_signals, bearish_signals):
+    """Overall rating from the signal counts"""
+    if bullish_signals > bearish_signals + 1:
+        return "STRONG BUY"
+    elif bullish_signals > bearish_signals:
+        return "BUY"
+    elif bearish_signals > bullish_signals + 1:
+        return "STRONG SELL"
+    elif bearish_signals > bullish_signals:
+        return "SELL"
+    return "HOLD"
+
+
+def trend_signal(df):
+    """BULLISH / BEARISH when price and the SMAs are stacked in order, else NEUTRAL"""
+    current_price = df['Close'].iloc[-1]
+    sma20 = df['SMA_20'].iloc[-1]
+    sma50 = df['SMA_50'].iloc[-1]
+    sma200 = df['SMA_200'].iloc[-1]
+
+    return "BULLISH" if current_price > sma20 > sma50 > sma200 else \
+           "BEARISH" if current_price < sma20 < sma50 < sma200 else "NEUTRAL"
+
+
+def summarize(symbol, df, meta):
+    """One flat row of headline metrics, latest indicators and signals for batch output"""
+    metrics = compute_metrics(df, meta)
+    bullish_signals, bearish_signals = signal_counts(df)
+    returns = df['Returns'].dropna()
+    last = df.iloc[-1]
+
+    row = {
+        'symbol': symbol,
+        'date': last['Date'],
+        'bars': len(df),
+        **metrics,
+        'trend': trend_signal(df),
+        'bullish_signals': bullish_signals,
+        'bearish_signals': bearish_signals,
+        'rating': rating(bullish_signals, bearish_signals),
+        'annual_volatility': returns.std() * np.sqrt(252),
+        'total_return': (df['Close'].iloc[-1] / df['Close'].iloc[0]) - 1,
+    }
+    for column in ('SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'MACD', 'MACD_Signal',
+                   'Stoch_K', 'Stoch_D', 'ATR', 'BB_Upper', 'BB_Lower'):
+        row[column] = last[column]
+
+    return row
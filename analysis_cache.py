@@ -0,0 +1,108 @@
+"""
+Analysis cache
+Recently analyzed series kept in memory for instant switching between symbols
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def data_bytes(data):
+    """Approximate memory held by a loaded series: its frame plus the base bars it came from"""
+    size = int(data['df'].memory_usage(index=True).sum())
+    base = data.get('base')
+    if base is not None and base['raw'] is not data['df']:
+        size += int(base['raw'].memory_usage(index=True).sum())
+    return size
+
+
+class CacheEntry:
+    """One loaded series and when its bars were downloaded"""
+
+    def __init__(self, data, loaded):
+        self.data = data
+        self.loaded = loaded
+        self.size = data_bytes(data)
+
+
+class AnalysisCache:
+    """Least recently used loaded series, keyed by (symbol, period, interval)
+
+    Holds the dicts built by the fetch worker (frame with indicators, meta,
+    indicator engine, metric and report snapshots), bounded by entry count
+    and by the bytes of the frames held. Entries older than `ttl` seconds
+    are still served but reported stale, so the caller can show them at once
+    and refresh them in the background.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=256 * 1024 * 1024, ttl=60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(data, stale) for a cached series, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.data, time.monotonic() - entry.loaded > self.ttl
+
+    def put(self, key, data, loaded=None):
+        """Store a series, evicting the least recently used beyond the bounds
+
+        `loaded` is the time.monotonic() at which its bars were downloaded
+        (now by default); a series resampled from older bars passes theirs so
+        it goes stale with them.
+        """
+        entry = CacheEntry(data, time.monotonic() if loaded is None else loaded)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict()
+
+    def remeasure(self, key):
+        """Recount the bytes of an entry whose frame was replaced (e.g. by live ticks)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = data_bytes(entry.data)
+            self.bytes += size - entry.size
+            entry.size = size
+            self._evict()
+
+    def _evict(self):
+        # The most recently used entry stays even when it alone exceeds max_bytes
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
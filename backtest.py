@@ -0,0 +1,267 @@
+"""
+Signal backtester
+Replays the five trading-signal rules and the overall rating on every bar at once
+
+    python backtest.py AAPL --period 5y
+    python backtest.py AAPL --period 5y --sweep
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import analysis
+import data_sources
+import indicators
+import market_data
+from bar_store import BarStore
+
+# Rating codes for the STRONG SELL ... STRONG BUY labels
+RATING_LABELS = {-2: "STRONG SELL", -1: "SELL", 0: "HOLD", 1: "BUY", 2: "STRONG BUY"}
+
+DEFAULT_PARAMS = {
+    'rsi_low': 30, 'rsi_high': 70,
+    'stoch_low': 20, 'stoch_high': 80,
+    'entry': 1, 'exit': -1,
+}
+
+# Threshold grid for --sweep: 7 * 7 * 7 * 7 * (3 * 3 - 1) = 19,208 combinations once the
+# entry/exit pair that always conflicts (entry 0, exit 0) is left out
+SWEEP_GRID = {
+    'rsi_low': [20, 25, 30, 35, 40, 45, 50],
+    'rsi_high': [50, 55, 60, 65, 70, 75, 80],
+    'stoch_low': [5, 10, 15, 20, 25, 30, 35],
+    'stoch_high': [65, 70, 75, 80, 85, 90, 95],
+    'entry': [0, 1, 2],
+    'exit': [-2, -1, 0],
+}
+
+# Bars per year for annualizing returns and Sharpe
+PERIODS_PER_YEAR = {
+    "1m": 252 * 390, "5m": 252 * 78, "15m": 252 * 26, "30m": 252 * 13,
+    "1h": 252 * 7, "1d": 252, "1wk": 52, "1mo": 12
+}
+
+
+def signal_arrays(df):
+    """Float arrays of the columns the signal rules read, in count_signals order"""
+    return [df[col].to_numpy(dtype=np.float64) for col in analysis.SIGNAL_COLUMNS]
+
+
+def ratings(bullish_signals, bearish_signals):
+    """Rating code per bar, same thresholds as analysis.rating"""
+    diff = np.asarray(bullish_signals) - np.asarray(bearish_signals)
+    return np.select([diff > 1, diff > 0, diff < -1, diff < 0], [2, 1, -2, -1], 0)
+
+
+def positions(rating, entry=1, exit=-1, allow_short=False):
+    """Target position per bar from the rating series
+
+    Goes long when the rating reaches `entry`, leaves (or goes short) when it
+    drops to `exit` and otherwise keeps the previous position.
+    """
+    target = np.full(len(rating), np.nan)
+    target[rating <= exit] = -1.0 if allow_short else 0.0
+    target[rating >= entry] = 1.0
+
+    # Forward-fill the bars in between, flat before the first signal
+    index = np.where(np.isnan(target), 0, np.arange(len(target)))
+    np.maximum.accumulate(index, out=index)
+    held = target[index]
+    return np.where(np.isnan(held), 0.0, held)
+
+
+def bar_returns(close):
+    """Close-to-close return of each bar (0 for the first)"""
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    return returns
+
+
+def evaluate(close, position, periods_per_year=252, cost=0.0, returns=None):
+    """Performance of holding `position` (decided at each close, applied to the next bar)
+
+    cost is charged per unit of turnover as a fraction of equity, e.g. 0.001
+    for 10 bps. Pass precomputed bar_returns when evaluating many positions.
+    """
+    if returns is None:
+        returns = bar_returns(close)
+
+    held = np.zeros(len(position))
+    held[1:] = position[:-1]
+    trades = np.abs(np.diff(held, prepend=0.0))
+    strategy = held * returns - cost * trades
+
+    equity = np.cumprod(1 + strategy)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    std = strategy.std()
+    years = len(close) / periods_per_year
+
+    return {
+        'total_return': equity[-1] - 1,
+        'annual_return': equity[-1] ** (1 / years) - 1 if years > 0 and equity[-1] > 0 else np.nan,
+        'max_drawdown': drawdown.min(),
+        'sharpe': strategy.mean() / std * np.sqrt(periods_per_year) if std != 0 else 0.0,
+        'turnover': trades.sum(),
+        'annual_turnover': trades.sum() / years if years > 0 else np.nan,
+        'trades': int(np.count_nonzero(trades)),
+        'exposure': np.abs(held).mean(),
+        'buy_hold_return': close[-1] / close[0] - 1,
+    }
+
+
+def rating_codes(arrays, rsi_low=30, rsi_high=70, stoch_low=20, stoch_high=80):
+    """Rating code per bar for one set of RSI/Stochastic thresholds"""
+    bullish, bearish = analysis.count_signals(*arrays, rsi_low=rsi_low, rsi_high=rsi_high,
+                                              stoch_low=stoch_low, stoch_high=stoch_high)
+    return ratings(bullish, bearish)
+
+
+def run(arrays, rsi_low=30, rsi_high=70, stoch_low=20, stoch_high=80, entry=1, exit=-1,
+        allow_short=False, periods_per_year=252, cost=0.0):
+    """Backtest one parameter set on precomputed signal_arrays"""
+    rating = rating_codes(arrays, rsi_low, rsi_high, stoch_low, stoch_high)
+    return evaluate(arrays[0], positions(rating, entry, exit, allow_short), periods_per_year, cost)
+
+
+def backtest(df, periods_per_year=252, cost=0.0, allow_short=False, **params):
+    """Backtest the rating rules on a DataFrame with indicator columns"""
+    options = dict(DEFAULT_PARAMS, **params)
+    return run(signal_arrays(df), allow_short=allow_short, periods_per_year=periods_per_year,
+               cost=cost, **options)
+
+
+def rating_series(df, **params):
+    """Rating label for every bar, e.g. to plot or export alongside the prices"""
+    options = {k: v for k, v in dict(DEFAULT_PARAMS, **params).items() if k not in ('entry', 'exit')}
+    bullish, bearish = analysis.count_signals(*signal_arrays(df), **options)
+    return pd.Series(ratings(bullish, bearish), index=df.index).map(RATING_LABELS)
+
+
+# Parameter sweep: each worker process receives the arrays once
+_sweep_arrays = None
+_sweep_options = None
+
+
+def _init_sweep(arrays, options):
+    global _sweep_arrays, _sweep_options
+    _sweep_arrays = arrays
+    _sweep_options = options
+
+
+def _run_chunk(combinations):
+    close = _sweep_arrays[0]
+    returns = bar_returns(close)
+    allow_short = _sweep_options['allow_short']
+    periods_per_year = _sweep_options['periods_per_year']
+    cost = _sweep_options['cost']
+
+    # Neighbouring combinations differ only in entry/exit, so the rating
+    # series is computed once per threshold set
+    results = []
+    last_thresholds = rating = None
+    for params in combinations:
+        thresholds = (params['rsi_low'], params['rsi_high'], params['stoch_low'], params['stoch_high'])
+        if thresholds != last_thresholds:
+            rating = rating_codes(_sweep_arrays, *thresholds)
+            last_thresholds = thresholds
+
+        position = positions(rating, params['entry'], params['exit'], allow_short)
+        results.append(evaluate(close, position, periods_per_year, cost, returns))
+
+    return results
+
+
+def sweep_combinations(grid=SWEEP_GRID):
+    """Parameter dicts of every combination in `grid` worth testing
+
+    Combinations whose entry level is not above the exit level are skipped:
+    both signals fire on the same ratings and the long side always wins.
+    """
+    names = list(grid)
+    combinations = (dict(zip(names, values)) for values in itertools.product(*grid.values()))
+    return [params for params in combinations
+            if params.get('entry', DEFAULT_PARAMS['entry']) > params.get('exit', DEFAULT_PARAMS['exit'])]
+
+
+def sweep(df, grid=SWEEP_GRID, workers=None, periods_per_year=252, cost=0.0, allow_short=False):
+    """Backtest every combination in `grid` across worker processes
+
+    Returns a DataFrame with one row per combination, best Sharpe first.
+    """
+    combinations = sweep_combinations(grid)
+    arrays = signal_arrays(df)
+    options = dict(periods_per_year=periods_per_year, cost=cost, allow_short=allow_short)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_sweep(arrays, options)
+        results = _run_chunk(combinations)
+    else:
+        # A few chunks per worker keeps pickling overhead low and the load balanced
+        size = max(1, len(combinations) // (workers * 4))
+        chunks = [combinations[i:i + size] for i in range(0, len(combinations), size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep,
+                                 initargs=(arrays, options)) as pool:
+            results = [result for chunk in pool.map(_run_chunk, chunks) for result in chunk]
+
+    table = pd.concat([pd.DataFrame(combinations), pd.DataFrame(results)], axis=1)
+    return table.sort_values('sharpe', ascending=False, ignore_index=True)
+
+
+def format_result(result):
+    return (f"Return {result['total_return'] * 100:+8.2f}%   "
+            f"Buy & Hold {result['buy_hold_return'] * 100:+8.2f}%   "
+            f"Max DD {result['max_drawdown'] * 100:7.2f}%   "
+            f"Sharpe {result['sharpe']:5.2f}   "
+            f"Turnover {result['turnover']:5.1f} ({result['trades']} trades)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the technical-analysis rating rules")
+    parser.add_argument('symbol')
+    parser.add_argument('--period', default="5y", choices=list(market_data.PERIOD_MAP))
+    parser.add_argument('--interval', default="1d", choices=list(PERIODS_PER_YEAR))
+    parser.add_argument('--cost', type=float, default=0.0, help="cost per unit turnover, e.g. 0.001 = 10 bps")
+    parser.add_argument('--short', action='store_true', help="go short on exit signals instead of flat")
+    parser.add_argument('--sweep', action='store_true', help="sweep the threshold grid")
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10, help="rows of the sweep to print")
+    parser.add_argument('-o', '--output', help="write the full sweep table to this CSV file")
+    parser.add_argument('--source', default=None,
+                        help="data source: yahoo (default), synthetic[:bars][@latency] or replay:<dir>[@latency]")
+    args = parser.parse_args(argv)
+    source = data_sources.source_from_spec(args.source)
+    market_data.set_source(source)
+
+    store = None if data_sources.is_simulated(source) else BarStore()
+    raw_df, _ = market_data.fetch_chart(args.symbol.upper(), args.period, args.interval, store=store)
+    df = indicators.calculate_indicators(raw_df)
+    periods_per_year = PERIODS_PER_YEAR[args.interval]
+
+    result = backtest(df, periods_per_year=periods_per_year, cost=args.cost, allow_short=args.short)
+    print(f"{args.symbol.upper()} {len(df)} bars, default rules")
+    print(format_result(result))
+
+    if args.sweep:
+        n = len(sweep_combinations())
+        start = time.perf_counter()
+        table = sweep(df, workers=args.workers, periods_per_year=periods_per_year,
+                      cost=args.cost, allow_short=args.short)
+        print(f"\nSwept {n:,} combinations in {time.perf_counter() - start:.2f}s")
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(table.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        if args.output:
+            table.to_csv(args.output, index=False)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Persistent OHLCV bar cache
+Stores downloaded bars per symbol/interval in SQLite so refreshes only fetch new bars
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from itertools import repeat
+
+import numpy as np
+
+from market_data import QUOTE_FIELDS, quote_arrays
+from profiling import timed
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.financial_analysis_pro', 'bars.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    covered_from INTEGER NOT NULL,
+    meta TEXT,
+    updated INTEGER,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+# Meta fields that describe the requested period rather than the latest bar
+PERIOD_META_FIELDS = ('chartPreviousClose', 'previousClose')
+
+# Symbols bound in one IN (...) filter
+SYMBOLS_PER_QUERY = 500
+
+class BarStore:
+    """SQLite-backed store of OHLCV bars keyed by (symbol, interval)
+
+    Every method opens its own connection so the store can be shared by the
+    UI and the fetch worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def coverage(self, symbol, interval):
+        """Return (covered_from, overlap_ts) or None when nothing is cached
+
+        overlap_ts is the timestamp a delta download should start from. It is the
+        second-to-last cached bar, so the last bar (which may still have been
+        forming when stored) is always replaced by fresh data.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT covered_from FROM series WHERE symbol = ? AND interval = ?",
+                (symbol, interval)).fetchone()
+            if row is None:
+                return None
+
+            last_two = conn.execute(
+                "SELECT ts FROM bars WHERE symbol = ? AND interval = ? ORDER BY ts DESC LIMIT 2",
+                (symbol, interval)).fetchall()
+
+        if not last_two:
+            return None
+
+        return row[0], last_two[-1][0]
+
+    @timed('cache_save')
+    def save(self, symbol, interval, timestamps, quotes, meta, requested_from):
+        """Replace cached bars from requested_from onwards with a fresh download"""
+        # Incomplete bars are dropped, same as the DataFrame path does
+        timestamps, block = quote_arrays(timestamps, quotes)
+        rows = list(zip(repeat(symbol), repeat(interval), timestamps.tolist(), *block.tolist()))
+
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            # An empty answer keeps what is cached rather than wiping the overlap
+            if rows:
+                conn.execute(
+                    "DELETE FROM bars WHERE symbol = ? AND interval = ? AND ts >= ?",
+                    (symbol, interval, requested_from))
+                conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+            existing = conn.execute(
+                "SELECT covered_from, meta FROM series WHERE symbol = ? AND interval = ?",
+                (symbol, interval)).fetchone()
+            covered_from = min(existing[0], requested_from) if existing else requested_from
+
+            # A delta's previous close is the one before the delta window, not
+            # before the period: keep the period fields of the full download
+            if existing and existing[1] and requested_from > existing[0]:
+                stored = json.loads(existing[1])
+                meta = dict(meta)
+                for field in PERIOD_META_FIELDS:
+                    if field in stored:
+                        meta[field] = stored[field]
+                    else:
+                        meta.pop(field, None)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?)",
+                (symbol, interval, covered_from, json.dumps(meta), int(time.time())))
+
+    @timed('cache_load')
+    def load(self, symbol, interval, start_ts=0):
+        """Return (timestamps, quotes, meta) arrays for cached bars at or after start_ts
+
+        When the cache reaches back before start_ts, meta['chartPreviousClose']
+        is the close of the last bar before it, as a download of the same
+        range would report.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts",
+                (symbol, interval, start_ts)).fetchall()
+            meta_row = conn.execute(
+                "SELECT meta FROM series WHERE symbol = ? AND interval = ?",
+                (symbol, interval)).fetchone()
+            before = conn.execute(
+                "SELECT close FROM bars WHERE symbol = ? AND interval = ? AND ts < ? "
+                "ORDER BY ts DESC LIMIT 1",
+                (symbol, interval, start_ts)).fetchone()
+
+        meta = json.loads(meta_row[0]) if meta_row and meta_row[0] else {}
+        if before is not None:
+            meta['chartPreviousClose'] = before[0]
+
+        data = np.array(rows, dtype=np.float64).reshape(-1, len(QUOTE_FIELDS) + 1)
+        timestamps = data[:, 0].astype(np.int64)
+        quotes = {field: data[:, i + 1] for i, field in enumerate(QUOTE_FIELDS)}
+
+        return timestamps, quotes, meta
+
+    def latest_closes(self, symbols, interval="1d"):
+        """Return {symbol: (last close, previous close)} from the cache; previous may be None"""
+        closes = {}
+        with closing(self._connect()) as conn:
+            for symbol in symbols:
+                rows = conn.execute(
+                    "SELECT close FROM bars WHERE symbol = ? AND interval = ? ORDER BY ts DESC LIMIT 2",
+                    (symbol, interval)).fetchall()
+                if rows:
+                    closes[symbol] = (rows[0][0], rows[1][0] if len(rows) > 1 else None)
+
+        return closes
+
+    def symbols(self, interval="1d"):
+        """Symbols with cached bars for an interval, alphabetically"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT symbol FROM series WHERE interval = ? ORDER BY symbol", (interval,)).fetchall()
+        return [row[0] for row in rows]
+
+    @timed('cache_load_many')
+    def load_many(self, interval, start_ts=0, symbols=None):
+        """Return {symbol: (timestamps, (5, n) QUOTE_FIELDS block)} for many symbols in one query
+
+        Covers every cached symbol of the interval unless `symbols` is given;
+        symbols without bars since start_ts are left out.
+        """
+        query = ("SELECT symbol, ts, open, high, low, close, volume FROM bars "
+                 "WHERE interval = ? AND ts >= ?")
+        with closing(self._connect()) as conn:
+            if symbols is None:
+                rows = conn.execute(query + " ORDER BY symbol, ts", (interval, start_ts)).fetchall()
+            else:
+                # Chunks stay under SQLite's limit on bound parameters
+                symbols = sorted(set(symbols))
+                rows = []
+                for i in range(0, len(symbols), SYMBOLS_PER_QUERY):
+                    chunk = symbols[i:i + SYMBOLS_PER_QUERY]
+                    rows += conn.execute(
+                        query + f" AND symbol IN ({', '.join('?' * len(chunk))}) ORDER BY symbol, ts",
+                        (interval, start_ts, *chunk)).fetchall()
+
+        if not rows:
+            return {}
+
+        names = np.array([row[0] for row in rows])
+        data = np.array([row[1:] for row in rows], dtype=np.float64)
+        bounds = np.concatenate([[0], np.flatnonzero(names[1:] != names[:-1]) + 1, [len(names)]])
+
+        series = {}
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            series[str(names[start])] = (data[start:end, 0].astype(np.int64), data[start:end, 1:].T)
+        return series
+
+    def clear(self, symbol=None):
+        """Drop cached bars for one symbol, or everything"""
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            if symbol is None:
+                conn.execute("DELETE FROM bars")
+                conn.execute("DELETE FROM series")
+            else:
+                conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                conn.execute("DELETE FROM series WHERE symbol = ?", (symbol,))
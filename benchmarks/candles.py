@@ -0,0 +1,75 @@
+"""
+Candlestick rendering benchmark
+Compares the per-bar Rectangle/plot loop with the vectorized collections in charts.py
+
+    python -m benchmarks.candles --bars 250 1000 5000 20000
+"""
+
+import argparse
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+import charts
+from benchmarks.synthetic import make_bars
+
+
+def draw_loop(ax, df):
+    """Previous implementation: one line and one Rectangle per bar"""
+    for idx in range(len(df)):
+        row = df.iloc[idx]
+        color = '#00ff88' if row['Close'] >= row['Open'] else '#ff4444'
+
+        ax.plot([row['Date'], row['Date']], [row['Low'], row['High']], color=color, linewidth=1)
+
+        body_height = abs(row['Close'] - row['Open'])
+        body_bottom = min(row['Open'], row['Close'])
+
+        rect = Rectangle((mdates.date2num(row['Date']) - 0.3, body_bottom),
+                         0.6, body_height, facecolor=color, edgecolor=color)
+        ax.add_patch(rect)
+
+
+def draw_vectorized(ax, df):
+    charts.draw_candlesticks(ax, df['Date'], df['Open'], df['High'], df['Low'], df['Close'])
+
+
+def time_render(draw, df):
+    """Seconds to build the artists and render one frame"""
+    fig = Figure(figsize=(16, 9))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    start = time.perf_counter()
+    draw(ax, df)
+    canvas.draw()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candlestick render time against bar count")
+    parser.add_argument('--bars', type=int, nargs='+', default=[250, 1000, 5000, 20000])
+    parser.add_argument('--max-loop-bars', type=int, default=5000,
+                        help="skip the per-bar loop above this size (it takes minutes)")
+    args = parser.parse_args()
+
+    print(f"{'Bars':>10} {'Loop (s)':>12} {'Vectorized (s)':>16} {'Speedup':>10}")
+    for n in args.bars:
+        df = make_bars(n)
+        vectorized = time_render(draw_vectorized, df)
+
+        if n <= args.max_loop_bars:
+            loop = time_render(draw_loop, df)
+            print(f"{n:>10} {loop:>12.3f} {vectorized:>16.3f} {loop / vectorized:>9.1f}x")
+        else:
+            print(f"{n:>10} {'-':>12} {vectorized:>16.3f} {'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
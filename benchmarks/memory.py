@@ -0,0 +1,52 @@
+"""
+Bar memory benchmark
+Bytes held by the indicator DataFrame against CompactBars, with and without indicators
+
+    python -m benchmarks.memory --bars 10000 100000 1000000
+"""
+
+import argparse
+import tracemalloc
+
+from benchmarks.synthetic import make_bars
+from compact import CompactBars
+from indicators import INDICATOR_COLUMNS, calculate_indicators
+
+
+def traced(func, *args):
+    """Result of func(*args) and the peak bytes allocated while it ran"""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def all_indicators(bars):
+    for name in INDICATOR_COLUMNS:
+        bars[name]
+    return bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of the bar representations against bar count")
+    parser.add_argument('--bars', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'Bars':>10} {'DataFrame':>12} {'Compact':>12} {'+Indicators':>12} "
+          f"{'Peak DF':>12} {'Peak compact':>13}")
+    for n in args.bars:
+        raw = make_bars(n, freq='min')
+        df, df_peak = traced(calculate_indicators, raw)
+        bars = CompactBars.from_frame(raw)
+        ohlcv = bars.nbytes
+        bars, compact_peak = traced(all_indicators, bars)
+
+        mb = 1024 * 1024
+        print(f"{n:>10} {df.memory_usage(deep=True).sum() / mb:>10.1f}MB {ohlcv / mb:>10.1f}MB "
+              f"{bars.nbytes / mb:>10.1f}MB {df_peak / mb:>10.1f}MB {compact_peak / mb:>11.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Chart payload parsing benchmark
+Compares the list-comprehension/dropna parser with the typed-array parser in market_data.py
+
+    python -m benchmarks.parsing --bars 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import market_data
+import transport
+from benchmarks.synthetic import make_payload
+
+
+def parse_previous(content):
+    """Previous implementation: json module, datetime per bar, DataFrame from lists, dropna"""
+    timestamps, quotes, meta = market_data.extract_chart(json.loads(content))
+    df = pd.DataFrame({
+        'Date': [datetime.fromtimestamp(ts) for ts in timestamps],
+        'Open': quotes['open'],
+        'High': quotes['high'],
+        'Low': quotes['low'],
+        'Close': quotes['close'],
+        'Volume': quotes['volume']
+    })
+    return df.dropna(), meta
+
+
+def parse_current(content):
+    return market_data.parse_chart(transport.json_loads(content))
+
+
+def best_of(parse, content, repeat):
+    """Fastest of `repeat` runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(content)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart payload parse time against bar count")
+    parser.add_argument('--bars', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    decoder = 'orjson' if transport.orjson is not None else 'json'
+    print(f"JSON decoder: {decoder}")
+    print(f"{'Bars':>10} {'Payload (MB)':>14} {'Previous (s)':>14} {'Current (s)':>13} {'Speedup':>10}")
+    for n in args.bars:
+        content = make_payload(n)
+        previous = best_of(parse_previous, content, args.repeat)
+        current = best_of(parse_current, content, args.repeat)
+        print(f"{n:>10} {len(content) / 1e6:>14.1f} {previous:>14.4f} {current:>13.4f} {previous / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Portfolio revaluation benchmark
+Time to revalue every lot and rebuild the ladders after one price tick
+
+    python -m benchmarks.portfolio --lots 500 5000 50000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from portfolio import Portfolio
+
+
+def make_portfolio(n_lots, n_symbols=500, seed=0):
+    """Random book of n_lots spread over n_symbols, all priced"""
+    rng = np.random.default_rng(seed)
+    book = Portfolio(path=None)
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    picks = rng.integers(0, n_symbols, n_lots)
+    book.set_lots([symbols[i] for i in picks], rng.integers(1, 1000, n_lots),
+                   rng.uniform(10, 500, n_lots), [''] * n_lots)
+    for symbol in symbols:
+        price = rng.uniform(10, 500)
+        book.update_price(symbol, price, price * (1 + rng.normal(0, 0.02)))
+    return book
+
+
+def time_tick(book, repeat):
+    """Best time of one price update followed by a full revaluation, in seconds"""
+    rng = np.random.default_rng(1)
+    times = []
+    for _ in range(repeat):
+        symbol = book.symbols[rng.integers(len(book.symbols))]
+        start = time.perf_counter()
+        book.update_price(symbol, rng.uniform(10, 500))
+        book.valuation()
+        book.positions()
+        book.ladders()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio revaluation time against lot count")
+    parser.add_argument('--lots', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'Lots':>10} {'Tick (ms)':>12}")
+    for n in args.lots:
+        print(f"{n:>10} {time_tick(make_portfolio(n), args.repeat) * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
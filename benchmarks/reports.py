@@ -0,0 +1,42 @@
+"""
+Report generation benchmark
+Time to snapshot and render the technical report for many symbols, excluding fetch and indicators
+
+    python -m benchmarks.reports --symbols 1000 --bars 252
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_bars
+from indicators import calculate_indicators
+import reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report snapshot and render time for a batch of symbols")
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--bars', type=int, default=252)
+    args = parser.parse_args()
+
+    frames = [calculate_indicators(make_bars(args.bars, seed=i)) for i in range(args.symbols)]
+    symbols = [f"S{i:04d}" for i in range(args.symbols)]
+
+    start = time.perf_counter()
+    snapshots = [reports.snapshot(df, symbol) for df, symbol in zip(frames, symbols)]
+    elapsed = time.perf_counter() - start
+    print(f"{'Stage':<12} {'Total (ms)':>12} {'Per symbol (us)':>16}")
+    print(f"{'snapshot':<12} {elapsed * 1000:>12.1f} {elapsed / args.symbols * 1e6:>16.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in reports.REPORT_FORMATS:
+            start = time.perf_counter()
+            reports.export_reports(snapshots, os.path.join(tmp, f"reports.{reports.FILE_EXTENSIONS[fmt]}"), fmt)
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:<12} {elapsed * 1000:>12.1f} {elapsed / args.symbols * 1e6:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Pipeline benchmark suite
+Times every stage between the download and the screen on synthetic data, headless
+
+    python -m benchmarks.suite --bars 1000 10000 100000 1000000 -o results.json
+    python -m benchmarks.suite -o new.json --compare results.json
+
+Stages run the same code the GUI does: parsing a chart payload (generated
+by a ReplayChartSource beforehand, so only decode and parse are timed),
+indicators, the price and indicator charts on the Agg backend (first draw and
+a last-bar refresh), the technical report and the data table page. Peak memory
+is measured in a second, traced run so tracemalloc does not slow down the
+timings.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import charts
+import data_sources
+import indicators
+import market_data
+import reports
+from data_table import VirtualTable
+from transport import json_loads
+
+
+class HeadlessTree:
+    """Stand-in for the ttk.Treeview (and scrollbar) behind VirtualTable"""
+
+    def __init__(self):
+        self.rows = {}
+        self._next = 0
+
+    def insert(self, parent, index, **kwargs):
+        self._next += 1
+        self.rows[self._next] = kwargs
+        return self._next
+
+    def item(self, item, **kwargs):
+        self.rows[item] = kwargs
+
+    def delete(self, item):
+        del self.rows[item]
+
+    def move(self, item, parent, index):
+        pass
+
+    def bbox(self, item):
+        return None
+
+    def bind(self, *args):
+        pass
+
+    def config(self, **kwargs):
+        pass
+
+    def set(self, *args):
+        pass
+
+
+# Stages: each takes the shared state dict and returns what later stages need
+def make_content(n):
+    """Chart JSON bytes with n one-minute bars, as the endpoint would send them"""
+    source = data_sources.ReplayChartSource(bars=n, encode=False)
+    payload = source.download_chart('BENCH', '1m', 0, source.end)
+    return json.dumps(payload).encode()
+
+
+def stage_parse(state):
+    raw_df, meta = market_data.parse_chart(json_loads(state['content']))
+    return {'raw_df': raw_df, 'meta': meta}
+
+
+def stage_indicators(state):
+    return {'df': indicators.calculate_indicators(state['raw_df'])}
+
+
+def _figure():
+    fig = Figure(figsize=(14, 8), facecolor=charts.BG_COLOR)
+    return fig, FigureCanvasAgg(fig)
+
+
+def _last_bar_moved(df):
+    """Copy of df whose last close moved a little, as a live tick would"""
+    df = df.copy()
+    df.iloc[-1, df.columns.get_loc('Close')] *= 1.0001
+    return df
+
+
+def stage_price_chart(state):
+    fig, canvas = _figure()
+    chart = charts.PriceChart(fig, canvas)
+    chart.render(state['df'], 'BENCH')
+    canvas.draw()
+    return {'price_chart': chart}
+
+
+def stage_price_chart_update(state):
+    state['price_chart'].render(state['moved_df'], 'BENCH')
+    return {}
+
+
+def stage_indicator_chart(state):
+    fig, canvas = _figure()
+    chart = charts.IndicatorChart(fig, canvas)
+    chart.render(state['df'], 'BENCH')
+    canvas.draw()
+    return {'indicator_chart': chart}
+
+
+def stage_indicator_chart_update(state):
+    state['indicator_chart'].render(state['moved_df'], 'BENCH')
+    return {}
+
+
+def stage_report(state):
+    return {'report': reports.render_text(reports.snapshot(state['df'], 'BENCH'))}
+
+
+def stage_data_table(state):
+    tree = HeadlessTree()
+    table = VirtualTable(tree, tree)
+    table.set_frame(state['df'], ('BENCH', 'max', '1m'))
+    return {}
+
+
+STAGES = [
+    ('parse', stage_parse),
+    ('indicators', stage_indicators),
+    ('price_chart', stage_price_chart),
+    ('price_chart_update', stage_price_chart_update),
+    ('indicator_chart', stage_indicator_chart),
+    ('indicator_chart_update', stage_indicator_chart_update),
+    ('report', stage_report),
+    ('data_table', stage_data_table),
+]
+
+
+def run_stages(n, repeat, trace):
+    """{stage: seconds} (best of repeat), or {stage: peak bytes} when trace is set"""
+    state = {'content': make_content(n)}
+    results = {}
+
+    for name, stage in STAGES:
+        best = None
+        for _ in range(1 if trace else repeat):
+            if trace:
+                tracemalloc.start()
+            start = time.perf_counter()
+            output = stage(state)
+            elapsed = time.perf_counter() - start
+            if trace:
+                value = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                value = elapsed
+            best = value if best is None else min(best, value)
+
+        state.update(output)
+        if name == 'indicators':
+            state['moved_df'] = _last_bar_moved(state['df'])
+        results[name] = best
+
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the time ratio against a baseline run; returns the regressions found"""
+    previous = {(row['bars'], row['stage']): row for row in baseline['results']}
+    regressions = []
+
+    print(f"\n{'Bars':>10} {'Stage':<24} {'Base (ms)':>12} {'Now (ms)':>12} {'Ratio':>8}")
+    for row in results:
+        old = previous.get((row['bars'], row['stage']))
+        if old is None or not old['seconds']:
+            continue
+        ratio = row['seconds'] / old['seconds']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(row)
+        print(f"{row['bars']:>10} {row['stage']:<24} {old['seconds'] * 1000:>12.2f} "
+              f"{row['seconds'] * 1000:>12.2f} {ratio:>7.2f}x{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each pipeline stage against bar count")
+    parser.add_argument('--bars', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage, the fastest is kept")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced peak-memory run")
+    parser.add_argument('-o', '--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file from an earlier run")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio reported as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'Bars':>10} {'Stage':<24} {'Time (ms)':>12} {'Peak (MB)':>12}")
+    for n in args.bars:
+        times = run_stages(n, args.repeat, trace=False)
+        peaks = {} if args.no_memory else run_stages(n, 1, trace=True)
+        for name, _ in STAGES:
+            row = {'bars': n, 'stage': name, 'seconds': times[name], 'peak_bytes': peaks.get(name)}
+            results.append(row)
+            peak = f"{row['peak_bytes'] / 1024 / 1024:>12.1f}" if row['peak_bytes'] is not None else f"{'-':>12}"
+            print(f"{n:>10} {name:<24} {row['seconds'] * 1000:>12.2f} {peak}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than {args.threshold:.2f}x the baseline")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Synthetic market data for benchmarks
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def make_bars(n, freq='D', start='2000-01-03', seed=0):
+    """Return a random-walk OHLCV DataFrame with n bars"""
+    rng = np.random.default_rng(seed)
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.003, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n)))
+    volume = rng.integers(100_000, 5_000_000, n).astype(float)
+
+    return pd.DataFrame({
+        'Date': pd.date_range(start, periods=n, freq=freq),
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume
+    })
+
+
+def make_payload(n, interval=60, missing=0.01, seed=0):
+    """Return a Yahoo chart JSON payload (bytes) with n bars, some of them null"""
+    df = make_bars(n, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    start = 1_600_000_000
+    timestamps = list(range(start, start + n * interval, interval))
+
+    quote = {}
+    for field in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        values = df[field].round(4).tolist()
+        if field == 'Volume':
+            values = [int(v) for v in values]
+        # Yahoo sends null for every field of a bar with no trades
+        quote[field.lower()] = values
+
+    for i in np.flatnonzero(rng.random(n) < missing).tolist():
+        for values in quote.values():
+            values[i] = None
+
+    payload = {'chart': {'result': [{
+        'meta': {'symbol': 'TEST', 'chartPreviousClose': quote['close'][0]},
+        'timestamp': timestamps,
+        'indicators': {'quote': [quote]}
+    }], 'error': None}}
+    return json.dumps(payload).encode()
@@ -0,0 +1,758 @@
+"""
+Chart drawing helpers
+Vectorized candlestick and bar artists built from NumPy arrays, and the
+price/indicator figures that update those artists in place on refresh
+"""
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection, PolyCollection
+
+import decimation
+
+UP_COLOR = '#00ff88'
+DOWN_COLOR = '#ff4444'
+BG_COLOR = '#0a0e27'
+SPINE_COLOR = '#2e3350'
+
+
+def to_array(values):
+    return np.asarray(values, dtype=float)
+
+
+def date_numbers(dates):
+    """Convert a Date column to matplotlib date numbers"""
+    return mdates.date2num(np.asarray(dates, dtype='datetime64[ns]'))
+
+
+def up_down_colors(up_mask):
+    """Map a boolean mask to the bullish/bearish colours"""
+    return np.where(up_mask, UP_COLOR, DOWN_COLOR)
+
+
+def candle_geometry(x, open_, high, low, close, width=0.6):
+    """Return (wick segments, body polygons) arrays for candlesticks"""
+    wicks = np.empty((len(x), 2, 2))
+    wicks[:, 0, 0] = x
+    wicks[:, 0, 1] = low
+    wicks[:, 1, 0] = x
+    wicks[:, 1, 1] = high
+
+    bottom = np.minimum(open_, close)
+    top = np.maximum(open_, close)
+    return wicks, bar_geometry(x, bottom, top, width)
+
+
+def bar_geometry(x, bottom, top, width=0.8):
+    """Return an (n, 4, 2) array of rectangle corners centred on x"""
+    left = x - width / 2
+    right = x + width / 2
+
+    bars = np.empty((len(x), 4, 2))
+    bars[:, 0, 0] = left
+    bars[:, 0, 1] = bottom
+    bars[:, 1, 0] = left
+    bars[:, 1, 1] = top
+    bars[:, 2, 0] = right
+    bars[:, 2, 1] = top
+    bars[:, 3, 0] = right
+    bars[:, 3, 1] = bottom
+    return bars
+
+
+def candlestick_collections(x, open_, high, low, close, width=0.6, **kwargs):
+    """Build the wick LineCollection and body PolyCollection for candlesticks"""
+    colors = up_down_colors(close >= open_)
+    wicks, bodies = candle_geometry(x, open_, high, low, close, width)
+
+    wick_collection = LineCollection(wicks, colors=colors, linewidths=1, **kwargs)
+    body_collection = PolyCollection(bodies, facecolors=colors, edgecolors=colors, **kwargs)
+    return wick_collection, body_collection
+
+
+def update_candlesticks(wick_collection, body_collection, x, open_, high, low, close, width=0.6):
+    """Replace the candles held by existing collections"""
+    colors = up_down_colors(close >= open_)
+    wicks, bodies = candle_geometry(x, open_, high, low, close, width)
+
+    wick_collection.set_segments(wicks)
+    wick_collection.set_colors(colors)
+    body_collection.set_verts(bodies)
+    body_collection.set_facecolors(colors)
+    body_collection.set_edgecolors(colors)
+
+
+def update_bars(collection, x, heights, colors, width=0.8):
+    """Replace the bars held by an existing PolyCollection"""
+    collection.set_verts(bar_geometry(x, np.zeros_like(heights), heights, width))
+    collection.set_facecolors(colors)
+
+
+def draw_candlesticks(ax, dates, open_, high, low, close, width=0.6):
+    """Draw all candles as one LineCollection (wicks) and one PolyCollection (bodies)"""
+    x = date_numbers(dates)
+    open_, high, low, close = (to_array(v) for v in (open_, high, low, close))
+
+    wick_collection, body_collection = candlestick_collections(x, open_, high, low, close, width)
+    ax.add_collection(wick_collection)
+    ax.add_collection(body_collection)
+    ax.autoscale_view()
+
+    return wick_collection, body_collection
+
+
+def draw_bars(ax, dates, heights, colors, width=0.8, alpha=None):
+    """Draw a bar series (volume, histogram) as a single PolyCollection"""
+    x = date_numbers(dates)
+    heights = to_array(heights)
+
+    collection = PolyCollection(bar_geometry(x, np.zeros_like(heights), heights, width),
+                                facecolors=colors, edgecolors='none', alpha=alpha)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+
+    return collection
+
+
+def frame_arrays(df, columns):
+    """Pull the plotted columns out of a frame as float arrays, plus date numbers as 'x'"""
+    data = {'x': date_numbers(df['Date'])}
+    for col in columns:
+        data[col] = df[col].to_numpy(dtype=float)
+    return data
+
+
+def style_axes(ax):
+    ax.set_facecolor(BG_COLOR)
+    ax.grid(True, alpha=0.2)
+    ax.tick_params(colors='white')
+    for spine in ax.spines.values():
+        spine.set_color(SPINE_COLOR)
+
+
+def bar_spacing(x, default=1.0):
+    """Typical distance between neighbouring bars, used for candle and bar widths"""
+    if len(x) < 2:
+        return default
+    return float(np.median(np.diff(x)))
+
+
+def _view_timer(canvas, callback, interval=50):
+    """Single-shot timer that coalesces bursts of zoom/pan events"""
+    timer = canvas.new_timer(interval=interval)
+    timer.single_shot = True
+    timer.add_callback(callback)
+    return timer
+
+
+def _nan_range(*arrays):
+    values = np.concatenate([np.asarray(a, dtype=float).ravel() for a in arrays])
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    return values.min(), values.max()
+
+
+def band_polygons(x, y1, y2):
+    """Polygons filling between y1 and y2 over each run of finite values, like fill_between"""
+    x, y1, y2 = (np.asarray(a, dtype=float) for a in np.broadcast_arrays(x, y1, y2))
+    finite = np.isfinite(x) & np.isfinite(y1) & np.isfinite(y2)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], finite.astype(np.int8), [0]])))
+
+    polygons = []
+    for start, stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        xs = x[start:stop]
+        polygons.append(np.column_stack([np.concatenate([xs, xs[::-1]]),
+                                         np.concatenate([y1[start:stop], y2[start:stop][::-1]])]))
+    return polygons
+
+
+# (panel, column, plot kwargs) for the line series of the price chart
+PRICE_LINES = [
+    (0, 'SMA_20', dict(label='SMA 20', color='orange', linewidth=1, alpha=0.7)),
+    (0, 'SMA_50', dict(label='SMA 50', color='blue', linewidth=1, alpha=0.7)),
+    (0, 'SMA_200', dict(label='SMA 200', color='red', linewidth=1, alpha=0.7)),
+    (0, 'BB_Upper', dict(color='gray', linewidth=0.5, linestyle='--', alpha=0.5)),
+    (0, 'BB_Lower', dict(color='gray', linewidth=0.5, linestyle='--', alpha=0.5)),
+    (1, 'MACD', dict(label='MACD', color='#00aaff', linewidth=1)),
+    (1, 'MACD_Signal', dict(label='Signal', color='#ff6600', linewidth=1)),
+    (2, 'RSI', dict(label='RSI', color='#aa00ff', linewidth=1.5)),
+]
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'MACD_Hist'] + [col for _, col, _ in PRICE_LINES]
+
+INDICATOR_CHART_COLUMNS = ['Stoch_K', 'Stoch_D', 'ATR', 'OBV', 'Returns']
+
+# Bins of the returns distribution panel
+RETURN_BINS = 50
+
+
+class PriceChart:
+    """Candlestick, MACD, RSI and volume panels that keep their artists between refreshes
+
+    Every series is split into a static artist holding all bars but the last
+    and an animated artist for the last bar. A refresh that only changes the
+    last bar restores the saved background and blits the animated artists;
+    anything else updates the data of the existing artists and redraws once.
+    """
+
+    def __init__(self, fig, canvas):
+        self.fig = fig
+        self.canvas = canvas
+        self.symbol = None
+        self.data = None
+        self.axes = []
+        self.live = []
+        self._background = None
+        self._spacing = 1.0
+        self._updating = False
+        self._view_timer = _view_timer(canvas, self._refresh_view)
+        canvas.mpl_connect('draw_event', self._on_draw)
+        canvas.mpl_connect('resize_event', self._on_view_changed)
+
+    def render(self, df, symbol):
+        """Show df, rebuilding the figure only when the symbol changes"""
+        data = frame_arrays(df, PRICE_COLUMNS)
+
+        if symbol != self.symbol or self.data is None:
+            self._build(data, symbol)
+        elif self._only_last_bar_changed(data) and self._last_bar_in_view(data):
+            self._set_live(data)
+            self._blit()
+        else:
+            self._update(data)
+            self.canvas.draw_idle()
+
+        self.data = data
+
+    def _build(self, data, symbol):
+        self.live = []
+        self._background = None
+        self.symbol = symbol
+        self.fig.clear()
+
+        # Create subplots
+        gs = self.fig.add_gridspec(4, 1, height_ratios=[3, 1, 1, 1], hspace=0.1)
+        ax1 = self.fig.add_subplot(gs[0])
+        ax2 = self.fig.add_subplot(gs[1], sharex=ax1)
+        ax3 = self.fig.add_subplot(gs[2], sharex=ax1)
+        ax4 = self.fig.add_subplot(gs[3], sharex=ax1)
+        self.axes = [ax1, ax2, ax3, ax4]
+        for ax in self.axes:
+            ax.xaxis_date()
+            # Shared axes only notify the axes that was zoomed/panned, so listen on all
+            ax.callbacks.connect('xlim_changed', self._on_view_changed)
+
+        # Candles and bar panels: static collection plus a last-bar collection
+        empty = np.empty(0)
+        self.candles = candlestick_collections(empty, empty, empty, empty, empty)
+        self.live_candles = candlestick_collections(empty, empty, empty, empty, empty, animated=True)
+        self.macd_bars = PolyCollection([], edgecolors='none', alpha=0.3)
+        self.live_macd_bar = PolyCollection([], edgecolors='none', alpha=0.3, animated=True)
+        self.volume_bars = PolyCollection([], edgecolors='none', alpha=0.5)
+        self.live_volume_bar = PolyCollection([], edgecolors='none', alpha=0.5, animated=True)
+
+        for collection in (*self.candles, *self.live_candles):
+            ax1.add_collection(collection, autolim=False)
+        ax2.add_collection(self.macd_bars, autolim=False)
+        ax2.add_collection(self.live_macd_bar, autolim=False)
+        ax4.add_collection(self.volume_bars, autolim=False)
+        ax4.add_collection(self.live_volume_bar, autolim=False)
+
+        self.lines = {}
+        for panel, col, kwargs in PRICE_LINES:
+            ax = self.axes[panel]
+            static, = ax.plot([], [], **kwargs)
+            live_kwargs = dict(kwargs, label='_nolegend_')
+            live, = ax.plot([], [], animated=True, **live_kwargs)
+            self.lines[col] = (static, live)
+
+        self.live = [*self.live_candles, self.live_macd_bar, self.live_volume_bar] + \
+                    [live for _, live in self.lines.values()]
+        self.fills = {}
+        self.data = data
+
+        ax1.set_ylabel('Price ($)', color='white')
+        ax1.set_title(f'{symbol} - Technical Analysis', color='white', fontsize=14, fontweight='bold')
+        ax1.legend(loc='upper left', framealpha=0.3)
+
+        ax2.set_ylabel('MACD', color='white')
+        ax2.axhline(y=0, color='white', linewidth=0.5, alpha=0.5)
+        ax2.legend(loc='upper left', framealpha=0.3, fontsize=8)
+
+        ax3.axhline(y=70, color='#ff4444', linewidth=0.8, linestyle='--', alpha=0.7, label='Overbought')
+        ax3.axhline(y=30, color='#00ff88', linewidth=0.8, linestyle='--', alpha=0.7, label='Oversold')
+        ax3.set_ylabel('RSI', color='white')
+        ax3.set_ylim(0, 100)
+        ax3.legend(loc='upper left', framealpha=0.3, fontsize=8)
+
+        ax4.set_ylabel('Volume', color='white')
+        ax4.set_xlabel('Date', color='white')
+
+        for ax in self.axes:
+            style_axes(ax)
+        for ax in self.axes[:3]:
+            ax.tick_params(labelbottom=False)
+
+        self._update(data)
+        self.fig.autofmt_xdate()
+        self.canvas.draw()
+
+    def _update(self, data):
+        """Push new data into every artist and rescale the panels"""
+        self._updating = True
+        try:
+            self._set_static(data, full_range=True)
+            self._set_live(data)
+
+            # Collections are not covered by relim(), so their extents are added by hand
+            ax1, ax2, ax3, ax4 = self.axes
+            for ax in self.axes:
+                ax.relim()
+
+            x = data['x']
+            if len(x):
+                xmin, xmax = x.min() - self._spacing / 2, x.max() + self._spacing / 2
+                price = _nan_range(data['Low'], data['High'])
+                if price is not None:
+                    ax1.update_datalim([(xmin, price[0]), (xmax, price[1])])
+                macd = _nan_range(data['MACD_Hist'], [0])
+                ax2.update_datalim([(xmin, macd[0]), (xmax, macd[1])])
+                volume = _nan_range(data['Volume'], [0])
+                ax4.update_datalim([(xmin, volume[0]), (xmax, volume[1])])
+
+            for ax in self.axes:
+                ax.autoscale_view()
+
+            # Zoomed in through the toolbar: only the visible bars need detail
+            if not ax1.get_autoscalex_on():
+                self._set_static(data)
+        finally:
+            self._updating = False
+
+    def _set_static(self, data, full_range=False):
+        """Point the static artists at all bars but the last, decimated to the axes width"""
+        ax1, ax2, ax3, ax4 = self.axes
+        x = data['x'][:-1]
+        if full_range:
+            lo, hi = 0, len(x)
+        else:
+            lo, hi = decimation.visible_range(x, *ax1.get_xlim())
+        view = slice(lo, hi)
+        x = x[view]
+
+        def head(col):
+            return data[col][:-1][view]
+
+        # One candle needs about two pixels, a line segment one
+        pixels = max(int(ax1.bbox.width), 100)
+        candles = pixels // 2
+
+        cx, open_, high, low, close, volume = decimation.aggregate_ohlc(
+            x, head('Open'), head('High'), head('Low'), head('Close'), head('Volume'), candles)
+        macd_hist = decimation.extreme_per_bucket(head('MACD_Hist'), candles)
+        bb_upper, bb_lower = decimation.band_per_bucket(head('BB_Upper'), head('BB_Lower'), candles)
+
+        self._spacing = bar_spacing(cx, self._spacing)
+        update_candlesticks(*self.candles, cx, open_, high, low, close, width=0.6 * self._spacing)
+        update_bars(self.macd_bars, cx, macd_hist, up_down_colors(macd_hist >= 0), width=0.8 * self._spacing)
+        update_bars(self.volume_bars, cx, volume, up_down_colors(close >= open_), width=0.8 * self._spacing)
+
+        for col, (static, _) in self.lines.items():
+            static.set_data(*decimation.minmax_decimate(x, head(col), pixels))
+
+        # Bands run up to the last bar so the fill does not stop one bar short
+        fill_x = np.append(cx, data['x'][-1:])
+        self._replace_fill('bb', ax1, fill_x, np.append(bb_upper, data['BB_Upper'][-1:]),
+                           np.append(bb_lower, data['BB_Lower'][-1:]), alpha=0.1, color='gray')
+        self._replace_fill('rsi', ax3, data['x'][[0, -1]], 30, 70, alpha=0.1, color='gray')
+
+    def _set_live(self, data):
+        """Point the animated artists at the last bar"""
+        x = data['x']
+        last = slice(-1, None)
+        tail = slice(-2, None)
+
+        update_candlesticks(*self.live_candles, x[last], data['Open'][last], data['High'][last],
+                            data['Low'][last], data['Close'][last], width=0.6 * self._spacing)
+        update_bars(self.live_macd_bar, x[last], data['MACD_Hist'][last],
+                    up_down_colors(data['MACD_Hist'][last] >= 0), width=0.8 * self._spacing)
+        update_bars(self.live_volume_bar, x[last], data['Volume'][last],
+                    up_down_colors(data['Close'][last] >= data['Open'][last]), width=0.8 * self._spacing)
+
+        # Live line segments join the last static point to the last bar
+        for col, (_, live) in self.lines.items():
+            live.set_data(x[tail], data[col][tail])
+
+    def _on_view_changed(self, *args):
+        # Limits can change in the middle of an autoscale, so the work is deferred
+        if not self._updating:
+            self._view_timer.start()
+
+    def _refresh_view(self):
+        """Re-decimate for the visible range after a zoom, pan or resize"""
+        if self.data is None or not self.axes:
+            return
+
+        self._updating = True
+        try:
+            self._set_static(self.data)
+        finally:
+            self._updating = False
+        self.canvas.draw_idle()
+
+    def _replace_fill(self, key, ax, x, y1, y2, **kwargs):
+        if key in self.fills:
+            self.fills[key].remove()
+        self.fills[key] = ax.fill_between(x, y1, y2, **kwargs)
+
+    def _only_last_bar_changed(self, data):
+        if self.data is None or len(data['x']) != len(self.data['x']) or len(data['x']) < 2:
+            return False
+
+        return all(np.array_equal(values[:-1], self.data[key][:-1], equal_nan=True)
+                   for key, values in data.items())
+
+    def _last_bar_in_view(self, data):
+        ax1, ax2, ax3, ax4 = self.axes
+        xmin, xmax = ax1.get_xlim()
+        if not xmin <= data['x'][-1] <= xmax:
+            return False
+
+        checks = [
+            (ax1, [data['High'][-1], data['Low'][-1]] + [data[col][-1] for col in ['SMA_20', 'SMA_50', 'SMA_200', 'BB_Upper', 'BB_Lower']]),
+            (ax2, [data['MACD'][-1], data['MACD_Signal'][-1], data['MACD_Hist'][-1]]),
+            (ax4, [data['Volume'][-1]]),
+        ]
+        for ax, values in checks:
+            ymin, ymax = ax.get_ylim()
+            for value in values:
+                if np.isfinite(value) and not ymin <= value <= ymax:
+                    return False
+
+        return True
+
+    def _on_draw(self, event):
+        # Save the static figure, then put the animated artists on top of it
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.live:
+            artist.axes.draw_artist(artist)
+
+    def _blit(self):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._background)
+        for artist in self.live:
+            artist.axes.draw_artist(artist)
+        for ax in self.axes:
+            self.canvas.blit(ax.bbox)
+
+
+class IndicatorChart:
+    """Stochastic, ATR, OBV and returns distribution panels that keep their artists between refreshes
+
+    As in PriceChart, each time series is a static line up to the bar before
+    last plus an animated segment to the last bar, and the returns histogram
+    with its mean is animated too. Legends and fills are built once. A
+    refresh that only changes the last bar redraws the animated artists over
+    the saved background; anything else updates the artists' data and
+    redraws once.
+    """
+
+    def __init__(self, fig, canvas):
+        self.fig = fig
+        self.canvas = canvas
+        self.symbol = None
+        self.axes = None
+        self.data = None
+        self.live = []
+        self._background = None
+        self._updating = False
+        self._view_timer = _view_timer(canvas, self._refresh_view)
+        canvas.mpl_connect('draw_event', self._on_draw)
+        canvas.mpl_connect('resize_event', self._on_view_changed)
+
+    def render(self, df, symbol):
+        """Show df, rebuilding the figure only when the symbol changes"""
+        data = frame_arrays(df, INDICATOR_CHART_COLUMNS)
+
+        if symbol != self.symbol or self.axes is None:
+            self._build()
+            self.symbol = symbol
+            self.data = data
+            self._update(data)
+            self.fig.tight_layout()
+            self.canvas.draw()
+            return
+
+        distribution = self._distribution(data) if self._only_last_bar_changed(data) else None
+        self.data = data
+        if distribution is not None and self._last_bar_in_view(data, distribution):
+            self._set_live(data)
+            self._set_distribution(*distribution)
+            self._blit()
+        else:
+            self._update(data)
+            self.canvas.draw_idle()
+
+    def _build(self):
+        self.fig.clear()
+        self._background = None
+
+        # Create 2x2 subplot grid
+        axes = self.fig.subplots(2, 2)
+        self.axes = axes
+        for ax in (axes[0, 0], axes[0, 1], axes[1, 0]):
+            ax.xaxis_date()
+            ax.callbacks.connect('xlim_changed', self._on_view_changed)
+
+        # Stochastic Oscillator
+        self.lines = {}
+        self._add_line(axes[0, 0], 'Stoch_K', label='%K', color='#00aaff', linewidth=1.5)
+        self._add_line(axes[0, 0], 'Stoch_D', label='%D', color='#ff6600', linewidth=1.5)
+        axes[0, 0].axhline(y=80, color='#ff4444', linewidth=0.8, linestyle='--', alpha=0.5)
+        axes[0, 0].axhline(y=20, color='#00ff88', linewidth=0.8, linestyle='--', alpha=0.5)
+        axes[0, 0].set_title('Stochastic Oscillator', color='white', fontweight='bold')
+        axes[0, 0].set_ylabel('Value', color='white')
+        axes[0, 0].legend(loc='upper left', framealpha=0.3)
+
+        # ATR
+        self._add_line(axes[0, 1], 'ATR', label='ATR', color='#ff00ff', linewidth=1.5)
+        axes[0, 1].set_title('Average True Range (ATR)', color='white', fontweight='bold')
+        axes[0, 1].set_ylabel('ATR', color='white')
+        axes[0, 1].legend(loc='upper left', framealpha=0.3)
+
+        # OBV
+        self._add_line(axes[1, 0], 'OBV', label='OBV', color='#00ffff', linewidth=1.5)
+        axes[1, 0].set_title('On Balance Volume (OBV)', color='white', fontweight='bold')
+        axes[1, 0].set_ylabel('OBV', color='white')
+        axes[1, 0].set_xlabel('Date', color='white')
+        axes[1, 0].legend(loc='upper left', framealpha=0.3)
+
+        # Filled areas: polygons are swapped in on each update
+        self.fills = {
+            'stoch': PolyCollection([], alpha=0.1, color='gray'),
+            'atr': PolyCollection([], alpha=0.3, color='#ff00ff'),
+            'obv': PolyCollection([], alpha=0.3, color='#00ffff'),
+        }
+        for key, ax in (('stoch', axes[0, 0]), ('atr', axes[0, 1]), ('obv', axes[1, 0])):
+            ax.add_collection(self.fills[key], autolim=False)
+
+        # Returns Distribution
+        self.hist_bars = PolyCollection([], facecolors='#00ff88', edgecolors='black', alpha=0.7, animated=True)
+        self.hist_bars.sticky_edges.y.append(0)
+        axes[1, 1].add_collection(self.hist_bars, autolim=False)
+        self.mean_line = axes[1, 1].axvline(x=0, color='red', linewidth=2, linestyle='--',
+                                            label='Mean: 0.00%', animated=True)
+        self.returns_legend = axes[1, 1].legend(loc='upper right', framealpha=0.3)
+        self.returns_legend.set_animated(True)
+        axes[1, 1].set_title('Daily Returns Distribution', color='white', fontweight='bold')
+        axes[1, 1].set_xlabel('Returns (%)', color='white')
+        axes[1, 1].set_ylabel('Frequency', color='white')
+
+        self.live = [live for _, live in self.lines.values()] + \
+                    [self.hist_bars, self.mean_line, self.returns_legend]
+
+        for ax in axes.flat:
+            style_axes(ax)
+
+    def _add_line(self, ax, col, **kwargs):
+        static, = ax.plot([], [], **kwargs)
+        live, = ax.plot([], [], animated=True, **dict(kwargs, label='_nolegend_'))
+        self.lines[col] = (static, live)
+
+    def _panels(self):
+        """(axes, columns, fill) of the time series panels; fills run from 0 to the column"""
+        axes = self.axes
+        return [
+            (axes[0, 0], ['Stoch_K', 'Stoch_D'], None),
+            (axes[0, 1], ['ATR'], 'atr'),
+            (axes[1, 0], ['OBV'], 'obv'),
+        ]
+
+    def _update(self, data):
+        """Push new data into every artist and rescale the panels"""
+        axes = self.axes
+
+        self._updating = True
+        try:
+            self._set_series(data, full_range=True)
+            self._set_live(data)
+            counts, edges, mean = self._distribution(data)
+            self._set_distribution(counts, edges, mean)
+
+            # Collections are not covered by relim(), so their extents are added by hand
+            for ax in axes.flat:
+                ax.relim()
+            for key, ax in (('stoch', axes[0, 0]), ('atr', axes[0, 1]), ('obv', axes[1, 0])):
+                polygons = self.fills[key].get_paths()
+                if polygons:
+                    ax.update_datalim(np.concatenate([path.vertices for path in polygons]))
+            if counts.any():
+                axes[1, 1].update_datalim([(edges[0], 0), (edges[-1], counts.max())])
+
+            for ax in axes.flat:
+                ax.autoscale_view()
+
+            # Panels zoomed in through the toolbar only need their visible bars
+            self._set_series(data, zoomed_only=True)
+        finally:
+            self._updating = False
+
+    def _set_series(self, data, full_range=False, zoomed_only=False):
+        """Point the static lines at all bars but the last, decimated to each axes width"""
+        for ax, cols, fill in self._panels():
+            if zoomed_only and ax.get_autoscalex_on():
+                continue
+
+            x = data['x']
+            if full_range:
+                lo, hi = 0, len(x)
+            else:
+                lo, hi = decimation.visible_range(x, *ax.get_xlim())
+            pixels = max(int(ax.bbox.width), 100)
+
+            static_hi = min(hi, len(x) - 1)
+            for col in cols:
+                static, _ = self.lines[col]
+                static.set_data(*decimation.minmax_decimate(x[lo:static_hi], data[col][lo:static_hi], pixels))
+
+            # Fills run up to the last bar so they do not stop one bar short
+            if fill is not None:
+                fx, fy = decimation.minmax_decimate(x[lo:hi], data[cols[0]][lo:hi], pixels)
+                self.fills[fill].set_verts(band_polygons(fx, 0, fy))
+
+        if full_range and len(data['x']):
+            self.fills['stoch'].set_verts(band_polygons(data['x'][[0, -1]], 20, 80))
+
+    def _set_live(self, data):
+        """Point the animated segments from the bar before last to the last bar"""
+        tail = slice(-2, None)
+        for col, (_, live) in self.lines.items():
+            live.set_data(data['x'][tail], data[col][tail])
+
+    def _distribution(self, data):
+        """(counts, edges, mean) of the returns histogram in percent"""
+        returns = data['Returns'][np.isfinite(data['Returns'])] * 100
+        counts, edges = np.histogram(returns, bins=RETURN_BINS)
+        return counts, edges, returns.mean() if len(returns) else 0.0
+
+    def _set_distribution(self, counts, edges, mean):
+        width = edges[1] - edges[0]
+        self.hist_bars.set_verts(bar_geometry((edges[:-1] + edges[1:]) / 2, np.zeros(len(counts)), counts, width))
+        self.mean_line.set_xdata([mean, mean])
+        self.mean_line.set_label(f'Mean: {mean:.2f}%')
+        self.returns_legend.get_texts()[0].set_text(f'Mean: {mean:.2f}%')
+
+    def _only_last_bar_changed(self, data):
+        if self.data is None or len(data['x']) != len(self.data['x']) or len(data['x']) < 2:
+            return False
+
+        return all(np.array_equal(values[:-1], self.data[key][:-1], equal_nan=True)
+                   for key, values in data.items())
+
+    def _last_bar_in_view(self, data, distribution):
+        for ax, cols, _ in self._panels():
+            xmin, xmax = ax.get_xlim()
+            if not xmin <= data['x'][-1] <= xmax:
+                return False
+            ymin, ymax = ax.get_ylim()
+            for col in cols:
+                value = data[col][-1]
+                if np.isfinite(value) and not ymin <= value <= ymax:
+                    return False
+
+        # The histogram must still fit its panel
+        counts, edges, _ = distribution
+        xmin, xmax = self.axes[1, 1].get_xlim()
+        return xmin <= edges[0] and edges[-1] <= xmax and counts.max(initial=0) <= self.axes[1, 1].get_ylim()[1]
+
+    def _on_view_changed(self, *args):
+        if not self._updating:
+            self._view_timer.start()
+
+    def _refresh_view(self):
+        """Re-decimate the panels for the visible range after a zoom, pan or resize"""
+        if self.data is None or self.axes is None:
+            return
+
+        self._updating = True
+        try:
+            self._set_series(self.data)
+        finally:
+            self._updating = False
+        self.canvas.draw_idle()
+
+    def _on_draw(self, event):
+        # Save the static figure, then put the animated artists on top of it
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.live:
+            artist.axes.draw_artist(artist)
+
+    def _blit(self):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._background)
+        for artist in self.live:
+            artist.axes.draw_artist(artist)
+        for ax in self.axes.flat:
+            self.canvas.blit(ax.bbox)
+
+
+def draw_correlation(fig, corr, symbols, title="Correlation"):
+    """Correlation heatmap on a cleared figure; labels are shown up to 40 symbols"""
+    fig.clear()
+    ax = fig.add_subplot(111)
+    style_axes(ax)
+    ax.grid(False)
+
+    image = ax.imshow(np.ma.masked_invalid(corr), cmap='RdYlGn', vmin=-1, vmax=1, interpolation='nearest')
+    colorbar = fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+    colorbar.ax.tick_params(colors='white')
+
+    if len(symbols) <= 40:
+        ticks = np.arange(len(symbols))
+        ax.set_xticks(ticks, symbols, rotation=90, fontsize=8)
+        ax.set_yticks(ticks, symbols, fontsize=8)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+
+    ax.set_title(title, color='white', fontweight='bold')
+    fig.tight_layout()
+
+
+def draw_timeframes(fig, frames, symbol, bars=120):
+    """Candles of one symbol at several intervals side by side, on a cleared figure
+
+    frames is a list of (interval, OHLCV frame); each panel shows the last
+    `bars` bars with their 20-bar SMA.
+    """
+    fig.clear()
+    if not frames:
+        return
+
+    axes = fig.subplots(1, len(frames), squeeze=False)[0]
+    for ax, (interval, df) in zip(axes, frames):
+        sma = df['Close'].rolling(window=20).mean().to_numpy(dtype=float)[-bars:]
+        df = df.iloc[-bars:]
+        x = date_numbers(df['Date'])
+        width = bar_spacing(x) * 0.6
+        data = frame_arrays(df, ['Open', 'High', 'Low', 'Close'])
+
+        for collection in candlestick_collections(x, data['Open'], data['High'], data['Low'], data['Close'], width):
+            ax.add_collection(collection)
+        ax.plot(x, sma, color='orange', linewidth=1, alpha=0.7, label='SMA 20')
+        ax.xaxis_date()
+        ax.autoscale_view()
+
+        style_axes(ax)
+        ax.set_title(f'{symbol} - {interval}', color='white', fontweight='bold')
+        ax.legend(loc='upper left', framealpha=0.3, fontsize=8)
+        ax.tick_params(axis='x', labelrotation=30, labelsize=8)
+
+    fig.tight_layout()
@@ -0,0 +1,101 @@
+"""
+Compact bar storage
+Columnar OHLCV in typed arrays with indicators computed lazily on first access
+"""
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from indicators import INDICATOR_COLUMNS
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# float32 keeps cent precision for prices below this (spacing < 0.004)
+FLOAT32_PRICE_LIMIT = 65536.0
+
+# Indicators that are cumulative sums keep float64 to avoid drift
+FLOAT64_INDICATORS = {'OBV'}
+
+# Columns that are the same series under another name
+ALIASES = {'BB_Middle': 'SMA_20'}
+
+
+def compact_prices(values):
+    """float32 when every price is small enough to keep its cents, else float64"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) and np.nanmax(np.abs(values)) >= FLOAT32_PRICE_LIMIT:
+        return np.ascontiguousarray(values)
+    return values.astype(np.float32)
+
+
+def compact_volume(values):
+    """uint32 for whole share counts that fit, else float64"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) and (np.nanmin(values) < 0 or np.nanmax(values) >= 2 ** 32
+                        or not np.array_equal(values, np.round(values))):
+        return np.ascontiguousarray(values)
+    return values.astype(np.uint32)
+
+
+class CompactBars:
+    """Memory-light alternative to the indicator DataFrame
+
+    Dates are int64 datetime64 values, prices float32 where they fit and
+    volume uint32. Indicator columns are only computed (in float64, then
+    stored as float32) the first time one of them is read, and BB_Middle shares
+    the SMA_20 array instead of storing a copy. Columns are NumPy arrays:
+    bars['Close'][-1], len(bars), bars.to_frame() for code that needs pandas.
+    """
+
+    def __init__(self, dates, open_, high, low, close, volume):
+        self.columns = {
+            'Date': np.asarray(dates).astype('datetime64[us]'),
+            'Open': compact_prices(open_),
+            'High': compact_prices(high),
+            'Low': compact_prices(low),
+            'Close': compact_prices(close),
+            'Volume': compact_volume(volume),
+        }
+
+    @classmethod
+    def from_frame(cls, df):
+        """Compact copy of an OHLCV (or indicator) DataFrame; indicator columns are recomputed lazily"""
+        return cls(df['Date'].to_numpy(), *(df[col].to_numpy() for col in OHLCV_COLUMNS))
+
+    def __len__(self):
+        return len(self.columns['Date'])
+
+    def __contains__(self, name):
+        return name in self.columns or name in ALIASES or name in INDICATOR_COLUMNS
+
+    def __getitem__(self, name):
+        name = ALIASES.get(name, name)
+        if name not in self.columns:
+            if name not in INDICATOR_COLUMNS:
+                raise KeyError(name)
+            self._compute(name)
+        return self.columns[name]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays (aliases counted once)"""
+        return sum(values.nbytes for values in self.columns.values())
+
+    def to_frame(self, columns=None):
+        """DataFrame of the requested columns (all OHLCV and indicators by default)"""
+        columns = columns or ['Date'] + OHLCV_COLUMNS + INDICATOR_COLUMNS
+        return pd.DataFrame({name: self[name] for name in columns})
+
+    # Lazy indicators, computed by indicators.calculate_indicators on float64 columns
+    def _store(self, name, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.columns[name] = values if name in FLOAT64_INDICATORS else values.astype(np.float32)
+
+    def _compute(self, name):
+        """Compute every indicator on the first read of any of them"""
+        df = pd.DataFrame({col: np.asarray(self.columns[col], dtype=np.float64) for col in OHLCV_COLUMNS})
+        df = indicators.calculate_indicators(df)
+        for col in INDICATOR_COLUMNS:
+            if col not in ALIASES:
+                self._store(col, df[col].to_numpy())
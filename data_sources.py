@@ -0,0 +1,225 @@
+"""
+Chart data sources
+Offline stand-ins for the Yahoo chart endpoint: recorded payloads or synthetic bars
+
+    market_data.set_source(source_from_spec("synthetic:1000000@0.2"))
+    market_data.set_source(source_from_spec("replay:recordings"))
+"""
+
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+import market_data
+from market_data import QUOTE_FIELDS, extract_chart
+from profiling import profiler
+from transport import json_loads
+
+# Bar spacing used to lay out synthetic bars for each interval option
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400,
+    "1h": 3600, "1d": 86400, "5d": 432000, "1wk": 604800, "1mo": 2592000, "3mo": 7776000
+}
+
+
+def chart_payload(symbol, timestamps, block, meta=None):
+    """Yahoo chart payload dict from int timestamps and a (5, n) QUOTE_FIELDS block (NaN -> null)"""
+    quote = {}
+    for i, field in enumerate(QUOTE_FIELDS):
+        values = block[i]
+        missing = np.isnan(values)
+        values = values.tolist()
+        for j in np.flatnonzero(missing).tolist():
+            values[j] = None
+        quote[field] = values
+
+    closes = block[3][~np.isnan(block[3])]
+    meta = dict(meta or {}, symbol=symbol)
+    if len(closes):
+        meta.setdefault('regularMarketPrice', float(closes[-1]))
+        meta.setdefault('chartPreviousClose', float(closes[0]))
+
+    return {'chart': {'result': [{
+        'meta': meta,
+        'timestamp': np.asarray(timestamps, dtype=np.int64).tolist(),
+        'indicators': {'quote': [quote]}
+    }], 'error': None}}
+
+
+def quote_block(quotes):
+    """(5, n) float64 block of a payload's quote lists in QUOTE_FIELDS order, nulls as NaN"""
+    return np.array([np.array(quotes[field], dtype=np.float64) for field in QUOTE_FIELDS]).reshape(len(QUOTE_FIELDS), -1)
+
+
+class ChartSource:
+    """Where market_data.download_chart gets chart payloads from
+
+    download_chart returns the decoded chart JSON for bars in
+    [period1, period2], like the Yahoo endpoint does.
+    """
+
+    def download_chart(self, symbol, interval, period1, period2, timeout=10):
+        raise NotImplementedError
+
+
+class ReplayChartSource(ChartSource):
+    """Serves recorded payloads from a directory, or synthetic bars, with simulated latency
+
+    With `path`, <path>/<SYMBOL>_<interval>.json files (as written by
+    RecordingChartSource) are sliced to the requested range. Otherwise every
+    symbol gets a reproducible random walk of `bars` bars ending when the
+    source was created, so repeated and delta requests see the same history.
+    latency (seconds, +/- jitter fraction) is slept before each response, and
+    with encode=True the payload goes through JSON bytes like a real download.
+    """
+
+    def __init__(self, path=None, bars=1000, latency=0.0, jitter=0.0, missing=0.0, encode=True, seed=0):
+        self.path = path
+        self.bars = int(bars)
+        self.latency = latency
+        self.jitter = jitter
+        self.missing = missing
+        self.encode = encode
+        self.seed = seed
+        self.end = int(time.time())
+        self.requests = 0
+        self._series = {}
+
+    def download_chart(self, symbol, interval, period1, period2, timeout=10):
+        self.requests += 1
+        if self.latency:
+            rng = np.random.default_rng()
+            time.sleep(max(0.0, self.latency * (1 + self.jitter * rng.uniform(-1, 1))))
+
+        timestamps, block, meta = self.series(symbol, interval)
+        start, stop = np.searchsorted(timestamps, [period1, period2 + 1])
+
+        # Like Yahoo, the previous close is the last close before the range
+        meta = dict(meta)
+        meta.pop('chartPreviousClose', None)
+        before = block[3, :start][~np.isnan(block[3, :start])]
+        if len(before):
+            meta['chartPreviousClose'] = float(before[-1])
+
+        payload = chart_payload(symbol, timestamps[start:stop], block[:, start:stop], meta)
+
+        if self.encode:
+            content = json.dumps(payload).encode()
+            profiler.count_bytes(len(content))
+            return json_loads(content)
+        return payload
+
+    def series(self, symbol, interval):
+        """(timestamps, block, meta) of the whole series served for a symbol and interval"""
+        key = (symbol, interval)
+        if key not in self._series:
+            if self.path:
+                self._series[key] = self._load(symbol, interval)
+            else:
+                self._series[key] = self._generate(symbol, interval)
+        return self._series[key]
+
+    def _load(self, symbol, interval):
+        with open(os.path.join(self.path, f"{symbol}_{interval}.json"), 'rb') as f:
+            timestamps, quotes, meta = extract_chart(json_loads(f.read()))
+
+        block = quote_block(quotes)
+        return np.asarray(timestamps, dtype=np.int64), block, meta
+
+    def _generate(self, symbol, interval):
+        step = INTERVAL_SECONDS.get(interval, 86400)
+        n = self.bars
+        end = self.end - self.end % step
+        timestamps = end - step * np.arange(n - 1, -1, -1, dtype=np.int64)
+
+        # Same symbol, same bars: seed from the symbol name
+        rng = np.random.default_rng([self.seed, zlib.crc32(f"{symbol}_{interval}".encode())])
+        start_price = rng.uniform(20, 500)
+        close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        open_ = close * (1 + rng.normal(0, 0.003, n))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n)))
+        volume = rng.integers(100_000, 5_000_000, n).astype(np.float64)
+
+        block = np.round(np.array([open_, high, low, close, volume]), 4)
+        if self.missing:
+            block[:, rng.random(n) < self.missing] = np.nan
+
+        meta = {'currency': 'USD', 'exchangeName': 'SIM', 'dataGranularity': interval}
+        return timestamps, block, meta
+
+
+class YahooChartSource(ChartSource):
+    """The live Yahoo Finance chart endpoint"""
+
+    def __init__(self, transport=None):
+        self.transport = transport
+
+    def download_chart(self, symbol, interval, period1, period2, timeout=10):
+        return market_data.download_yahoo_chart(symbol, interval, period1, period2, timeout, self.transport)
+
+
+class RecordingChartSource(ChartSource):
+    """Passes downloads through to another source (Yahoo by default) and records the bars
+
+    Each symbol and interval is kept in one <path>/<SYMBOL>_<interval>.json
+    payload, the file ReplayChartSource(path=...) serves. New downloads are
+    merged into it, so delta downloads extend the recording.
+    """
+
+    def __init__(self, path, source=None):
+        self.path = path
+        self.source = source or YahooChartSource()
+        os.makedirs(path, exist_ok=True)
+
+    def download_chart(self, symbol, interval, period1, period2, timeout=10):
+        payload = self.source.download_chart(symbol, interval, period1, period2, timeout)
+        timestamps, quotes, meta = extract_chart(payload)
+        block = quote_block(quotes)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+
+        path = os.path.join(self.path, f"{symbol}_{interval}.json")
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                old_timestamps, old_quotes, _ = extract_chart(json_loads(f.read()))
+            old_block = quote_block(old_quotes)
+
+            # New bars replace recorded ones with the same timestamp
+            keep = ~np.isin(old_timestamps, timestamps)
+            timestamps = np.concatenate([np.asarray(old_timestamps, dtype=np.int64)[keep], timestamps])
+            block = np.concatenate([old_block[:, keep], block], axis=1)
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, block = timestamps[order], block[:, order]
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(chart_payload(symbol, timestamps, block, meta), f)
+        return payload
+
+
+def is_simulated(source):
+    """True for sources whose bars must stay out of the real bar cache"""
+    return isinstance(source, ReplayChartSource)
+
+
+def source_from_spec(spec):
+    """Source for 'yahoo', 'synthetic[:bars][@latency]', 'replay:<dir>[@latency]' or 'record:<dir>'
+
+    Returns None for 'yahoo' (the live endpoint).
+    """
+    if not spec or spec == 'yahoo':
+        return None
+
+    body, latency = spec.rsplit('@', 1) if '@' in spec else (spec, '')
+    kind, _, arg = body.partition(':')
+    latency = float(latency) if latency else 0.0
+
+    if kind == 'synthetic':
+        return ReplayChartSource(bars=int(float(arg)) if arg else 1000, latency=latency)
+    if kind == 'replay':
+        return ReplayChartSource(path=arg, latency=latency)
+    if kind == 'record':
+        return RecordingChartSource(arg)
+    raise ValueError(f"Unknown data source: {spec}")
@@ -0,0 +1,173 @@
+"""
+Virtualized data table
+Pages through the full bar history with a fixed pool of Treeview rows
+"""
+
+import numpy as np
+
+# Treeview column -> format applied to the visible slice of that column
+COLUMN_FORMATS = [
+    ('Open', "${:.2f}"),
+    ('High', "${:.2f}"),
+    ('Low', "${:.2f}"),
+    ('Close', "${:.2f}"),
+    ('Volume', "{:,.0f}"),
+    ('Change %', "{:+.2f}%"),
+]
+
+TABLE_COLUMNS = ['Date'] + [col for col, _ in COLUMN_FORMATS]
+
+
+def table_arrays(df):
+    """Numeric arrays behind the table, oldest bar first"""
+    close = df['Close'].to_numpy(dtype=np.float64)
+    change = np.full(len(close), np.nan)
+    change[1:] = (close[1:] / close[:-1] - 1) * 100
+
+    return {
+        'Date': df['Date'].to_numpy(),
+        'Open': df['Open'].to_numpy(dtype=np.float64),
+        'High': df['High'].to_numpy(dtype=np.float64),
+        'Low': df['Low'].to_numpy(dtype=np.float64),
+        'Close': close,
+        'Volume': df['Volume'].to_numpy(dtype=np.float64),
+        'Change %': change,
+    }
+
+
+def format_rows(arrays, index):
+    """Formatted (values, tag) pairs for the given row positions, one column at a time"""
+    dates = np.datetime_as_string(arrays['Date'][index].astype('datetime64[m]'))
+    columns = [[date.replace('T', ' ') for date in dates.tolist()]]
+    for col, fmt in COLUMN_FORMATS:
+        columns.append(list(map(fmt.format, arrays[col][index].tolist())))
+
+    # NaN change (first bar) is not >= 0, same as the old per-row check
+    tags = np.where(arrays['Change %'][index] >= 0, 'positive', 'negative').tolist()
+    return list(zip(zip(*columns), tags))
+
+
+class VirtualTable:
+    """Shows any number of bars, newest first, through a Treeview sized to the window
+
+    Only the rows that fit on screen exist as Treeview items. Scrolling
+    rewrites their values, and a refresh only touches rows whose text changed;
+    bars appended while the view is at the top rotate the existing items down
+    instead of rewriting every row.
+    """
+
+    def __init__(self, tree, scrollbar, page_size=30):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.arrays = None
+        self.key = None
+        self.total = 0
+        self.offset = 0
+        self.items = []
+        self.shown = []
+
+        scrollbar.config(command=self.yview)
+        tree.config(yscrollcommand='')
+        tree.bind('<Configure>', self._on_resize)
+        tree.bind('<MouseWheel>', self._on_mousewheel)
+        tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        tree.bind('<Button-5>', lambda e: self.scroll(3))
+        tree.bind('<Prior>', lambda e: self.scroll(-self.page_size))
+        tree.bind('<Next>', lambda e: self.scroll(self.page_size))
+        tree.bind('<Home>', lambda e: self.scroll_to(0))
+        tree.bind('<End>', lambda e: self.scroll_to(self.total))
+
+    def set_frame(self, df, key=None):
+        """Show a new or refreshed frame; key identifies the series (symbol, period, interval)"""
+        arrays = table_arrays(df)
+        appended = 0
+
+        if key != self.key or self.arrays is None or not len(self.arrays['Date']):
+            self.offset = 0
+        else:
+            # Bars newer than the last one shown before
+            last_date = self.arrays['Date'][-1]
+            appended = len(arrays['Date']) - int(np.searchsorted(arrays['Date'], last_date, side='right'))
+            if self.offset > 0:
+                # Scrolled into history: keep the same bars on screen
+                self.offset += appended
+                appended = 0
+
+        self.arrays = arrays
+        self.key = key
+        self.total = len(arrays['Date'])
+        self.render(appended)
+
+    def render(self, appended=0):
+        """Materialize the visible rows, updating only items whose text changed"""
+        self.offset = max(0, min(self.offset, self.total - self.page_size))
+        count = max(0, min(self.page_size, self.total - self.offset))
+
+        # Grow or shrink the item pool to the number of visible rows
+        while len(self.items) < count:
+            self.items.append(self.tree.insert('', 'end'))
+            self.shown.append(None)
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+            self.shown.pop()
+
+        # New bars at the top: move bottom items up so existing rows keep their text
+        if 0 < appended < count:
+            for _ in range(appended):
+                item = self.items.pop()
+                self.shown.pop()
+                self.tree.move(item, '', 0)
+                self.items.insert(0, item)
+                self.shown.insert(0, None)
+
+        if count:
+            start = self.total - 1 - self.offset
+            rows = format_rows(self.arrays, np.arange(start, start - count, -1))
+            for i, row in enumerate(rows):
+                if self.shown[i] != row:
+                    values, tag = row
+                    self.tree.item(self.items[i], values=values, tags=(tag,))
+                    self.shown[i] = row
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, (self.offset + count) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+        return 'break'
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self.total - self.page_size))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+        return 'break'
+
+    def yview(self, *args):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            self.scroll_to(round(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            step = self.page_size if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        notches = event.delta // 120 if abs(event.delta) >= 120 else np.sign(event.delta)
+        return self.scroll(-3 * int(notches))
+
+    def _on_resize(self, event):
+        row_height = 20
+        header = 25
+        if self.items:
+            bbox = self.tree.bbox(self.items[0])
+            if bbox:
+                header, row_height = bbox[1], bbox[3]
+
+        page_size = max(1, (event.height - header) // row_height)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
@@ -0,0 +1,91 @@
+"""
+Level-of-detail decimation
+Reduces long series to roughly one point per screen pixel before plotting
+"""
+
+import numpy as np
+
+
+def bucket_starts(n, buckets):
+    """Start index of each group when n points are split into at most `buckets` groups"""
+    return np.unique(np.linspace(0, n, buckets + 1).astype(np.int64)[:-1])
+
+
+def visible_range(x, xmin, xmax, pad=1):
+    """Return (lo, hi) indices of the sorted x values inside [xmin, xmax], padded by `pad` points"""
+    lo = max(int(np.searchsorted(x, xmin, side='left')) - pad, 0)
+    hi = min(int(np.searchsorted(x, xmax, side='right')) + pad, len(x))
+    return lo, hi
+
+
+def aggregate_ohlc(x, open_, high, low, close, volume, buckets):
+    """Merge bars into at most `buckets` candles
+
+    Open is taken from the first bar, High is the max, Low the min, Close
+    comes from the last bar and Volume is summed. Returns the arrays
+    unchanged when there are already few enough bars.
+    """
+    n = len(x)
+    if n <= buckets:
+        return x, open_, high, low, close, volume
+
+    starts = bucket_starts(n, buckets)
+    ends = np.append(starts[1:], n) - 1
+
+    return (
+        (x[starts] + x[ends]) / 2,
+        open_[starts],
+        np.fmax.reduceat(high, starts),
+        np.fmin.reduceat(low, starts),
+        close[ends],
+        np.add.reduceat(volume, starts),
+    )
+
+
+def extreme_per_bucket(values, n_buckets):
+    """Value with the largest magnitude in each group (keeps histogram peaks)"""
+    if len(values) <= n_buckets:
+        return values
+
+    starts = bucket_starts(len(values), n_buckets)
+    highs = np.fmax.reduceat(values, starts)
+    lows = np.fmin.reduceat(values, starts)
+    return np.where(np.abs(lows) > np.abs(highs), lows, highs)
+
+
+def band_per_bucket(upper, lower, n_buckets):
+    """Outer envelope of a band (max of upper, min of lower) in each group"""
+    if len(upper) <= n_buckets:
+        return upper, lower
+
+    starts = bucket_starts(len(upper), n_buckets)
+    return np.fmax.reduceat(upper, starts), np.fmin.reduceat(lower, starts)
+
+
+def minmax_decimate(x, y, buckets):
+    """Reduce a line to the min and max point of each group, kept in their original order
+
+    Unlike averaging this preserves every spike that would be visible at the
+    target resolution. NaN gaps stay NaN.
+    """
+    n = len(x)
+    if n <= 2 * buckets:
+        return x, y
+
+    starts = bucket_starts(n, buckets)
+    bucket_id = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    index = np.arange(n)
+
+    nan = np.isnan(y)
+    for_min = np.where(nan, np.inf, y)
+    for_max = np.where(nan, -np.inf, y)
+    mins = np.minimum.reduceat(for_min, starts)
+    maxs = np.maximum.reduceat(for_max, starts)
+
+    # First position of the min and of the max inside each group
+    min_index = np.minimum.reduceat(np.where(for_min == mins[bucket_id], index, n), starts)
+    max_index = np.minimum.reduceat(np.where(for_max == maxs[bucket_id], index, n), starts)
+
+    order = np.column_stack([np.minimum(min_index, max_index),
+                             np.maximum(min_index, max_index)]).ravel()
+    return x[order], y[order]
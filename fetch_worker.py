@@ -0,0 +1,101 @@
+"""
+Background fetch worker
+Runs network downloads off the Tk main thread and hands results back through a queue
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FetchJob:
+    """A single unit of work submitted to the fetch worker"""
+
+    def __init__(self, generation, key, func, args, callback=None):
+        self.generation = generation
+        self.key = key
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.result = None
+        self.error = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class FetchWorker:
+    """Thread pool that runs fetch jobs and posts finished jobs to a result queue
+
+    Every submit() supersedes the jobs submitted before it: jobs that have not
+    started yet are skipped and results of jobs already in flight are dropped,
+    so the UI only ever sees the latest request.
+    """
+
+    def __init__(self, max_workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+        self.results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._active = None
+
+    def submit(self, key, func, *args, callback=None):
+        """Queue func(*args) and cancel any earlier job"""
+        with self._lock:
+            if self._active is not None:
+                self._active.cancel()
+            self._generation += 1
+            job = FetchJob(self._generation, key, func, args, callback)
+            self._active = job
+
+        self.executor.submit(self._run, job)
+        return job
+
+    def cancel(self):
+        """Cancel the active job, if any"""
+        with self._lock:
+            if self._active is not None:
+                self._active.cancel()
+                self._active = None
+
+    def is_busy(self):
+        with self._lock:
+            return self._active is not None and not self._active.cancelled
+
+    def _run(self, job):
+        if job.cancelled:
+            return
+
+        try:
+            job.result = job.func(*job.args)
+        except Exception as e:
+            job.error = e
+
+        if not job.cancelled:
+            self.results.put(job)
+
+    def drain(self):
+        """Return finished jobs that have not been superseded (call from the UI thread)"""
+        finished = []
+        while True:
+            try:
+                job = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                if job is not self._active or job.cancelled:
+                    continue
+                self._active = None
+            finished.append(job)
+
+        return finished
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
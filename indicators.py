@@ -0,0 +1,333 @@
+"""
+Technical indicators
+Batch calculation over a full DataFrame and an incremental engine for refreshes
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from profiling import timed
+
+INDICATOR_COLUMNS = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'EMA_12', 'EMA_26',
+    'MACD', 'MACD_Signal', 'MACD_Hist', 'RSI',
+    'BB_Middle', 'BB_Upper', 'BB_Lower', 'ATR',
+    'Stoch_K', 'Stoch_D', 'OBV', 'Returns'
+]
+
+# Longest rolling window used by the indicators (SMA 200)
+WARMUP_BARS = 200
+
+
+@timed('indicators')
+def calculate_indicators(df):
+    """Calculate technical indicators"""
+    # Simple Moving Averages
+    df['SMA_20'] = df['Close'].rolling(window=20).mean()
+    df['SMA_50'] = df['Close'].rolling(window=50).mean()
+    df['SMA_200'] = df['Close'].rolling(window=200).mean()
+
+    # Exponential Moving Averages
+    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
+    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
+
+    # MACD
+    df['MACD'] = df['EMA_12'] - df['EMA_26']
+    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_Hist'] = df['MACD'] - df['MACD_Signal']
+
+    # RSI
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    # Bollinger Bands
+    df['BB_Middle'] = df['Close'].rolling(window=20).mean()
+    bb_std = df['Close'].rolling(window=20).std()
+    df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
+    df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
+
+    # ATR
+    high_low = df['High'] - df['Low']
+    high_close = np.abs(df['High'] - df['Close'].shift())
+    low_close = np.abs(df['Low'] - df['Close'].shift())
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    true_range = np.max(ranges, axis=1)
+    df['ATR'] = true_range.rolling(14).mean()
+
+    # Stochastic Oscillator
+    low_14 = df['Low'].rolling(window=14).min()
+    high_14 = df['High'].rolling(window=14).max()
+    df['Stoch_K'] = 100 * ((df['Close'] - low_14) / (high_14 - low_14))
+    df['Stoch_D'] = df['Stoch_K'].rolling(window=3).mean()
+
+    # OBV
+    df['OBV'] = (np.sign(df['Close'].diff()) * df['Volume']).fillna(0).cumsum()
+
+    # Daily Returns
+    df['Returns'] = df['Close'].pct_change()
+
+    return df
+
+
+class _Window:
+    """The latest `size` values of a series with their running sum"""
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        # NaN/inf values are kept out of the running sum, which they would
+        # poison for good; windows holding one are summed directly instead
+        self.non_finite = 0
+
+    def copy(self):
+        window = _Window(self.values.maxlen)
+        window.values.extend(self.values)
+        window.total = self.total
+        window.non_finite = self.non_finite
+        return window
+
+    def push(self, value, replace=False):
+        """Append a value, or overwrite the latest one when replace is set"""
+        values = self.values
+        if replace:
+            self._drop(values.pop())
+        elif len(values) == values.maxlen:
+            self._drop(values[0])
+        values.append(value)
+        if math.isfinite(value):
+            self.total += value
+        else:
+            self.non_finite += 1
+
+    def _drop(self, value):
+        if math.isfinite(value):
+            self.total -= value
+        else:
+            self.non_finite -= 1
+
+    def mean(self):
+        if len(self.values) < self.values.maxlen:
+            return np.nan
+        if self.non_finite:
+            return sum(self.values) / len(self.values)
+        return self.total / len(self.values)
+
+
+def _ema(previous, value, span):
+    if previous is None:
+        return value
+    alpha = 2 / (span + 1)
+    return (1 - alpha) * previous + alpha * value
+
+
+class IndicatorEngine:
+    """Stateful version of calculate_indicators for bars arriving one at a time
+
+    append(bar) adds a new bar and update_last(bar) revises the latest one.
+    Both only touch the carried state (EMA values, cumulative OBV and the
+    rolling windows with their running sums), so their cost does not depend
+    on the history length or, for the moving averages, on the window length.
+    Bars are mappings with Open/High/Low/Close/Volume keys, e.g. DataFrame rows.
+    """
+
+    def __init__(self):
+        self._state = {
+            'close': None,
+            'ema_12': None,
+            'ema_26': None,
+            'macd_signal': None,
+            'obv': 0.0,
+            'closes_20': _Window(20),
+            'closes_50': _Window(50),
+            'closes_200': _Window(WARMUP_BARS),
+            'gains': _Window(14),
+            'losses': _Window(14),
+            'true_ranges': _Window(14),
+            'lows': _Window(14),
+            'highs': _Window(14),
+            'stoch_k': _Window(3),
+        }
+        # Scalar state from before the latest bar; update_last restores it and
+        # overwrites the latest value in each window
+        self._prev_state = None
+        self.last = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Seed an engine from a frame already processed by calculate_indicators"""
+        engine = cls()
+        start = max(0, len(df) - WARMUP_BARS - 1)
+
+        # Carry the recursive values from the bar before the replayed window;
+        # the rolling windows fill up again while replaying
+        if start > 0:
+            seed = df.iloc[start - 1]
+            engine._state.update({
+                'close': float(seed['Close']),
+                'ema_12': float(seed['EMA_12']),
+                'ema_26': float(seed['EMA_26']),
+                'macd_signal': float(seed['MACD_Signal']),
+                'obv': float(seed['OBV']),
+            })
+
+        for _, bar in df.iloc[start:].iterrows():
+            engine.append(bar)
+
+        return engine
+
+    def copy(self):
+        engine = IndicatorEngine()
+        engine._state = self._copy_state(self._state)
+        engine._prev_state = dict(self._prev_state) if self._prev_state else None
+        engine.last = dict(self.last) if self.last else None
+        return engine
+
+    def append(self, bar):
+        """Add a new bar and return its indicator values"""
+        self._prev_state = {key: value for key, value in self._state.items()
+                            if not isinstance(value, _Window)}
+        self.last = self._apply(self._state, bar)
+        return self.last
+
+    def update_last(self, bar):
+        """Replace the latest bar and return its recomputed indicator values"""
+        if self._prev_state is None:
+            raise ValueError("No bar to update")
+
+        self._state.update(self._prev_state)
+        self.last = self._apply(self._state, bar, replace=True)
+        return self.last
+
+    @staticmethod
+    def _copy_state(state):
+        return {key: value.copy() if isinstance(value, _Window) else value
+                for key, value in state.items()}
+
+    @staticmethod
+    def _apply(state, bar, replace=False):
+        """Fold a bar into state, overwriting the latest one when replace is set"""
+        close = float(bar['Close'])
+        high = float(bar['High'])
+        low = float(bar['Low'])
+        volume = float(bar['Volume'])
+        prev_close = state['close']
+
+        for key in ('closes_20', 'closes_50', 'closes_200'):
+            state[key].push(close, replace)
+
+        # Moving averages
+        values = {
+            'SMA_20': state['closes_20'].mean(),
+            'SMA_50': state['closes_50'].mean(),
+            'SMA_200': state['closes_200'].mean(),
+        }
+
+        state['ema_12'] = _ema(state['ema_12'], close, 12)
+        state['ema_26'] = _ema(state['ema_26'], close, 26)
+        values['EMA_12'] = state['ema_12']
+        values['EMA_26'] = state['ema_26']
+
+        # MACD
+        macd = state['ema_12'] - state['ema_26']
+        state['macd_signal'] = _ema(state['macd_signal'], macd, 9)
+        values['MACD'] = macd
+        values['MACD_Signal'] = state['macd_signal']
+        values['MACD_Hist'] = macd - state['macd_signal']
+
+        # RSI
+        delta = close - prev_close if prev_close is not None else np.nan
+        state['gains'].push(delta if delta > 0 else 0.0, replace)
+        state['losses'].push(-delta if delta < 0 else 0.0, replace)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(state['gains'].mean()) / np.float64(state['losses'].mean())
+            values['RSI'] = float(100 - (100 / (1 + rs)))
+
+        # Bollinger Bands
+        values['BB_Middle'] = values['SMA_20']
+        closes_20 = state['closes_20'].values
+        if len(closes_20) == 20:
+            mean = values['SMA_20']
+            bb_std = math.sqrt(sum((value - mean) ** 2 for value in closes_20) / 19)
+        else:
+            bb_std = np.nan
+        values['BB_Upper'] = values['BB_Middle'] + (bb_std * 2)
+        values['BB_Lower'] = values['BB_Middle'] - (bb_std * 2)
+
+        # ATR
+        true_range = high - low
+        if prev_close is not None:
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+        state['true_ranges'].push(true_range, replace)
+        values['ATR'] = state['true_ranges'].mean()
+
+        # Stochastic Oscillator
+        state['lows'].push(low, replace)
+        state['highs'].push(high, replace)
+        if len(state['lows'].values) >= 14:
+            low_14 = min(state['lows'].values)
+            high_14 = max(state['highs'].values)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                stoch_k = float(100 * (np.float64(close - low_14) / np.float64(high_14 - low_14)))
+        else:
+            stoch_k = np.nan
+        state['stoch_k'].push(stoch_k, replace)
+        values['Stoch_K'] = stoch_k
+        values['Stoch_D'] = state['stoch_k'].mean()
+
+        # OBV
+        if prev_close is not None:
+            state['obv'] += float(np.sign(delta)) * volume
+        values['OBV'] = state['obv']
+
+        # Daily Returns
+        values['Returns'] = close / prev_close - 1 if prev_close is not None else np.nan
+
+        state['close'] = close
+        return values
+
+
+@timed('indicators_update')
+def update_indicators(df, raw_df, engine):
+    """Fold a refreshed download into an indicator frame without a full recompute
+
+    df is the previous frame from calculate_indicators (with engine positioned
+    on its last bar) and raw_df the freshly downloaded OHLCV frame. Returns the
+    updated frame, or None when the download does not line up with df (history
+    revised, symbol changed) and a full calculate_indicators is needed.
+    """
+    if len(df) < 2 or len(raw_df) == 0:
+        return None
+
+    # The second-to-last bar must be unchanged; everything after it is new
+    anchor = df.iloc[-2]
+    matches = raw_df.index[raw_df['Date'] == anchor['Date']]
+    if len(matches) != 1:
+        return None
+
+    position = raw_df.index.get_loc(matches[0])
+    anchor_raw = raw_df.iloc[position]
+    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        if anchor_raw[col] != anchor[col]:
+            return None
+
+    new_bars = raw_df.iloc[position + 1:]
+    if len(new_bars) == 0:
+        return None
+
+    rows = []
+    for i, (_, bar) in enumerate(new_bars.iterrows()):
+        values = engine.update_last(bar) if i == 0 else engine.append(bar)
+        row = {col: bar[col] for col in ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']}
+        row.update(values)
+        rows.append(row)
+
+    updated = pd.concat([df.iloc[:-1], pd.DataFrame(rows, columns=df.columns)], ignore_index=True)
+
+    # Keep the frame to the requested period as it slides forward
+    return updated[updated['Date'] >= raw_df['Date'].iloc[0]].reset_index(drop=True)
@@ -4,23 +4,40 @@ Desktop-based with real-time data using requests
 All professional trading tools included
 """
 
+import argparse
+import os
+import tempfile
 import tkinter as tk
-from tkinter import ttk, messagebox
-import requests
-import pandas as pd
+from tkinter import ttk, messagebox, filedialog
 import numpy as np
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from datetime import datetime
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
-import matplotlib.dates as mdates
-from matplotlib.patches import Rectangle
-import json
-import threading
 import time
 
+import alerts
+import analysis
+import charts
+import data_sources
+import indicators
+import market_data
+import portfolio
+import profiling
+import reports
+import resample
+import risk
+import screener
+import streaming
+from analysis_cache import AnalysisCache
+from bar_store import DEFAULT_PATH as CACHE_PATH, BarStore
+from data_table import TABLE_COLUMNS, VirtualTable
+from fetch_worker import FetchWorker
+from render_scheduler import RenderScheduler
+from transport import HttpTransport
+from watchlist import Watchlist
+
 class FinancialAnalysisPro:
-    def __init__(self, root):
+    def __init__(self, root, cache_path=CACHE_PATH):
         self.root = root
         self.root.title("Financial Analysis Pro - Real-time Trading Platform")
         self.root.geometry("1600x900")
@@ -30,8 +47,49 @@ class FinancialAnalysisPro:
         self.current_data = None
         self.current_symbol = "AAPL"
         self.auto_refresh = False
+        self.auto_refresh_job = None
         self.refresh_interval = 60  # seconds
         
+        # Live streaming: ticks are folded into the last bar once per frame
+        self.stream = None
+        self.stream_key = None
+        self.stream_frame = None
+        self.stream_buffer = None
+        self.stream_aggregator = None
+        self.stream_interval = 250  # milliseconds
+        
+        # Profiling diagnostics refresh
+        self.diagnostics_job = None
+        self.diagnostics_stage = None
+        self.diagnostics_interval = 1000  # milliseconds
+        
+        # Background fetching
+        self.fetch_worker = FetchWorker()
+        self.bar_store = BarStore(cache_path)
+        self.poll_interval = 50  # milliseconds
+        
+        # Recently analyzed series, served from memory until an auto-refresh period old
+        self.analysis_cache = AnalysisCache(ttl=self.refresh_interval)
+        
+        # Alert rules, checked as new bars arrive; the log sits next to the bar cache
+        self.alert_engine = alerts.AlertEngine(log_path=os.path.join(os.path.dirname(cache_path), 'alerts.log'))
+        self.alert_engine.load()
+        self.max_alerts_shown = 500
+        
+        # Watchlist: pooled session shared by the parallel symbol downloads
+        self.transport = HttpTransport(headers=market_data.HEADERS)
+        self.watchlist = Watchlist(self.transport, store=self.bar_store, alerts=self.alert_engine)
+        self.watchlist.load()
+        self.watchlist_worker = FetchWorker()
+        self.risk_worker = FetchWorker()
+        self.screener_worker = FetchWorker()
+        self.screener_results = None
+        self.screener_sort = ('Symbol', False)
+        
+        # Portfolio lots, valued from cached closes until fresh prices arrive
+        self.portfolio = portfolio.Portfolio().load()
+        self.portfolio.refresh_from_store(self.bar_store)
+        
         # Style configuration
         self.setup_styles()
         
@@ -40,6 +98,10 @@ class FinancialAnalysisPro:
         
         # Load initial data
         self.fetch_data()
+        self.root.after(self.poll_interval, self.poll_fetch_results)
+        
+        # Profiling may already be on from the command line
+        self.toggle_profiling()
     
     def setup_styles(self):
         """Configure custom styles"""
@@ -86,6 +148,7 @@ class FinancialAnalysisPro:
         intervals = ["1m", "5m", "15m", "30m", "1h", "1d", "1wk", "1mo"]
         interval_combo = ttk.Combobox(control_frame, textvariable=self.interval_var, values=intervals, width=8, state='readonly')
         interval_combo.pack(side=tk.LEFT, padx=5)
+        interval_combo.bind('<<ComboboxSelected>>', lambda event: self.fetch_data(callback=self.render, local=True))
         
         # Analyze button
         analyze_btn = ttk.Button(control_frame, text="📊 ANALYZE", style='Accent.TButton', command=self.analyze)
@@ -96,6 +159,13 @@ class FinancialAnalysisPro:
         auto_refresh_check = ttk.Checkbutton(control_frame, text="Auto Refresh (60s)", variable=self.auto_refresh_var, command=self.toggle_auto_refresh)
         auto_refresh_check.pack(side=tk.LEFT, padx=10)
         
+        # Live stream: replay:<file>[@speed], an SSE URL or a ws:// URL ({symbol} is filled in)
+        self.stream_var = tk.BooleanVar(value=False)
+        stream_check = ttk.Checkbutton(control_frame, text="📡 Live", variable=self.stream_var, command=self.toggle_stream)
+        stream_check.pack(side=tk.LEFT, padx=(10, 5))
+        self.stream_entry = ttk.Entry(control_frame, width=28)
+        self.stream_entry.pack(side=tk.LEFT, padx=5)
+        
         # Status
         self.status_label = ttk.Label(control_frame, text="Ready", foreground='#00ff88')
         self.status_label.pack(side=tk.RIGHT, padx=10)
@@ -131,36 +201,84 @@ class FinancialAnalysisPro:
         # Create tabs
         self.create_chart_tab()
         self.create_indicators_tab()
+        self.create_timeframes_tab()
         self.create_technical_tab()
         self.create_portfolio_tab()
         self.create_data_tab()
+        self.create_watchlist_tab()
+        self.create_risk_tab()
+        self.create_screener_tab()
+        self.create_alerts_tab()
+        self.create_diagnostics_tab()
+        
+        # Only the tab on screen is redrawn when data changes
+        self.render_scheduler = RenderScheduler(self.root, self.notebook)
+        self.render_scheduler.register('chart', self.chart_frame, self.plot_price_chart)
+        self.render_scheduler.register('indicators', self.indicators_frame, self.plot_indicators)
+        self.render_scheduler.register('timeframes', self.timeframes_frame, self.plot_timeframes)
+        self.render_scheduler.register('technical', self.technical_frame, self.generate_technical_analysis)
+        self.render_scheduler.register('data', self.data_frame, self.update_data_table)
+        self.render_scheduler.register('diagnostics', self.diagnostics_frame, self.update_diagnostics)
     
     def create_chart_tab(self):
         """Create price chart tab"""
-        chart_frame = ttk.Frame(self.notebook)
-        self.notebook.add(chart_frame, text="📈 Price Chart")
+        self.chart_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.chart_frame, text="📈 Price Chart")
         
         # Create matplotlib figure
         self.fig_chart = Figure(figsize=(14, 8), facecolor='#0a0e27')
-        self.canvas_chart = FigureCanvasTkAgg(self.fig_chart, chart_frame)
+        self.canvas_chart = FigureCanvasTkAgg(self.fig_chart, self.chart_frame)
+        
+        # Zoom/pan toolbar; the chart re-samples its bars for the visible range
+        toolbar = NavigationToolbar2Tk(self.canvas_chart, self.chart_frame, pack_toolbar=False)
+        toolbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.canvas_chart.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.price_chart = charts.PriceChart(self.fig_chart, self.canvas_chart)
+        profiling.instrument(self.canvas_chart, 'draw', 'draw_price_chart')
     
     def create_indicators_tab(self):
         """Create technical indicators tab"""
-        indicators_frame = ttk.Frame(self.notebook)
-        self.notebook.add(indicators_frame, text="📊 Indicators")
+        self.indicators_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.indicators_frame, text="📊 Indicators")
         
         self.fig_indicators = Figure(figsize=(14, 8), facecolor='#0a0e27')
-        self.canvas_indicators = FigureCanvasTkAgg(self.fig_indicators, indicators_frame)
+        self.canvas_indicators = FigureCanvasTkAgg(self.fig_indicators, self.indicators_frame)
+        
+        toolbar = NavigationToolbar2Tk(self.canvas_indicators, self.indicators_frame, pack_toolbar=False)
+        toolbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.canvas_indicators.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.indicator_chart = charts.IndicatorChart(self.fig_indicators, self.canvas_indicators)
+        profiling.instrument(self.canvas_indicators, 'draw', 'draw_indicators')
+    
+    def create_timeframes_tab(self):
+        """Create side-by-side timeframes tab"""
+        self.timeframes_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.timeframes_frame, text="🕒 Timeframes")
+        
+        input_frame = ttk.Frame(self.timeframes_frame)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="Timeframes:").pack(side=tk.LEFT, padx=5)
+        self.timeframes_entry = ttk.Entry(input_frame, width=30)
+        self.timeframes_entry.insert(0, "15m, 1h, 1d")
+        self.timeframes_entry.pack(side=tk.LEFT, padx=5)
+        self.timeframes_entry.bind('<Return>', lambda event: self.render_scheduler.invalidate('timeframes'))
+        ttk.Button(input_frame, text="Show", command=lambda: self.render_scheduler.invalidate('timeframes')).pack(side=tk.LEFT, padx=5)
+        
+        self.timeframes_status = ttk.Label(input_frame, text="Built from the loaded bars, no download")
+        self.timeframes_status.pack(side=tk.RIGHT, padx=10)
+        
+        self.fig_timeframes = Figure(figsize=(14, 8), facecolor='#0a0e27')
+        self.canvas_timeframes = FigureCanvasTkAgg(self.fig_timeframes, self.timeframes_frame)
+        self.canvas_timeframes.get_tk_widget().pack(fill=tk.BOTH, expand=True)
     
     def create_technical_tab(self):
         """Create technical analysis tab"""
-        technical_frame = ttk.Frame(self.notebook)
-        self.notebook.add(technical_frame, text="🎯 Technical Analysis")
+        self.technical_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.technical_frame, text="🎯 Technical Analysis")
         
         # Create text widget for analysis
-        text_frame = ttk.Frame(technical_frame)
+        text_frame = ttk.Frame(self.technical_frame)
         text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         scrollbar = ttk.Scrollbar(text_frame)
@@ -190,6 +308,32 @@ class FinancialAnalysisPro:
         self.buy_price_entry.pack(side=tk.LEFT, padx=5)
         
         ttk.Button(input_frame, text="Calculate P&L", command=self.calculate_portfolio).pack(side=tk.LEFT, padx=10)
+        ttk.Button(input_frame, text="➕ Add Lot", command=self.add_portfolio_lot).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="Remove Selected", command=self.remove_portfolio_lots).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="🔄 Refresh Prices", command=self.refresh_portfolio_prices).pack(side=tk.LEFT, padx=5)
+        
+        self.portfolio_summary = ttk.Label(input_frame, text="")
+        self.portfolio_summary.pack(side=tk.RIGHT, padx=10)
+        
+        # Lots table
+        lots_frame = ttk.Frame(portfolio_frame)
+        lots_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        scrollbar_y = ttk.Scrollbar(lots_frame)
+        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        columns = ["Symbol", "Shares", "Buy Price", "Price", "Value", "P&L", "P&L %", "Daily P&L", "Weight", "Date"]
+        self.portfolio_tree = ttk.Treeview(lots_frame, columns=columns, show='headings', height=8, yscrollcommand=scrollbar_y.set)
+        
+        for col in columns:
+            self.portfolio_tree.heading(col, text=col)
+            self.portfolio_tree.column(col, width=100)
+        
+        self.portfolio_tree.tag_configure('positive', foreground='#00ff88')
+        self.portfolio_tree.tag_configure('negative', foreground='#ff4444')
+        
+        self.portfolio_tree.pack(fill=tk.X)
+        scrollbar_y.config(command=self.portfolio_tree.yview)
         
         # Results section
         results_frame = ttk.Frame(portfolio_frame)
@@ -197,14 +341,16 @@ class FinancialAnalysisPro:
         
         self.portfolio_text = tk.Text(results_frame, bg='#1e2139', fg='#e0e0e0', font=('Courier', 12), height=20)
         self.portfolio_text.pack(fill=tk.BOTH, expand=True)
+        
+        self.update_portfolio_table()
     
     def create_data_tab(self):
         """Create raw data tab"""
-        data_frame = ttk.Frame(self.notebook)
-        self.notebook.add(data_frame, text="📋 Data Table")
+        self.data_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.data_frame, text="📋 Data Table")
         
         # Create treeview for data display
-        tree_frame = ttk.Frame(data_frame)
+        tree_frame = ttk.Frame(self.data_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         scrollbar_y = ttk.Scrollbar(tree_frame)
@@ -213,159 +359,398 @@ class FinancialAnalysisPro:
         scrollbar_x = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL)
         scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
         
-        columns = ["Date", "Open", "High", "Low", "Close", "Volume", "Change %"]
+        columns = TABLE_COLUMNS
         self.data_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', 
-                                      yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+                                      xscrollcommand=scrollbar_x.set)
         
         for col in columns:
             self.data_tree.heading(col, text=col)
             self.data_tree.column(col, width=120)
         
+        self.data_tree.tag_configure('positive', foreground='#00ff88')
+        self.data_tree.tag_configure('negative', foreground='#ff4444')
+        
         self.data_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar_y.config(command=self.data_tree.yview)
         scrollbar_x.config(command=self.data_tree.xview)
+        
+        # Full history, only the rows on screen are materialized
+        self.data_table = VirtualTable(self.data_tree, scrollbar_y)
+    
+    def create_watchlist_tab(self):
+        """Create multi-symbol watchlist tab"""
+        watchlist_frame = ttk.Frame(self.notebook)
+        self.notebook.add(watchlist_frame, text="👀 Watchlist")
+        
+        # Input section
+        input_frame = ttk.Frame(watchlist_frame)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="Symbols:").pack(side=tk.LEFT, padx=5)
+        self.watchlist_entry = ttk.Entry(input_frame, width=30)
+        self.watchlist_entry.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(input_frame, text="Add", command=self.add_to_watchlist).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="Remove Selected", command=self.remove_from_watchlist).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="🔄 Refresh All", style='Accent.TButton', command=self.refresh_watchlist).pack(side=tk.LEFT, padx=10)
+        
+        self.watchlist_status = ttk.Label(input_frame, text="")
+        self.watchlist_status.pack(side=tk.RIGHT, padx=10)
+        
+        # Summary table
+        tree_frame = ttk.Frame(watchlist_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        scrollbar_y = ttk.Scrollbar(tree_frame)
+        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        columns = ["Symbol", "Price", "Change", "Change %", "Volume", "Market Cap", "P/E", "52W High", "52W Low"]
+        self.watchlist_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', yscrollcommand=scrollbar_y.set)
+        
+        for col in columns:
+            self.watchlist_tree.heading(col, text=col)
+            self.watchlist_tree.column(col, width=120)
+        
+        self.watchlist_tree.tag_configure('positive', foreground='#00ff88')
+        self.watchlist_tree.tag_configure('negative', foreground='#ff4444')
+        self.watchlist_tree.tag_configure('error', foreground='#ffaa00')
+        
+        self.watchlist_tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar_y.config(command=self.watchlist_tree.yview)
+        
+        # Double-click a row to analyze that symbol
+        self.watchlist_tree.bind('<Double-1>', self.open_watchlist_symbol)
+        
+        for symbol in self.watchlist.symbols:
+            self.watchlist_tree.insert('', tk.END, iid=symbol, values=(symbol,) + ("--",) * 8)
+    
+    def create_risk_tab(self):
+        """Create multi-symbol risk analytics tab"""
+        self.risk_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.risk_frame, text="⚠️ Risk")
+        
+        # Controls
+        input_frame = ttk.Frame(self.risk_frame)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="Universe:").pack(side=tk.LEFT, padx=5)
+        self.risk_universe_var = tk.StringVar(value="Watchlist + Portfolio")
+        ttk.Combobox(input_frame, textvariable=self.risk_universe_var, width=20, state='readonly',
+                     values=["Watchlist + Portfolio", "Watchlist", "Portfolio"]).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(input_frame, text="Period:").pack(side=tk.LEFT, padx=5)
+        self.risk_period_var = tk.StringVar(value="1y")
+        ttk.Combobox(input_frame, textvariable=self.risk_period_var, width=6, state='readonly',
+                     values=["6mo", "1y", "2y", "5y"]).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(input_frame, text="Confidence:").pack(side=tk.LEFT, padx=5)
+        self.risk_confidence_var = tk.StringVar(value="95%")
+        ttk.Combobox(input_frame, textvariable=self.risk_confidence_var, width=6, state='readonly',
+                     values=["90%", "95%", "99%"]).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(input_frame, text="Weights:").pack(side=tk.LEFT, padx=5)
+        self.risk_weights_var = tk.StringVar(value="Equal")
+        ttk.Combobox(input_frame, textvariable=self.risk_weights_var, width=10, state='readonly',
+                     values=["Equal", "Portfolio"]).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(input_frame, text="⚠️ Calculate Risk", style='Accent.TButton', command=self.calculate_risk).pack(side=tk.LEFT, padx=10)
+        
+        self.risk_status = ttk.Label(input_frame, text="")
+        self.risk_status.pack(side=tk.RIGHT, padx=10)
+        
+        # Per-symbol statistics next to the correlation heatmap
+        panes = ttk.PanedWindow(self.risk_frame, orient=tk.HORIZONTAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        tree_frame = ttk.Frame(panes)
+        scrollbar_y = ttk.Scrollbar(tree_frame)
+        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        columns = ["Symbol", "Weight", "Ann. Vol", "Sharpe", "Max DD", "Hist VaR", "Hist CVaR", "Param VaR", "Param CVaR", "Days"]
+        self.risk_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', yscrollcommand=scrollbar_y.set)
+        for col in columns:
+            self.risk_tree.heading(col, text=col)
+            self.risk_tree.column(col, width=80)
+        self.risk_tree.tag_configure('portfolio', foreground='#00ff88')
+        self.risk_tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar_y.config(command=self.risk_tree.yview)
+        panes.add(tree_frame, weight=3)
+        
+        chart_frame = ttk.Frame(panes)
+        self.fig_risk = Figure(figsize=(6, 6), facecolor='#0a0e27')
+        self.canvas_risk = FigureCanvasTkAgg(self.fig_risk, chart_frame)
+        self.canvas_risk.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        panes.add(chart_frame, weight=2)
+    
+    def create_screener_tab(self):
+        """Create universe screener tab"""
+        screener_frame = ttk.Frame(self.notebook)
+        self.notebook.add(screener_frame, text="🔍 Screener")
+        
+        # Filter expression over the cached bars of the chosen universe
+        input_frame = ttk.Frame(screener_frame)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        self.screener_entry = ttk.Entry(input_frame, width=60)
+        self.screener_entry.insert(0, "RSI < 30 and Close < BB_Lower and Close > SMA_200")
+        self.screener_entry.pack(side=tk.LEFT, padx=5)
+        self.screener_entry.bind('<Return>', lambda event: self.run_screener())
+        
+        ttk.Label(input_frame, text="Universe:").pack(side=tk.LEFT, padx=5)
+        self.screener_universe_var = tk.StringVar(value="All Cached")
+        ttk.Combobox(input_frame, textvariable=self.screener_universe_var, width=20, state='readonly',
+                     values=["All Cached", "Watchlist", "Watchlist + Portfolio"]).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(input_frame, text="🔍 Screen", style='Accent.TButton', command=self.run_screener).pack(side=tk.LEFT, padx=10)
+        
+        self.screener_status = ttk.Label(input_frame, text="")
+        self.screener_status.pack(side=tk.RIGHT, padx=10)
+        
+        # Matches; click a heading to sort, double-click a row to analyze the symbol
+        tree_frame = ttk.Frame(screener_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        scrollbar_y = ttk.Scrollbar(tree_frame)
+        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.screener_tree = ttk.Treeview(tree_frame, show='headings', yscrollcommand=scrollbar_y.set)
+        self.screener_tree.tag_configure('positive', foreground='#00ff88')
+        self.screener_tree.tag_configure('negative', foreground='#ff4444')
+        self.screener_tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar_y.config(command=self.screener_tree.yview)
+        self.screener_tree.bind('<Double-1>', self.open_screener_symbol)
     
-    def fetch_data(self):
-        """Fetch real-time data using requests"""
+    def create_alerts_tab(self):
+        """Create alert rules and triggered alerts tab"""
+        alerts_frame = ttk.Frame(self.notebook)
+        self.notebook.add(alerts_frame, text="🔔 Alerts")
+        
+        # Rule input: [SYMBOLS:] <value> crosses above|below <value>
+        input_frame = ttk.Frame(alerts_frame)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="Rule:").pack(side=tk.LEFT, padx=5)
+        self.alert_entry = ttk.Entry(input_frame, width=45)
+        self.alert_entry.insert(0, "MACD crosses above MACD_Signal")
+        self.alert_entry.pack(side=tk.LEFT, padx=5)
+        self.alert_entry.bind('<Return>', lambda event: self.add_alert_rule())
+        
+        ttk.Button(input_frame, text="Add", command=self.add_alert_rule).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="Remove Selected", command=self.remove_alert_rules).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="Clear Alerts", command=self.clear_alerts).pack(side=tk.LEFT, padx=5)
+        
+        self.alerts_status = ttk.Label(input_frame, text="Checked on every refresh of the watchlist, the chart and the live stream")
+        self.alerts_status.pack(side=tk.RIGHT, padx=10)
+        
+        panes = ttk.PanedWindow(alerts_frame, orient=tk.VERTICAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.rules_tree = ttk.Treeview(panes, columns=["Rule"], show='headings', height=6)
+        self.rules_tree.heading("Rule", text="Rules (values: price columns, indicators, Pivot, R1-R3, S1-S3 or numbers)")
+        panes.add(self.rules_tree, weight=1)
+        
+        tree_frame = ttk.Frame(panes)
+        scrollbar_y = ttk.Scrollbar(tree_frame)
+        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        columns = ["Time", "Symbol", "Interval", "Rule", "Bar", "Close", "Value"]
+        self.alerts_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', yscrollcommand=scrollbar_y.set)
+        for col in columns:
+            self.alerts_tree.heading(col, text=col)
+            self.alerts_tree.column(col, width=260 if col == "Rule" else 110)
+        self.alerts_tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar_y.config(command=self.alerts_tree.yview)
+        panes.add(tree_frame, weight=3)
+        
+        self.update_rules_table()
+    
+    def create_diagnostics_tab(self):
+        """Create profiling diagnostics tab"""
+        self.diagnostics_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.diagnostics_frame, text="🩺 Diagnostics")
+        
+        # Controls
+        input_frame = ttk.Frame(self.diagnostics_frame)
+        input_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        self.profiling_var = tk.BooleanVar(value=profiling.profiler.enabled)
+        ttk.Checkbutton(input_frame, text="⏱ Profile", variable=self.profiling_var,
+                        command=self.toggle_profiling).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="Reset", command=self.reset_profiling).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_frame, text="💾 Export Trace", command=self.export_trace).pack(side=tk.LEFT, padx=5)
+        
+        self.diagnostics_status = ttk.Label(input_frame, text="Profiling off")
+        self.diagnostics_status.pack(side=tk.RIGHT, padx=10)
+        
+        # Per-stage latency table above the histogram of the selected stage
+        panes = ttk.PanedWindow(self.diagnostics_frame, orient=tk.VERTICAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        columns = ["Stage", "Calls", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)", "Total (s)"]
+        self.diagnostics_tree = ttk.Treeview(panes, columns=columns, show='headings', selectmode='browse')
+        for col in columns:
+            self.diagnostics_tree.heading(col, text=col)
+            self.diagnostics_tree.column(col, width=110)
+        self.diagnostics_tree.bind('<<TreeviewSelect>>', self.on_diagnostics_select)
+        panes.add(self.diagnostics_tree, weight=2)
+        
+        self.histogram_text = tk.Text(panes, bg='#1e2139', fg='#e0e0e0', font=('Courier', 10), height=18)
+        panes.add(self.histogram_text, weight=1)
+    
+    def fetch_data(self, callback=None, local=False, refresh=False):
+        """Request data for the current inputs on the background fetch worker
+        
+        A series analyzed recently is shown straight from the analysis cache
+        and only downloaded again (a delta refresh) once it is stale, or when
+        refresh=True. When the loaded bars are fine enough for the interval,
+        a download only fetches those base bars, and with local=True (an
+        interval switch) nothing is downloaded at all: the bars are resampled
+        in memory.
+        """
         symbol = self.symbol_entry.get().upper()
         period = self.period_var.get()
         interval = self.interval_var.get()
         
-        self.status_label.config(text=f"Fetching data for {symbol}...", foreground='#ffaa00')
-        self.root.update()
+        cached = None if refresh else self.analysis_cache.get((symbol, period, interval))
+        if cached is not None:
+            data, stale = cached
+            self.fetch_worker.cancel()
+            self.show_data(data)
+            self.status_label.config(text=f"Showing {symbol} from memory", foreground='#00ff88')
+            if callback is not None:
+                callback()
+            if not stale:
+                return
+            local = False
         
-        try:
-            # Calculate date range
-            end_date = datetime.now()
-            period_map = {
-                "1d": 1, "5d": 5, "1mo": 30, "3mo": 90,
-                "6mo": 180, "1y": 365, "2y": 730, "5y": 1825, "max": 3650
-            }
-            days = period_map.get(period, 365)
-            start_date = end_date - timedelta(days=days)
-            
-            # Use Yahoo Finance API alternative (yfinance backend)
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-            params = {
-                "period1": int(start_date.timestamp()),
-                "period2": int(end_date.timestamp()),
-                "interval": interval,
-                "events": "div,split"
-            }
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
-                result = data['chart']['result'][0]
-                
-                # Extract price data
-                timestamps = result['timestamp']
-                quotes = result['indicators']['quote'][0]
-                
-                # Create DataFrame
-                df = pd.DataFrame({
-                    'Date': [datetime.fromtimestamp(ts) for ts in timestamps],
-                    'Open': quotes['open'],
-                    'High': quotes['high'],
-                    'Low': quotes['low'],
-                    'Close': quotes['close'],
-                    'Volume': quotes['volume']
-                })
-                
-                # Remove NaN values
-                df = df.dropna()
-                
-                # Get metadata
-                meta = result['meta']
-                
-                # Calculate additional metrics
-                df = self.calculate_indicators(df)
-                
-                self.current_data = {
-                    'df': df,
-                    'meta': meta,
-                    'symbol': symbol
-                }
-                
-                self.current_symbol = symbol
-                self.status_label.config(text=f"Data loaded successfully for {symbol}", foreground='#00ff88')
-                
-                return True
-            else:
-                raise Exception("No data received")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch data: {str(e)}")
+        base = self.usable_base(symbol, period, interval)
+        
+        # Submitting supersedes any download still in flight for a previous symbol
+        if local and base is not None:
+            self.status_label.config(text=f"Switching {symbol} to {interval} bars...", foreground='#ffaa00')
+            self.fetch_worker.submit((symbol, period, interval), self.load_data,
+                                     symbol, period, interval, None, base, callback=callback)
+        else:
+            self.status_label.config(text=f"Fetching data for {symbol}...", foreground='#ffaa00')
+            self.fetch_worker.submit((symbol, period, interval), self.load_data,
+                                     symbol, period, interval, base['interval'] if base else None, callback=callback)
+    
+    def usable_base(self, symbol, period, interval):
+        """The loaded base bars when the interval can be resampled from them, else None"""
+        data = self.current_data
+        if data is None or data['symbol'] != symbol or data['key'][1] != period:
+            return None
+        
+        base = data['base']
+        start, _ = market_data.period_range(period)
+        if not resample.can_resample(base['interval'], interval) or not resample.covers(base['raw'], start):
+            return None
+        return base
+    
+    @profiling.timed('fetch')
+    def load_data(self, symbol, period, interval, base_interval=None, base=None):
+        """Download and prepare data (runs on the fetch worker thread)
+        
+        Bars are downloaded at base_interval (the interval itself by default)
+        and resampled to the interval; a `base` already in memory is used
+        without downloading anything.
+        """
+        key = (symbol, period, interval)
+        if base is None:
+            base_interval = base_interval or interval
+            base_df, meta = market_data.fetch_chart(symbol, period, base_interval, store=self.bar_store,
+                                                    transport=self.transport)
+            base = {'interval': base_interval, 'raw': base_df, 'meta': meta, 'loaded': time.monotonic()}
+        
+        raw_df, meta = base['raw'], base['meta']
+        if base['interval'] != interval:
+            raw_df = resample.resample(raw_df, interval)
+        
+        # A refresh of the same series only recomputes indicators for the new bars
+        df = None
+        previous = self.current_data
+        if previous is not None and previous.get('key') == key:
+            engine = previous['engine'].copy()
+            df = indicators.update_indicators(previous['df'], raw_df, engine)
+        
+        if df is None:
+            # Calculate additional metrics
+            df = self.calculate_indicators(raw_df)
+            engine = indicators.IndicatorEngine.from_frame(df)
+        
+        self.alert_engine.update((symbol, interval), df)
+        
+        return {
+            'df': df,
+            'meta': meta,
+            'symbol': symbol,
+            'key': key,
+            'engine': engine,
+            'base': base,
+            'metrics': analysis.compute_metrics(df, meta),
+            'report': reports.snapshot(df, symbol)
+        }
+    
+    def poll_fetch_results(self):
+        """Pick up finished downloads from the fetch worker queue"""
+        for job in self.fetch_worker.drain():
+            self.on_fetch_complete(job)
+        
+        for job in self.watchlist_worker.drain():
+            self.on_watchlist_complete(job)
+        
+        for job in self.risk_worker.drain():
+            self.on_risk_complete(job)
+        
+        for job in self.screener_worker.drain():
+            self.on_screener_complete(job)
+        
+        triggered = self.alert_engine.drain()
+        if triggered:
+            self.show_alerts(triggered)
+        
+        self.root.after(self.poll_interval, self.poll_fetch_results)
+    
+    def on_fetch_complete(self, job):
+        """Apply a finished fetch job on the UI thread"""
+        if job.error is not None:
+            messagebox.showerror("Error", f"Failed to fetch data: {str(job.error)}")
             self.status_label.config(text="Error fetching data", foreground='#ff4444')
-            return False
+            return
+        
+        # Resampled series are as old as the base bars they were built from
+        self.analysis_cache.put(job.result['key'], job.result, loaded=job.result['base']['loaded'])
+        self.show_data(job.result)
+        if job.result['meta'].get('cachedOnly'):
+            self.status_label.config(text=f"Offline - showing cached data for {self.current_symbol}", foreground='#ffaa00')
+        else:
+            self.status_label.config(text=f"Data loaded successfully for {self.current_symbol}", foreground='#00ff88')
+        
+        if job.callback is not None:
+            job.callback()
+    
+    def show_data(self, data):
+        """Make a loaded series the current one"""
+        self.current_data = data
+        self.current_symbol = data['symbol']
+        if self.current_symbol in self.portfolio.symbols:
+            self.update_portfolio_price(data)
+            self.update_portfolio_table()
     
     def calculate_indicators(self, df):
         """Calculate technical indicators"""
-        # Simple Moving Averages
-        df['SMA_20'] = df['Close'].rolling(window=20).mean()
-        df['SMA_50'] = df['Close'].rolling(window=50).mean()
-        df['SMA_200'] = df['Close'].rolling(window=200).mean()
-        
-        # Exponential Moving Averages
-        df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-        df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-        
-        # MACD
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df['MACD_Hist'] = df['MACD'] - df['MACD_Signal']
-        
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # Bollinger Bands
-        df['BB_Middle'] = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
-        df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
-        
-        # ATR
-        high_low = df['High'] - df['Low']
-        high_close = np.abs(df['High'] - df['Close'].shift())
-        low_close = np.abs(df['Low'] - df['Close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = np.max(ranges, axis=1)
-        df['ATR'] = true_range.rolling(14).mean()
-        
-        # Stochastic Oscillator
-        low_14 = df['Low'].rolling(window=14).min()
-        high_14 = df['High'].rolling(window=14).max()
-        df['Stoch_K'] = 100 * ((df['Close'] - low_14) / (high_14 - low_14))
-        df['Stoch_D'] = df['Stoch_K'].rolling(window=3).mean()
-        
-        # OBV
-        df['OBV'] = (np.sign(df['Close'].diff()) * df['Volume']).fillna(0).cumsum()
-        
-        # Daily Returns
-        df['Returns'] = df['Close'].pct_change()
-        
-        return df
+        return indicators.calculate_indicators(df)
     
     def analyze(self):
         """Main analysis function"""
-        if self.fetch_data():
-            self.update_metrics()
-            self.plot_price_chart()
-            self.plot_indicators()
-            self.generate_technical_analysis()
-            self.update_data_table()
+        self.fetch_data(callback=self.render)
     
+    def render(self):
+        """Refresh the metrics now and mark every tab for a redraw from current_data"""
+        self.update_metrics()
+        self.render_scheduler.invalidate()
+    
+    @profiling.timed('update_metrics')
     def update_metrics(self):
         """Update metric labels"""
         if self.current_data is None:
@@ -374,455 +759,105 @@ class FinancialAnalysisPro:
         df = self.current_data['df']
         meta = self.current_data['meta']
         
-        current_price = df['Close'].iloc[-1]
-        prev_close = meta.get('chartPreviousClose', df['Close'].iloc[-2])
-        change = current_price - prev_close
-        change_pct = (change / prev_close) * 100
+        # Snapshot taken when the series was loaded; live ticks clear it
+        metrics = self.current_data['metrics']
+        if metrics is None:
+            metrics = self.current_data['metrics'] = analysis.compute_metrics(df, meta)
+        change = metrics['change']
         
         # Update labels
-        self.metric_labels['price'].config(text=f"${current_price:.2f}")
+        self.metric_labels['price'].config(text=f"${metrics['price']:.2f}")
         
         change_color = '#00ff88' if change >= 0 else '#ff4444'
         self.metric_labels['change'].config(text=f"${change:+.2f}", foreground=change_color)
-        self.metric_labels['change_pct'].config(text=f"{change_pct:+.2f}%", foreground=change_color)
-        
-        self.metric_labels['volume'].config(text=f"{df['Volume'].iloc[-1]:,.0f}")
-        
-        market_cap = meta.get('marketCap', 0)
-        if market_cap > 0:
-            if market_cap >= 1e12:
-                mc_str = f"${market_cap/1e12:.2f}T"
-            elif market_cap >= 1e9:
-                mc_str = f"${market_cap/1e9:.2f}B"
-            elif market_cap >= 1e6:
-                mc_str = f"${market_cap/1e6:.2f}M"
-            else:
-                mc_str = f"${market_cap:,.0f}"
-        else:
-            mc_str = "N/A"
-        self.metric_labels['market_cap'].config(text=mc_str)
+        self.metric_labels['change_pct'].config(text=f"{metrics['change_pct']:+.2f}%", foreground=change_color)
+        
+        self.metric_labels['volume'].config(text=f"{metrics['volume']:,.0f}")
+        self.metric_labels['market_cap'].config(text=analysis.format_market_cap(metrics['market_cap']))
         
         # P/E Ratio
-        pe_ratio = meta.get('trailingPE', 0)
+        pe_ratio = metrics['pe_ratio']
         self.metric_labels['pe_ratio'].config(text=f"{pe_ratio:.2f}" if pe_ratio else "N/A")
         
-        # 52-week high/low
-        high_52w = df['High'].tail(252).max() if len(df) >= 252 else df['High'].max()
-        low_52w = df['Low'].tail(252).min() if len(df) >= 252 else df['Low'].min()
-        
-        self.metric_labels['high_52w'].config(text=f"${high_52w:.2f}")
-        self.metric_labels['low_52w'].config(text=f"${low_52w:.2f}")
+        self.metric_labels['high_52w'].config(text=f"${metrics['high_52w']:.2f}")
+        self.metric_labels['low_52w'].config(text=f"${metrics['low_52w']:.2f}")
     
+    @profiling.timed('plot_price_chart')
     def plot_price_chart(self):
         """Plot candlestick chart with indicators"""
         if self.current_data is None:
             return
         
-        df = self.current_data['df']
-        symbol = self.current_data['symbol']
-        
-        self.fig_chart.clear()
-        
-        # Create subplots
-        gs = self.fig_chart.add_gridspec(4, 1, height_ratios=[3, 1, 1, 1], hspace=0.1)
-        ax1 = self.fig_chart.add_subplot(gs[0])
-        ax2 = self.fig_chart.add_subplot(gs[1], sharex=ax1)
-        ax3 = self.fig_chart.add_subplot(gs[2], sharex=ax1)
-        ax4 = self.fig_chart.add_subplot(gs[3], sharex=ax1)
-        
-        # Plot 1: Candlestick and Moving Averages
-        for idx in range(len(df)):
-            row = df.iloc[idx]
-            color = '#00ff88' if row['Close'] >= row['Open'] else '#ff4444'
-            
-            # Draw candlestick
-            ax1.plot([row['Date'], row['Date']], [row['Low'], row['High']], color=color, linewidth=1)
-            
-            body_height = abs(row['Close'] - row['Open'])
-            body_bottom = min(row['Open'], row['Close'])
-            
-            rect = Rectangle((mdates.date2num(row['Date']) - 0.3, body_bottom), 
-                           0.6, body_height, facecolor=color, edgecolor=color)
-            ax1.add_patch(rect)
-        
-        # Plot moving averages
-        ax1.plot(df['Date'], df['SMA_20'], label='SMA 20', color='orange', linewidth=1, alpha=0.7)
-        ax1.plot(df['Date'], df['SMA_50'], label='SMA 50', color='blue', linewidth=1, alpha=0.7)
-        ax1.plot(df['Date'], df['SMA_200'], label='SMA 200', color='red', linewidth=1, alpha=0.7)
-        
-        # Bollinger Bands
-        ax1.plot(df['Date'], df['BB_Upper'], 'gray', linewidth=0.5, linestyle='--', alpha=0.5)
-        ax1.plot(df['Date'], df['BB_Lower'], 'gray', linewidth=0.5, linestyle='--', alpha=0.5)
-        ax1.fill_between(df['Date'], df['BB_Upper'], df['BB_Lower'], alpha=0.1, color='gray')
-        
-        ax1.set_ylabel('Price ($)', color='white')
-        ax1.set_title(f'{symbol} - Technical Analysis', color='white', fontsize=14, fontweight='bold')
-        ax1.legend(loc='upper left', framealpha=0.3)
-        ax1.grid(True, alpha=0.2)
-        ax1.set_facecolor('#0a0e27')
-        
-        # Plot 2: MACD
-        ax2.plot(df['Date'], df['MACD'], label='MACD', color='#00aaff', linewidth=1)
-        ax2.plot(df['Date'], df['MACD_Signal'], label='Signal', color='#ff6600', linewidth=1)
-        
-        colors = ['#00ff88' if val >= 0 else '#ff4444' for val in df['MACD_Hist']]
-        ax2.bar(df['Date'], df['MACD_Hist'], color=colors, alpha=0.3, width=0.8)
-        
-        ax2.set_ylabel('MACD', color='white')
-        ax2.axhline(y=0, color='white', linewidth=0.5, alpha=0.5)
-        ax2.legend(loc='upper left', framealpha=0.3, fontsize=8)
-        ax2.grid(True, alpha=0.2)
-        ax2.set_facecolor('#0a0e27')
-        
-        # Plot 3: RSI
-        ax3.plot(df['Date'], df['RSI'], label='RSI', color='#aa00ff', linewidth=1.5)
-        ax3.axhline(y=70, color='#ff4444', linewidth=0.8, linestyle='--', alpha=0.7, label='Overbought')
-        ax3.axhline(y=30, color='#00ff88', linewidth=0.8, linestyle='--', alpha=0.7, label='Oversold')
-        ax3.fill_between(df['Date'], 30, 70, alpha=0.1, color='gray')
-        
-        ax3.set_ylabel('RSI', color='white')
-        ax3.set_ylim(0, 100)
-        ax3.legend(loc='upper left', framealpha=0.3, fontsize=8)
-        ax3.grid(True, alpha=0.2)
-        ax3.set_facecolor('#0a0e27')
-        
-        # Plot 4: Volume
-        colors = ['#00ff88' if df['Close'].iloc[i] >= df['Open'].iloc[i] else '#ff4444' 
-                 for i in range(len(df))]
-        ax4.bar(df['Date'], df['Volume'], color=colors, alpha=0.5, width=0.8)
-        
-        ax4.set_ylabel('Volume', color='white')
-        ax4.set_xlabel('Date', color='white')
-        ax4.grid(True, alpha=0.2)
-        ax4.set_facecolor('#0a0e27')
-        
-        # Format x-axis
-        for ax in [ax1, ax2, ax3, ax4]:
-            ax.tick_params(colors='white')
-            plt.setp(ax.spines.values(), color='#2e3350')
-        
-        plt.setp(ax1.get_xticklabels(), visible=False)
-        plt.setp(ax2.get_xticklabels(), visible=False)
-        plt.setp(ax3.get_xticklabels(), visible=False)
-        
-        self.fig_chart.autofmt_xdate()
-        self.canvas_chart.draw()
+        self.price_chart.render(self.current_data['df'], self.current_data['symbol'])
     
+    @profiling.timed('plot_indicators')
     def plot_indicators(self):
         """Plot additional indicators"""
         if self.current_data is None:
             return
         
-        df = self.current_data['df']
+        self.indicator_chart.render(self.current_data['df'], self.current_data['symbol'])
+    
+    @profiling.timed('plot_timeframes')
+    def plot_timeframes(self):
+        """Plot the chosen timeframes side by side, resampled from the loaded base bars"""
+        if self.current_data is None:
+            return
         
-        self.fig_indicators.clear()
-        
-        # Create 2x2 subplot grid
-        axes = self.fig_indicators.subplots(2, 2)
-        
-        # Stochastic Oscillator
-        axes[0, 0].plot(df['Date'], df['Stoch_K'], label='%K', color='#00aaff', linewidth=1.5)
-        axes[0, 0].plot(df['Date'], df['Stoch_D'], label='%D', color='#ff6600', linewidth=1.5)
-        axes[0, 0].axhline(y=80, color='#ff4444', linewidth=0.8, linestyle='--', alpha=0.5)
-        axes[0, 0].axhline(y=20, color='#00ff88', linewidth=0.8, linestyle='--', alpha=0.5)
-        axes[0, 0].fill_between(df['Date'], 20, 80, alpha=0.1, color='gray')
-        axes[0, 0].set_title('Stochastic Oscillator', color='white', fontweight='bold')
-        axes[0, 0].set_ylabel('Value', color='white')
-        axes[0, 0].legend(loc='upper left', framealpha=0.3)
-        axes[0, 0].grid(True, alpha=0.2)
-        axes[0, 0].set_facecolor('#0a0e27')
-        
-        # ATR
-        axes[0, 1].plot(df['Date'], df['ATR'], label='ATR', color='#ff00ff', linewidth=1.5)
-        axes[0, 1].fill_between(df['Date'], 0, df['ATR'], alpha=0.3, color='#ff00ff')
-        axes[0, 1].set_title('Average True Range (ATR)', color='white', fontweight='bold')
-        axes[0, 1].set_ylabel('ATR', color='white')
-        axes[0, 1].legend(loc='upper left', framealpha=0.3)
-        axes[0, 1].grid(True, alpha=0.2)
-        axes[0, 1].set_facecolor('#0a0e27')
-        
-        # OBV
-        axes[1, 0].plot(df['Date'], df['OBV'], label='OBV', color='#00ffff', linewidth=1.5)
-        axes[1, 0].fill_between(df['Date'], 0, df['OBV'], alpha=0.3, color='#00ffff')
-        axes[1, 0].set_title('On Balance Volume (OBV)', color='white', fontweight='bold')
-        axes[1, 0].set_ylabel('OBV', color='white')
-        axes[1, 0].set_xlabel('Date', color='white')
-        axes[1, 0].legend(loc='upper left', framealpha=0.3)
-        axes[1, 0].grid(True, alpha=0.2)
-        axes[1, 0].set_facecolor('#0a0e27')
-        
-        # Returns Distribution
-        returns = df['Returns'].dropna() * 100
-        axes[1, 1].hist(returns, bins=50, color='#00ff88', alpha=0.7, edgecolor='black')
-        axes[1, 1].axvline(x=returns.mean(), color='red', linewidth=2, linestyle='--', label=f'Mean: {returns.mean():.2f}%')
-        axes[1, 1].set_title('Daily Returns Distribution', color='white', fontweight='bold')
-        axes[1, 1].set_xlabel('Returns (%)', color='white')
-        axes[1, 1].set_ylabel('Frequency', color='white')
-        axes[1, 1].legend(loc='upper right', framealpha=0.3)
-        axes[1, 1].grid(True, alpha=0.2)
-        axes[1, 1].set_facecolor('#0a0e27')
-        
-        # Format all axes
-        for ax_row in axes:
-            for ax in ax_row:
-                ax.tick_params(colors='white')
-                plt.setp(ax.spines.values(), color='#2e3350')
-        
-        self.fig_indicators.tight_layout()
-        self.canvas_indicators.draw()
+        base = self.current_data['base']
+        frames = []
+        skipped = []
+        for interval in self.timeframes_entry.get().replace(',', ' ').split():
+            if not resample.can_resample(base['interval'], interval):
+                skipped.append(interval)
+            elif interval == base['interval']:
+                frames.append((interval, base['raw']))
+            else:
+                frames.append((interval, resample.resample(base['raw'], interval)))
+        
+        charts.draw_timeframes(self.fig_timeframes, frames, self.current_data['symbol'])
+        self.canvas_timeframes.draw_idle()
+        
+        status = f"From {base['interval']} bars, no download"
+        if skipped:
+            status += f" | {', '.join(skipped)} need a finer download (pick it as the interval)"
+        self.timeframes_status.config(text=status, foreground='#ffaa00' if skipped else '#00ff88')
     
+    @profiling.timed('technical_analysis')
     def generate_technical_analysis(self):
         """Generate technical analysis report"""
         if self.current_data is None:
             return
         
-        df = self.current_data['df']
-        symbol = self.current_data['symbol']
+        snapshot = self.current_data['report']
+        if snapshot is None:
+            snapshot = self.current_data['report'] = reports.snapshot(self.current_data['df'], self.current_data['symbol'])
         
+        # Keep the reader's scroll position across refreshes
+        top = self.technical_text.yview()[0]
         self.technical_text.delete(1.0, tk.END)
-        
-        report = f"""
-{'='*80}
-TECHNICAL ANALYSIS REPORT - {symbol}
-{'='*80}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-{'='*80}
-PRICE ACTION
-{'='*80}
-Current Price:      ${df['Close'].iloc[-1]:.2f}
-Previous Close:     ${df['Close'].iloc[-2]:.2f}
-Change:             ${df['Close'].iloc[-1] - df['Close'].iloc[-2]:+.2f}
-Change %:           {((df['Close'].iloc[-1] / df['Close'].iloc[-2]) - 1) * 100:+.2f}%
-
-High (Today):       ${df['High'].iloc[-1]:.2f}
-Low (Today):        ${df['Low'].iloc[-1]:.2f}
-Volume:             {df['Volume'].iloc[-1]:,.0f}
-
-{'='*80}
-MOVING AVERAGES
-{'='*80}
-SMA 20:             ${df['SMA_20'].iloc[-1]:.2f}
-SMA 50:             ${df['SMA_50'].iloc[-1]:.2f}
-SMA 200:            ${df['SMA_200'].iloc[-1]:.2f}
-
-EMA 12:             ${df['EMA_12'].iloc[-1]:.2f}
-EMA 26:             ${df['EMA_26'].iloc[-1]:.2f}
-
-"""
-        
-        # Trend Analysis
-        current_price = df['Close'].iloc[-1]
-        sma20 = df['SMA_20'].iloc[-1]
-        sma50 = df['SMA_50'].iloc[-1]
-        sma200 = df['SMA_200'].iloc[-1]
-        
-        trend = "BULLISH" if current_price > sma20 > sma50 > sma200 else \
-                "BEARISH" if current_price < sma20 < sma50 < sma200 else "NEUTRAL"
-        
-        report += f"""
-Trend Signal:       {trend}
-Price vs SMA20:     {'ABOVE' if current_price > sma20 else 'BELOW'} ({((current_price/sma20-1)*100):+.2f}%)
-Price vs SMA50:     {'ABOVE' if current_price > sma50 else 'BELOW'} ({((current_price/sma50-1)*100):+.2f}%)
-Price vs SMA200:    {'ABOVE' if current_price > sma200 else 'BELOW'} ({((current_price/sma200-1)*100):+.2f}%)
-
-{'='*80}
-MOMENTUM INDICATORS
-{'='*80}
-"""
-        
-        # RSI Analysis
-        rsi = df['RSI'].iloc[-1]
-        rsi_signal = "OVERBOUGHT (>70)" if rsi > 70 else "OVERSOLD (<30)" if rsi < 30 else "NEUTRAL"
-        
-        report += f"""
-RSI (14):           {rsi:.2f}
-RSI Signal:         {rsi_signal}
-
-"""
-        
-        # MACD Analysis
-        macd = df['MACD'].iloc[-1]
-        macd_signal = df['MACD_Signal'].iloc[-1]
-        macd_hist = df['MACD_Hist'].iloc[-1]
-        macd_trend = "BULLISH" if macd > macd_signal else "BEARISH"
-        
-        report += f"""
-MACD:               {macd:.4f}
-MACD Signal:        {macd_signal:.4f}
-MACD Histogram:     {macd_hist:.4f}
-MACD Signal:        {macd_trend} ({'BUY' if macd > macd_signal else 'SELL'})
-
-"""
-        
-        # Stochastic
-        stoch_k = df['Stoch_K'].iloc[-1]
-        stoch_d = df['Stoch_D'].iloc[-1]
-        stoch_signal = "OVERBOUGHT (>80)" if stoch_k > 80 else "OVERSOLD (<20)" if stoch_k < 20 else "NEUTRAL"
-        
-        report += f"""
-Stochastic %K:      {stoch_k:.2f}
-Stochastic %D:      {stoch_d:.2f}
-Stochastic Signal:  {stoch_signal}
-
-{'='*80}
-VOLATILITY
-{'='*80}
-ATR (14):           ${df['ATR'].iloc[-1]:.2f}
-BB Upper:           ${df['BB_Upper'].iloc[-1]:.2f}
-BB Middle:          ${df['BB_Middle'].iloc[-1]:.2f}
-BB Lower:           ${df['BB_Lower'].iloc[-1]:.2f}
-BB Width:           ${df['BB_Upper'].iloc[-1] - df['BB_Lower'].iloc[-1]:.2f}
-
-"""
-        
-        # Volatility metrics
-        returns = df['Returns'].dropna()
-        daily_vol = returns.std()
-        annual_vol = daily_vol * np.sqrt(252)
-        
-        report += f"""
-Daily Volatility:   {daily_vol*100:.2f}%
-Annual Volatility:  {annual_vol*100:.2f}%
-
-{'='*80}
-SUPPORT & RESISTANCE LEVELS
-{'='*80}
-"""
-        
-        # Calculate pivot points
-        high = df['High'].iloc[-1]
-        low = df['Low'].iloc[-1]
-        close = df['Close'].iloc[-1]
-        
-        pivot = (high + low + close) / 3
-        r1 = 2 * pivot - low
-        r2 = pivot + (high - low)
-        r3 = high + 2 * (pivot - low)
-        s1 = 2 * pivot - high
-        s2 = pivot - (high - low)
-        s3 = low - 2 * (high - pivot)
-        
-        report += f"""
-Pivot Point:        ${pivot:.2f}
-
-Resistance 3:       ${r3:.2f}
-Resistance 2:       ${r2:.2f}
-Resistance 1:       ${r1:.2f}
-
-Support 1:          ${s1:.2f}
-Support 2:          ${s2:.2f}
-Support 3:          ${s3:.2f}
-
-{'='*80}
-TRADING SIGNALS
-{'='*80}
-"""
-        
-        # Generate trading signals
-        signals = []
-        
-        if rsi < 30:
-            signals.append("✓ RSI indicates OVERSOLD - Potential BUY signal")
-        elif rsi > 70:
-            signals.append("✗ RSI indicates OVERBOUGHT - Potential SELL signal")
-        
-        if macd > macd_signal and macd_hist > 0:
-            signals.append("✓ MACD Bullish Crossover - BUY signal")
-        elif macd < macd_signal and macd_hist < 0:
-            signals.append("✗ MACD Bearish Crossover - SELL signal")
-        
-        if current_price > sma20 and sma20 > sma50:
-            signals.append("✓ Price above SMA20 and SMA50 - Bullish trend")
-        elif current_price < sma20 and sma20 < sma50:
-            signals.append("✗ Price below SMA20 and SMA50 - Bearish trend")
-        
-        if stoch_k < 20:
-            signals.append("✓ Stochastic OVERSOLD - Potential reversal UP")
-        elif stoch_k > 80:
-            signals.append("✗ Stochastic OVERBOUGHT - Potential reversal DOWN")
-        
-        if current_price <= df['BB_Lower'].iloc[-1]:
-            signals.append("✓ Price at Lower Bollinger Band - Potential BUY")
-        elif current_price >= df['BB_Upper'].iloc[-1]:
-            signals.append("✗ Price at Upper Bollinger Band - Potential SELL")
-        
-        for signal in signals:
-            report += f"{signal}\n"
-        
-        report += f"""
-{'='*80}
-RISK METRICS
-{'='*80}
-"""
-        
-        # Risk calculations
-        total_return = ((df['Close'].iloc[-1] / df['Close'].iloc[0]) - 1) * 100
-        max_price = df['Close'].max()
-        max_drawdown = ((df['Close'].min() / max_price) - 1) * 100
-        
-        # Sharpe ratio (assuming 0% risk-free rate)
-        sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0
-        
-        report += f"""
-Total Return:       {total_return:+.2f}%
-Max Drawdown:       {max_drawdown:.2f}%
-Sharpe Ratio:       {sharpe_ratio:.2f}
-Best Day:           {returns.max()*100:+.2f}%
-Worst Day:          {returns.min()*100:+.2f}%
-
-{'='*80}
-RECOMMENDATION
-{'='*80}
-"""
-        
-        # Overall recommendation
-        bullish_signals = sum([
-            rsi < 30,
-            macd > macd_signal,
-            current_price > sma20,
-            stoch_k < 20,
-            current_price <= df['BB_Lower'].iloc[-1]
-        ])
-        
-        bearish_signals = sum([
-            rsi > 70,
-            macd < macd_signal,
-            current_price < sma20,
-            stoch_k > 80,
-            current_price >= df['BB_Upper'].iloc[-1]
-        ])
-        
-        if bullish_signals > bearish_signals + 1:
-            recommendation = "STRONG BUY"
-        elif bullish_signals > bearish_signals:
-            recommendation = "BUY"
-        elif bearish_signals > bullish_signals + 1:
-            recommendation = "STRONG SELL"
-        elif bearish_signals > bullish_signals:
-            recommendation = "SELL"
-        else:
-            recommendation = "HOLD"
-        
-        report += f"""
-Overall Rating:     {recommendation}
-Bullish Signals:    {bullish_signals}/5
-Bearish Signals:    {bearish_signals}/5
-
-{'='*80}
-DISCLAIMER
-{'='*80}
-This analysis is for informational purposes only and should not be considered
-as financial advice. Always do your own research and consult with a qualified
-financial advisor before making investment decisions.
-
-{'='*80}
-"""
-        
-        self.technical_text.insert(1.0, report)
+        self.technical_text.insert(1.0, reports.render_text(snapshot))
+        self.technical_text.yview_moveto(top)
     
     def calculate_portfolio(self):
-        """Calculate portfolio P&L"""
+        """Calculate P&L for the selected lot, or for the entered shares/price of the current symbol"""
+        lots, totals = self.portfolio.valuation()
+        
+        selected = self.portfolio_tree.selection()
+        if selected:
+            i = int(selected[0])
+            if np.isnan(lots['price'][i]):
+                messagebox.showwarning("Warning", "No price yet for this lot - refresh prices first")
+                return
+            
+            prev_price = lots['prev_price'][i]
+            report = portfolio.position_report(
+                self.portfolio.lot_symbols[i], self.portfolio.shares[i], self.portfolio.buy_prices[i],
+                lots['price'][i], lots['price'][i] if np.isnan(prev_price) else prev_price, totals['value'])
+            self.portfolio_text.delete(1.0, tk.END)
+            self.portfolio_text.insert(1.0, report)
+            return
+        
         if self.current_data is None:
             messagebox.showwarning("Warning", "Please analyze a stock first")
             return
@@ -837,173 +872,650 @@ financial advisor before making investment decisions.
             
             df = self.current_data['df']
             current_price = df['Close'].iloc[-1]
-            
-            # Calculate metrics
-            total_cost = shares * buy_price
-            current_value = shares * current_price
-            pnl = current_value - total_cost
-            pnl_pct = (pnl / total_cost) * 100
-            
-            # Daily P&L
             prev_price = df['Close'].iloc[-2]
-            daily_pnl = shares * (current_price - prev_price)
-            daily_pnl_pct = ((current_price / prev_price) - 1) * 100
-            
-            # Risk metrics
-            position_size_pct = (current_value / 100000) * 100  # Assuming 100k portfolio
-            
-            # Generate report
-            portfolio_report = f"""
-{'='*80}
-PORTFOLIO ANALYSIS
-{'='*80}
-Symbol:                 {self.current_symbol}
-Shares Owned:           {shares:,.0f}
-
-{'='*80}
-POSITION DETAILS
-{'='*80}
-Buy Price:              ${buy_price:.2f}
-Current Price:          ${current_price:.2f}
-Price Change:           ${current_price - buy_price:+.2f} ({((current_price/buy_price-1)*100):+.2f}%)
-
-{'='*80}
-PORTFOLIO VALUE
-{'='*80}
-Total Cost Basis:       ${total_cost:,.2f}
-Current Value:          ${current_value:,.2f}
-Unrealized P&L:         ${pnl:+,.2f}
-Return on Investment:   {pnl_pct:+.2f}%
-
-{'='*80}
-DAILY PERFORMANCE
-{'='*80}
-Yesterday's Close:      ${prev_price:.2f}
-Today's Change:         ${current_price - prev_price:+.2f}
-Daily P&L:              ${daily_pnl:+,.2f}
-Daily Return:           {daily_pnl_pct:+.2f}%
-
-{'='*80}
-RISK ANALYSIS
-{'='*80}
-Position Size:          {position_size_pct:.2f}% of portfolio
-Risk per Share:         ${current_price - buy_price:.2f}
-
-Breakeven Price:        ${buy_price:.2f}
-Current Distance:       {((current_price/buy_price-1)*100):+.2f}%
-
-{'='*80}
-PROFIT TARGETS
-{'='*80}
-"""
-            
-            # Calculate profit targets
-            targets = [5, 10, 15, 20, 25, 50]
-            for target_pct in targets:
-                target_price = buy_price * (1 + target_pct/100)
-                target_profit = shares * (target_price - buy_price)
-                distance = ((target_price / current_price) - 1) * 100
-                portfolio_report += f"+{target_pct}% Target:          ${target_price:.2f} (Profit: ${target_profit:,.2f}, Distance: {distance:+.2f}%)\n"
-            
-            portfolio_report += f"""
-{'='*80}
-STOP LOSS LEVELS
-{'='*80}
-"""
-            
-            # Calculate stop loss levels
-            stop_levels = [5, 10, 15, 20]
-            for stop_pct in stop_levels:
-                stop_price = buy_price * (1 - stop_pct/100)
-                stop_loss = shares * (buy_price - stop_price)
-                distance = ((stop_price / current_price) - 1) * 100
-                portfolio_report += f"-{stop_pct}% Stop:           ${stop_price:.2f} (Loss: -${stop_loss:,.2f}, Distance: {distance:+.2f}%)\n"
-            
-            portfolio_report += f"""
-{'='*80}
-RECOMMENDATION
-{'='*80}
-"""
-            
-            if pnl_pct > 20:
-                portfolio_report += "Position is UP significantly. Consider taking partial profits.\n"
-            elif pnl_pct > 10:
-                portfolio_report += "Position is profitable. Consider trailing stop loss.\n"
-            elif pnl_pct > 0:
-                portfolio_report += "Position is slightly profitable. Monitor closely.\n"
-            elif pnl_pct > -5:
-                portfolio_report += "Position is near breakeven. Wait for clearer direction.\n"
-            elif pnl_pct > -10:
-                portfolio_report += "Position is DOWN. Review your thesis and consider stop loss.\n"
-            else:
-                portfolio_report += "Position is significantly DOWN. Consider cutting losses.\n"
             
-            portfolio_report += f"""
-{'='*80}
-"""
+            # Size the what-if position against the book plus itself
+            portfolio_value = totals['value'] + shares * current_price
             
+            report = portfolio.position_report(self.current_symbol, shares, buy_price,
+                                               current_price, prev_price, portfolio_value)
             self.portfolio_text.delete(1.0, tk.END)
-            self.portfolio_text.insert(1.0, portfolio_report)
+            self.portfolio_text.insert(1.0, report)
             
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers")
     
+    def add_portfolio_lot(self):
+        """Add the entered shares/price as a lot of the current symbol"""
+        try:
+            shares = float(self.shares_entry.get())
+            buy_price = float(self.buy_price_entry.get())
+            self.portfolio.add_lot(self.current_symbol, shares, buy_price)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid positive numbers")
+            return
+        
+        if self.current_data is not None and self.current_data['symbol'] == self.current_symbol:
+            self.update_portfolio_price(self.current_data)
+        else:
+            self.portfolio.refresh_from_store(self.bar_store)
+        
+        self.portfolio.save()
+        self.update_portfolio_table()
+    
+    def remove_portfolio_lots(self):
+        """Remove the selected lots"""
+        selected = [int(item) for item in self.portfolio_tree.selection()]
+        if not selected:
+            return
+        
+        self.portfolio.remove_lots(selected)
+        self.portfolio.save()
+        self.update_portfolio_table()
+    
+    def refresh_portfolio_prices(self):
+        """Revalue all lots from the cached daily closes"""
+        self.portfolio.refresh_from_store(self.bar_store)
+        self.update_portfolio_table()
+    
+    def update_portfolio_price(self, data):
+        """Feed the latest close of a freshly loaded symbol into the portfolio"""
+        symbol = data['symbol']
+        if symbol not in self.portfolio.symbols:
+            return
+        
+        close = data['df']['Close']
+        # The bar before the last is only the previous close on daily bars
+        prev = close.iloc[-2] if data['key'][2] == '1d' and len(close) > 1 else None
+        self.portfolio.update_price(symbol, close.iloc[-1], prev)
+    
+    def update_portfolio_table(self):
+        """Show every lot revalued at the current prices"""
+        lots, totals = self.portfolio.valuation()
+        
+        self.portfolio_tree.delete(*self.portfolio_tree.get_children())
+        
+        def money(values, sign=''):
+            return ["--" if np.isnan(v) else f"${v:{sign},.2f}" for v in values.tolist()]
+        
+        def percent(values, sign=''):
+            return ["--" if np.isnan(v) else f"{v:{sign}.2f}%" for v in values.tolist()]
+        
+        columns = zip(
+            self.portfolio.lot_symbols.tolist(),
+            [f"{v:,.0f}" for v in self.portfolio.shares.tolist()],
+            money(self.portfolio.buy_prices),
+            money(lots['price']),
+            money(lots['value']),
+            money(lots['pnl'], '+'),
+            percent(lots['pnl_pct'], '+'),
+            money(lots['daily_pnl'], '+'),
+            percent(lots['weight']),
+            self.portfolio.dates
+        )
+        tags = np.where(lots['pnl'] >= 0, 'positive', 'negative').tolist()
+        
+        for i, (values, tag) in enumerate(zip(columns, tags)):
+            self.portfolio_tree.insert('', tk.END, iid=str(i), values=values, tags=(tag,))
+        
+        self.portfolio_summary.config(
+            text=f"{totals['lots']} lots | Value ${totals['value']:,.2f} | "
+                 f"P&L ${totals['pnl']:+,.2f} ({totals['pnl_pct']:+.2f}%) | Day ${totals['daily_pnl']:+,.2f}",
+            foreground='#00ff88' if totals['pnl'] >= 0 else '#ff4444')
+    
+    @profiling.timed('data_table')
     def update_data_table(self):
         """Update data table"""
         if self.current_data is None:
             return
         
-        df = self.current_data['df']
-        
-        # Clear existing data
-        for item in self.data_tree.get_children():
-            self.data_tree.delete(item)
+        self.data_table.set_frame(self.current_data['df'], self.current_data['key'])
+    
+    def add_to_watchlist(self):
+        """Add symbols from the watchlist entry"""
+        added = self.watchlist.add(self.watchlist_entry.get())
+        for symbol in added:
+            self.watchlist_tree.insert('', tk.END, iid=symbol, values=(symbol,) + ("--",) * 8)
+        
+        self.watchlist_entry.delete(0, tk.END)
+        if added:
+            self.refresh_watchlist(added)
+    
+    def remove_from_watchlist(self):
+        """Remove the selected watchlist rows"""
+        selected = self.watchlist_tree.selection()
+        self.watchlist.remove(selected)
+        for symbol in selected:
+            self.watchlist_tree.delete(symbol)
+    
+    def refresh_watchlist(self, symbols=None):
+        """Refresh watchlist symbols in parallel on the watchlist worker"""
+        symbols = list(self.watchlist.symbols if symbols is None else symbols)
+        if not symbols:
+            return
         
-        # Insert new data (last 100 rows)
-        display_df = df.tail(100).copy()
-        display_df['Change_Pct'] = display_df['Close'].pct_change() * 100
+        self.watchlist_status.config(text=f"Refreshing {len(symbols)} symbols...", foreground='#ffaa00')
+        self.watchlist_started = time.perf_counter()
+        self.watchlist_worker.submit('watchlist', self.watchlist.refresh, symbols)
+    
+    def on_watchlist_complete(self, job):
+        """Fill the watchlist table with refreshed metrics"""
+        if job.error is not None:
+            self.watchlist_status.config(text=f"Refresh failed: {job.error}", foreground='#ff4444')
+            return
         
-        for idx, row in display_df.iterrows():
-            date_str = row['Date'].strftime('%Y-%m-%d %H:%M')
+        failed = 0
+        for symbol, metrics in job.result.items():
+            if not self.watchlist_tree.exists(symbol):
+                continue
+            
+            if isinstance(metrics, Exception):
+                failed += 1
+                self.watchlist_tree.item(symbol, values=(symbol, "Error") + ("--",) * 7, tags=('error',))
+                continue
+            
+            pe_ratio = metrics['pe_ratio']
             values = (
-                date_str,
-                f"${row['Open']:.2f}",
-                f"${row['High']:.2f}",
-                f"${row['Low']:.2f}",
-                f"${row['Close']:.2f}",
-                f"{row['Volume']:,.0f}",
-                f"{row['Change_Pct']:+.2f}%"
+                symbol,
+                f"${metrics['price']:.2f}",
+                f"${metrics['change']:+.2f}",
+                f"{metrics['change_pct']:+.2f}%",
+                f"{metrics['volume']:,.0f}",
+                analysis.format_market_cap(metrics['market_cap']),
+                f"{pe_ratio:.2f}" if pe_ratio else "N/A",
+                f"${metrics['high_52w']:.2f}",
+                f"${metrics['low_52w']:.2f}"
             )
-            
-            # Color coding based on change
-            tag = 'positive' if row['Change_Pct'] >= 0 else 'negative'
-            self.data_tree.insert('', 0, values=values, tags=(tag,))
+            tag = 'positive' if metrics['change'] >= 0 else 'negative'
+            self.watchlist_tree.item(symbol, values=values, tags=(tag,))
+        
+        # The watchlist refresh also updated the cached daily bars
+        if self.portfolio.symbols:
+            self.refresh_portfolio_prices()
+        
+        elapsed = time.perf_counter() - self.watchlist_started
+        status = f"Refreshed {len(job.result)} symbols in {elapsed:.1f}s"
+        if failed:
+            status += f" ({failed} failed)"
+        self.watchlist_status.config(text=status, foreground='#ff4444' if failed else '#00ff88')
+    
+    def open_watchlist_symbol(self, event):
+        """Analyze the double-clicked watchlist symbol"""
+        symbol = self.watchlist_tree.identify_row(event.y)
+        if not symbol:
+            return
         
-        # Configure tags
-        self.data_tree.tag_configure('positive', foreground='#00ff88')
-        self.data_tree.tag_configure('negative', foreground='#ff4444')
+        self.symbol_entry.delete(0, tk.END)
+        self.symbol_entry.insert(0, symbol)
+        self.notebook.select(self.chart_frame)
+        self.analyze()
+    
+    def risk_symbols(self):
+        """Symbols covered by the selected risk universe"""
+        universe = self.risk_universe_var.get()
+        symbols = []
+        if universe != "Portfolio":
+            symbols += self.watchlist.symbols
+        if universe != "Watchlist":
+            symbols += list(self.portfolio.positions()['symbol'])
+        return list(dict.fromkeys(symbols)) or [self.current_symbol]
+    
+    def calculate_risk(self):
+        """Compute risk statistics for the universe on the risk worker"""
+        symbols = self.risk_symbols()
+        
+        weights = None
+        if self.risk_weights_var.get() == "Portfolio":
+            positions = self.portfolio.positions()
+            weights = dict(zip(positions['symbol'], positions['value'].fillna(0)))
+        
+        confidence = float(self.risk_confidence_var.get().rstrip('%')) / 100
+        period = self.risk_period_var.get()
+        
+        self.risk_status.config(text=f"Loading {len(symbols)} symbols...", foreground='#ffaa00')
+        self.risk_worker.submit('risk', self.load_risk, symbols, period, confidence, weights)
+    
+    def load_risk(self, symbols, period, confidence, weights):
+        """Fetch daily bars for every symbol and build the risk report (runs on the risk worker)"""
+        frames = {}
+        failed = []
+        # Only dates and closes are needed, so hundreds of symbols stay small in memory
+        for symbol, df in self.watchlist.fetch_frames(symbols, period, compact=True).items():
+            if isinstance(df, Exception) or len(df) < 3:
+                failed.append(symbol)
+            else:
+                frames[symbol] = df
+        
+        if not frames:
+            raise Exception("No data for any symbol")
+        
+        # Keep the requested order (downloads finish in any order)
+        frames = {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+        return risk.risk_report(frames, weights, confidence), failed
+    
+    def on_risk_complete(self, job):
+        """Show the risk table and correlation heatmap"""
+        if job.error is not None:
+            self.risk_status.config(text=f"Risk failed: {job.error}", foreground='#ff4444')
+            return
+        
+        report, failed = job.result
+        self.risk_tree.delete(*self.risk_tree.get_children())
+        
+        def pct(values):
+            return ["--" if np.isnan(v) else f"{v*100:.2f}%" for v in values.tolist()]
+        
+        rows = zip(
+            report['symbols'],
+            pct(report['weights']),
+            pct(report['annual_volatility']),
+            [f"{v:.2f}" for v in report['sharpe'].tolist()],
+            pct(report['max_drawdown']),
+            pct(report['historical_var']),
+            pct(report['historical_cvar']),
+            pct(report['parametric_var']),
+            pct(report['parametric_cvar']),
+            report['observations'].tolist()
+        )
+        for values in rows:
+            tags = ('portfolio',) if values[0] == 'PORTFOLIO' else ()
+            self.risk_tree.insert('', tk.END, values=values, tags=tags)
+        
+        charts.draw_correlation(self.fig_risk, report['correlation'], report['symbols'][:-1],
+                                title=f"Correlation (last {report['window']} days)")
+        self.canvas_risk.draw_idle()
+        
+        status = (f"{len(report['symbols']) - 1} symbols, {len(report['dates'])} days | "
+                  f"{report['confidence']:.0%} VaR (portfolio): {report['historical_var'][-1]*100:.2f}%")
+        if failed:
+            status += f" | no data: {', '.join(failed)}"
+        self.risk_status.config(text=status, foreground='#ffaa00' if failed else '#00ff88')
+    
+    def run_screener(self):
+        """Screen the chosen universe's cached bars on the screener worker"""
+        try:
+            expression = screener.Expression(self.screener_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Screener", str(e))
+            return
+        
+        universe = self.screener_universe_var.get()
+        symbols = None
+        if universe != "All Cached":
+            symbols = list(self.watchlist.symbols)
+            if universe == "Watchlist + Portfolio":
+                symbols += list(self.portfolio.positions()['symbol'])
+            symbols = list(dict.fromkeys(symbols))
+        
+        period = self.period_var.get()
+        interval = self.interval_var.get()
+        self.screener_status.config(text=f"Screening {period} of {interval} bars...", foreground='#ffaa00')
+        self.screener_worker.submit('screen', self.load_screen, expression, symbols, period, interval)
+    
+    def load_screen(self, expression, symbols, period, interval):
+        """Load the universe from the bar cache and screen it (runs on the screener worker)"""
+        start = time.perf_counter()
+        series = screener.load_universe(self.bar_store, period, interval, symbols)
+        results = screener.screen(series, expression)
+        return results, len(series), time.perf_counter() - start
+    
+    def on_screener_complete(self, job):
+        """Show finished screener results on the UI thread"""
+        if job.error is not None:
+            messagebox.showerror("Error", f"Screener failed: {str(job.error)}")
+            self.screener_status.config(text="Screener failed", foreground='#ff4444')
+            return
+        
+        results, screened, elapsed = job.result
+        self.screener_results = results
+        self.screener_sort = ('Symbol', False)
+        self.update_screener_table()
+        
+        if not screened:
+            self.screener_status.config(text="No cached bars to screen - analyze or refresh some symbols first",
+                                        foreground='#ffaa00')
+        else:
+            self.screener_status.config(text=f"{len(results)} of {screened} symbols match ({elapsed:.2f}s)",
+                                        foreground='#00ff88')
+    
+    def sort_screener(self, column):
+        """Sort the matches by a column; clicking the same heading again reverses the order"""
+        current, descending = self.screener_sort
+        self.screener_sort = (column, not descending if column == current else column != 'Symbol')
+        self.update_screener_table()
+    
+    def update_screener_table(self):
+        """Show the screener matches in the current sort order"""
+        results = self.screener_results
+        column, descending = self.screener_sort
+        results = results.sort_values(column, ascending=not descending, na_position='last', kind='stable')
+        
+        columns = list(results.columns)
+        self.screener_tree.delete(*self.screener_tree.get_children())
+        self.screener_tree.config(columns=columns)
+        for col in columns:
+            arrow = (" ▼" if descending else " ▲") if col == column else ""
+            self.screener_tree.heading(col, text=("Change %" if col == 'Returns' else col) + arrow,
+                                       command=lambda col=col: self.sort_screener(col))
+            self.screener_tree.column(col, width=100)
+        
+        for row in results.itertuples(index=False):
+            values = []
+            for col, value in zip(columns, row):
+                if col == 'Symbol':
+                    values.append(value)
+                elif col == 'Date':
+                    values.append(value.strftime('%Y-%m-%d %H:%M') if value.hour or value.minute else value.strftime('%Y-%m-%d'))
+                elif col == 'Returns':
+                    values.append(f"{value * 100:+.2f}%")
+                elif col in ('Volume', 'OBV'):
+                    values.append(f"{value:,.0f}")
+                else:
+                    values.append(f"{value:,.2f}")
+            tag = 'positive' if row.Returns >= 0 else 'negative'
+            self.screener_tree.insert('', tk.END, iid=row.Symbol, values=values, tags=(tag,))
+    
+    def open_screener_symbol(self, event):
+        """Analyze the double-clicked screener match"""
+        symbol = self.screener_tree.identify_row(event.y)
+        if not symbol:
+            return
+        
+        self.symbol_entry.delete(0, tk.END)
+        self.symbol_entry.insert(0, symbol)
+        self.notebook.select(self.chart_frame)
+        self.analyze()
+    
+    def add_alert_rule(self):
+        """Add the rule typed in the entry"""
+        try:
+            self.alert_engine.add(self.alert_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Alerts", str(e))
+            return
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save rules: {str(e)}")
+            return
+        self.update_rules_table()
+    
+    def remove_alert_rules(self):
+        """Remove the selected rules"""
+        indices = [self.rules_tree.index(item) for item in self.rules_tree.selection()]
+        if not indices:
+            return
+        
+        try:
+            self.alert_engine.remove(indices)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save rules: {str(e)}")
+        self.update_rules_table()
+    
+    def update_rules_table(self):
+        """List the alert rules"""
+        self.rules_tree.delete(*self.rules_tree.get_children())
+        for rule in self.alert_engine.rules:
+            self.rules_tree.insert('', tk.END, values=(str(rule),))
+    
+    def clear_alerts(self):
+        """Clear the triggered alerts list (the log file is kept)"""
+        self.alerts_tree.delete(*self.alerts_tree.get_children())
+    
+    def show_alerts(self, triggered):
+        """List alerts raised on the worker threads, newest first, and flag them in the status bar"""
+        for alert in triggered:
+            self.alerts_tree.insert('', 0, values=(
+                alert['time'][11:], alert['symbol'], alert['interval'], alert['rule'], alert['bar'],
+                f"${alert['close']:.2f}", f"{alert['value']:.2f}"))
+        
+        # Keep the table to the most recent alerts
+        for item in self.alerts_tree.get_children()[self.max_alerts_shown:]:
+            self.alerts_tree.delete(item)
+        
+        latest = triggered[-1]
+        more = f" (+{len(triggered) - 1} more)" if len(triggered) > 1 else ""
+        self.status_label.config(text=f"🔔 {latest['symbol']}: {latest['rule']}{more}", foreground='#ffaa00')
+        self.root.bell()
+    
+    def toggle_profiling(self):
+        """Turn stage timing on or off; off, every timed call costs a single flag check"""
+        profiling.profiler.enabled = self.profiling_var.get()
+        
+        if self.diagnostics_job is not None:
+            self.root.after_cancel(self.diagnostics_job)
+            self.diagnostics_job = None
+        
+        if profiling.profiler.enabled:
+            self.diagnostics_job = self.root.after(self.diagnostics_interval, self.diagnostics_loop)
+        self.render_scheduler.invalidate('diagnostics')
+    
+    def reset_profiling(self):
+        """Clear the collected stage timings and byte counts"""
+        profiling.profiler.reset()
+        self.render_scheduler.invalidate('diagnostics')
+    
+    def export_trace(self):
+        """Save the recorded calls as a Chrome trace file"""
+        path = filedialog.asksaveasfilename(title="Export Trace", defaultextension=".json",
+                                            initialfile="trace.json", filetypes=[("Trace JSON", "*.json")])
+        if not path:
+            return
+        
+        try:
+            profiling.profiler.export_trace(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export trace: {str(e)}")
+            return
+        
+        self.status_label.config(text=f"Trace saved to {os.path.basename(path)}", foreground='#00ff88')
+    
+    def diagnostics_loop(self):
+        """Refresh the diagnostics tab while profiling (drawn only when it is on screen)"""
+        self.diagnostics_job = None
+        if not profiling.profiler.enabled:
+            return
+        
+        self.render_scheduler.invalidate('diagnostics')
+        self.diagnostics_job = self.root.after(self.diagnostics_interval, self.diagnostics_loop)
+    
+    def on_diagnostics_select(self, event):
+        """Show the histogram of the clicked stage"""
+        selection = self.diagnostics_tree.selection()
+        stage = self.diagnostics_tree.set(selection[0], 'Stage') if selection else None
+        if stage is not None and stage != self.diagnostics_stage:
+            self.diagnostics_stage = stage
+            self.render_scheduler.invalidate('diagnostics')
+    
+    def update_diagnostics(self):
+        """Fill the stage table and the histogram of the selected stage"""
+        profiler = profiling.profiler
+        rows = profiler.summary()
+        
+        selected = self.diagnostics_stage
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        for row in rows:
+            item = self.diagnostics_tree.insert('', tk.END, values=(
+                row['stage'], row['calls'], f"{row['mean_ms']:.2f}", f"{row['p50_ms']:.2f}",
+                f"{row['p95_ms']:.2f}", f"{row['max_ms']:.2f}", f"{row['total_s']:.3f}"))
+            if row['stage'] == selected:
+                self.diagnostics_tree.selection_set(item)
+        
+        state = "on" if profiler.enabled else "off"
+        self.diagnostics_status.config(
+            text=f"Profiling {state} | Downloaded {profiler.bytes_downloaded / 1024 / 1024:,.2f} MB "
+                 f"in {profiler.requests} requests",
+            foreground='#00ff88' if profiler.enabled else '#ffaa00')
+        
+        # Latency histogram as text bars
+        self.histogram_text.delete(1.0, tk.END)
+        row = next((row for row in rows if row['stage'] == selected), rows[0] if rows else None)
+        if row is None:
+            self.histogram_text.insert(1.0, "No calls recorded. Turn on Profile and use the app.")
+            return
+        
+        peak = max(row['histogram']) or 1
+        lines = [f"{row['stage']} latency ({row['calls']} calls)", ""]
+        for label, count in zip(profiling.histogram_labels(), row['histogram']):
+            lines.append(f"{label:>16} {count:>7} {'█' * round(40 * count / peak)}")
+        self.histogram_text.insert(1.0, "\n".join(lines))
     
     def toggle_auto_refresh(self):
         """Toggle auto-refresh functionality"""
         self.auto_refresh = self.auto_refresh_var.get()
         
+        if self.auto_refresh_job is not None:
+            self.root.after_cancel(self.auto_refresh_job)
+            self.auto_refresh_job = None
+        
         if self.auto_refresh:
             self.status_label.config(text="Auto-refresh enabled", foreground='#00ff88')
-            threading.Thread(target=self.auto_refresh_loop, daemon=True).start()
+            self.auto_refresh_job = self.root.after(self.refresh_interval * 1000, self.auto_refresh_loop)
         else:
             self.status_label.config(text="Auto-refresh disabled", foreground='#ffaa00')
     
     def auto_refresh_loop(self):
-        """Auto-refresh loop"""
-        while self.auto_refresh:
-            time.sleep(self.refresh_interval)
-            if self.auto_refresh:
-                self.root.after(0, self.analyze)
+        """Auto-refresh loop (scheduled with after, the download runs on the fetch worker)"""
+        self.auto_refresh_job = None
+        if not self.auto_refresh:
+            return
+        
+        # Skip this tick if the previous refresh is still downloading; a live
+        # stream keeps the chart current without re-downloading the history
+        if not self.fetch_worker.is_busy() and self.stream is None:
+            self.fetch_data(callback=self.render, refresh=True)
+        if not self.watchlist_worker.is_busy():
+            self.refresh_watchlist()
+        
+        self.auto_refresh_job = self.root.after(self.refresh_interval * 1000, self.auto_refresh_loop)
+    
+    def toggle_stream(self):
+        """Start or stop live streaming for the current symbol"""
+        if not self.stream_var.get():
+            self.stop_stream()
+            self.status_label.config(text="Live stream stopped", foreground='#ffaa00')
+            return
+        
+        spec = self.stream_entry.get().strip()
+        if not spec:
+            messagebox.showinfo("Live Stream", "Enter a stream source: replay:<file>[@speed], an SSE URL or a ws:// URL")
+            self.stream_var.set(False)
+            return
+        
+        try:
+            self.start_stream(spec)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to start stream: {str(e)}")
+            self.stream_var.set(False)
+            return
+        
+        self.root.after(self.stream_interval, self.stream_loop)
+    
+    def start_stream(self, spec):
+        """Open the stream source for the current symbol"""
+        self.stop_stream()
+        interval = self.current_data['key'][2] if self.current_data is not None else self.interval_var.get()
+        self.stream_aggregator = streaming.BarAggregator(interval)
+        source = streaming.source_from_spec(spec, self.current_symbol)
+        self.stream = streaming.TickStream(source).start()
+        self.stream_key = (self.current_symbol, interval)
+        self.stream_frame = None
+        self.stream_buffer = None
+        self.status_label.config(text=f"Live: waiting for {self.current_symbol} ticks...", foreground='#00ff88')
+    
+    def stop_stream(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+    
+    def stream_loop(self):
+        """Fold the ticks received since the last frame into the chart (one redraw per frame)"""
+        if self.stream is None:
+            return
+        
+        if self.stream.error is not None or not self.stream.running:
+            error = self.stream.error
+            self.stop_stream()
+            self.stream_var.set(False)
+            self.status_label.config(text=f"Live stream ended{': ' + str(error) if error else ''}",
+                                     foreground='#ff4444' if error else '#ffaa00')
+            return
+        
+        # A new symbol or interval was loaded: follow it with a fresh source
+        data = self.current_data
+        if data is not None and (data['symbol'], data['key'][2]) != self.stream_key:
+            try:
+                self.start_stream(self.stream_entry.get())
+            except Exception as e:
+                self.stream_var.set(False)
+                self.status_label.config(text=f"Live stream stopped: {str(e)}", foreground='#ff4444')
+                return
+        
+        # Leave ticks queued while a download may be reading current_data
+        if data is not None and not self.fetch_worker.is_busy():
+            self.apply_ticks(data, self.stream.drain())
+        
+        self.root.after(self.stream_interval, self.stream_loop)
+    
+    @profiling.timed('stream_ticks')
+    def apply_ticks(self, data, ticks):
+        """Aggregate ticks into the current bar and refresh the views once"""
+        ticks = [tick for tick in ticks if tick[0] in ('', data['symbol'])]
+        if not ticks:
+            return
+        
+        # Continue from the last downloaded bar whenever a fetch replaced the frame
+        df = data['df']
+        if df is not self.stream_frame:
+            self.stream_aggregator.seed(df.iloc[-1])
+            self.stream_buffer = streaming.LiveFrame(df)
+        
+        alert_key = (data['symbol'], data['key'][2])
+        for bar, is_new in self.stream_aggregator.add_ticks(ticks):
+            streaming.apply_bar(self.stream_buffer, data['engine'], bar, is_new)
+            self.alert_engine.on_bar(alert_key, bar, is_new)
+        
+        df = self.stream_buffer.frame()
+        data['df'] = self.stream_frame = df
+        data['metrics'] = data['report'] = None
+        self.analysis_cache.remeasure(data['key'])
+        if self.current_symbol in self.portfolio.symbols:
+            self.portfolio.update_price(self.current_symbol, df['Close'].iloc[-1])
+        
+        self.render()
+        self.status_label.config(text=f"Live: {data['symbol']} ${df['Close'].iloc[-1]:.2f} "
+                                      f"({datetime.fromtimestamp(ticks[-1][1]).strftime('%H:%M:%S')})",
+                                 foreground='#00ff88')
 
 def main():
+    parser = argparse.ArgumentParser(description="Financial Analysis Pro")
+    parser.add_argument('--source', default=None,
+                        help="data source: yahoo (default), synthetic[:bars][@latency], replay:<dir>[@latency] "
+                             "or record:<dir>")
+    parser.add_argument('--profile', action='store_true', help="start with stage profiling on")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="profile and write a Chrome trace of the session to PATH on exit")
+    args = parser.parse_args()
+    
+    profiling.profiler.enabled = args.profile or bool(args.trace)
+    
+    source = data_sources.source_from_spec(args.source)
+    market_data.set_source(source)
+    cache_path = CACHE_PATH
+    if data_sources.is_simulated(source):
+        # Simulated bars get a throwaway cache instead of the real one
+        cache_path = os.path.join(tempfile.mkdtemp(prefix='financial_analysis_'), 'bars.db')
+    
     root = tk.Tk()
-    app = FinancialAnalysisPro(root)
+    app = FinancialAnalysisPro(root, cache_path)
     root.mainloop()
+    app.stop_stream()
+    app.fetch_worker.shutdown()
+    app.watchlist_worker.shutdown()
+    app.risk_worker.shutdown()
+    app.screener_worker.shutdown()
+    app.watchlist.shutdown()
+    app.transport.close()
+    if args.trace:
+        profiling.profiler.export_trace(args.trace)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Market data access
+Downloads chart data from the Yahoo Finance chart endpoint
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import requests
+
+from profiling import profiler, timed
+from transport import json_loads
+
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+QUOTE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# Days of history requested for each period option
+PERIOD_MAP = {
+    "1d": 1, "5d": 5, "1mo": 30, "3mo": 90,
+    "6mo": 180, "1y": 365, "2y": 730, "5y": 1825, "max": 3650
+}
+
+# Chart source replacing the Yahoo endpoint, e.g. a data_sources.ReplayChartSource
+_source = None
+
+
+def set_source(source):
+    """Serve every chart download from `source` (None restores Yahoo Finance)"""
+    global _source
+    _source = source
+
+
+def period_range(period, end_date=None):
+    """Return (start, end) datetimes covered by a period option"""
+    end_date = end_date or datetime.now()
+    days = PERIOD_MAP.get(period, 365)
+    return end_date - timedelta(days=days), end_date
+
+
+@timed('download')
+def download_chart(symbol, interval, period1, period2, timeout=10, transport=None):
+    """Download the raw chart JSON payload for a time range
+
+    Comes from the source given to set_source() when there is one, otherwise
+    from Yahoo Finance.
+    """
+    if _source is not None:
+        return _source.download_chart(symbol, interval, period1, period2, timeout)
+
+    return download_yahoo_chart(symbol, interval, period1, period2, timeout, transport)
+
+
+def download_yahoo_chart(symbol, interval, period1, period2, timeout=10, transport=None):
+    """Download a chart payload from the Yahoo endpoint
+
+    With an HttpTransport the shared pooled session (rate limiting, retries)
+    is used instead of a one-off request.
+    """
+    url = CHART_URL.format(symbol=symbol)
+    params = {
+        "period1": int(period1),
+        "period2": int(period2),
+        "interval": interval,
+        "events": "div,split"
+    }
+
+    if transport is not None:
+        return transport.get_json(url, params=params, timeout=timeout)
+
+    response = requests.get(url, params=params, headers=HEADERS, timeout=timeout)
+    response.raise_for_status()
+    profiler.count_bytes(len(response.content))
+
+    return json_loads(response.content)
+
+
+def fetch_chart(symbol, period, interval, store=None, timeout=10, transport=None):
+    """Download OHLCV bars and metadata for a symbol
+
+    Returns a (df, meta) tuple. Safe to call from any thread. With a BarStore
+    only bars newer than the cached ones are downloaded; when the network is
+    unavailable the cached bars are returned and meta['cachedOnly'] is set.
+    """
+    start_date, end_date = period_range(period)
+    # Whole minutes, so requests for the same series made around the same time
+    # are identical and coalesce in the transport
+    start_ts = int(start_date.timestamp()) // 60 * 60
+    end_ts = -(-int(end_date.timestamp()) // 60) * 60
+
+    if store is None:
+        return parse_chart(download_chart(symbol, interval, start_ts, end_ts, timeout, transport))
+
+    # Delta download when the cache already reaches back far enough
+    coverage = store.coverage(symbol, interval)
+    fetch_from = start_ts
+    if coverage is not None and coverage[0] <= start_ts:
+        fetch_from = max(start_ts, coverage[1])
+
+    offline = False
+    try:
+        payload = download_chart(symbol, interval, fetch_from, end_ts, timeout, transport)
+        timestamps, quotes, meta = extract_chart(payload)
+        store.save(symbol, interval, timestamps, quotes, meta, fetch_from)
+    except requests.RequestException:
+        if coverage is None:
+            raise
+        offline = True
+
+    timestamps, quotes, meta = store.load(symbol, interval, start_ts)
+    if not len(timestamps):
+        raise Exception("No data received")
+
+    if offline:
+        meta = dict(meta, cachedOnly=True)
+
+    return bars_to_frame(timestamps, quotes), meta
+
+
+def extract_chart(data):
+    """Pull (timestamps, quotes, meta) out of a chart JSON payload"""
+    if 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
+        result = data['chart']['result'][0]
+
+        # A range with no bars comes back without timestamp/quote arrays
+        timestamps = result.get('timestamp') or []
+        if timestamps:
+            quotes = result['indicators']['quote'][0]
+        else:
+            quotes = {field: [] for field in QUOTE_FIELDS}
+
+        return timestamps, quotes, result['meta']
+
+    raise Exception("No data received")
+
+
+def quote_arrays(timestamps, quotes):
+    """Typed (timestamps, block) arrays with incomplete bars removed
+
+    timestamps becomes int64 epoch seconds and block a (5, n) float64 array
+    in QUOTE_FIELDS order; JSON nulls turn into NaN during the conversion and
+    one mask drops every bar with a missing value.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    block = np.empty((len(QUOTE_FIELDS), len(timestamps)))
+    for i, field in enumerate(QUOTE_FIELDS):
+        block[i] = quotes[field]
+
+    valid = ~np.isnan(block).any(axis=0)
+    if not valid.all():
+        timestamps = timestamps[valid]
+        block = block[:, valid]
+
+    return timestamps, block
+
+
+def local_datetimes(timestamps):
+    """Epoch seconds to naive local datetime64 values, same as datetime.fromtimestamp
+
+    The UTC offset is looked up once per day rather than once per bar; only
+    bars on days where the offset changes (DST) are looked up one by one.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if not len(timestamps):
+        return timestamps.astype('datetime64[us]')
+
+    days, day_index = np.unique(timestamps // 86400, return_inverse=True)
+    day_starts = (days * 86400).tolist()
+    start_offsets = np.array([time.localtime(ts).tm_gmtoff for ts in day_starts])
+    end_offsets = np.array([time.localtime(ts + 86399).tm_gmtoff for ts in day_starts])
+
+    offsets = start_offsets[day_index]
+    changed = np.flatnonzero(start_offsets != end_offsets)
+    if len(changed):
+        rows = np.flatnonzero(np.isin(day_index, changed))
+        offsets[rows] = [time.localtime(ts).tm_gmtoff for ts in timestamps[rows].tolist()]
+
+    return (timestamps + offsets).astype('datetime64[s]').astype('datetime64[us]')
+
+
+@timed('parse')
+def bars_to_frame(timestamps, quotes):
+    """Build the OHLCV DataFrame used throughout the app"""
+    timestamps, block = quote_arrays(timestamps, quotes)
+
+    return pd.DataFrame({
+        'Date': local_datetimes(timestamps),
+        'Open': block[0],
+        'High': block[1],
+        'Low': block[2],
+        'Close': block[3],
+        'Volume': block[4]
+    })
+
+
+def parse_chart(data):
+    """Convert a chart JSON payload into a (df, meta) tuple"""
+    timestamps, quotes, meta = extract_chart(data)
+    if not len(timestamps):
+        raise Exception("No data received")
+
+    return bars_to_frame(timestamps, quotes), meta
@@ -0,0 +1,199 @@
+"""
+Headless analysis pipeline
+Fetch -> indicators -> technical report for many symbols, without Tk or matplotlib
+
+    python pipeline.py AAPL MSFT NVDA --period 1y --interval 1d --format csv --output results
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import analysis
+import data_sources
+import indicators
+import market_data
+import reports
+from bar_store import DEFAULT_PATH as CACHE_PATH, BarStore
+from transport import HttpTransport
+
+OUTPUT_FORMATS = ('csv', 'json', 'parquet')
+
+# Per-process resources, created on first use inside each worker
+_transport = None
+_stores = {}
+_source_spec = None
+
+
+def _resources(cache_path, source=None):
+    global _transport, _source_spec
+    if _transport is None:
+        _transport = HttpTransport(headers=market_data.HEADERS)
+    if source != _source_spec:
+        market_data.set_source(data_sources.source_from_spec(source))
+        _source_spec = source
+
+    store = None
+    if cache_path:
+        store = _stores.get(cache_path)
+        if store is None:
+            store = _stores[cache_path] = BarStore(cache_path)
+
+    return _transport, store
+
+
+def analyze_symbol(symbol, period="1y", interval="1d", cache_path=CACHE_PATH,
+                   include_bars=False, include_report=False, source=None):
+    """Run the whole pipeline for one symbol
+
+    Returns a dict with the 'summary' row and, when requested, the 'bars'
+    frame with indicator columns and the report 'snapshot' (see reports.py).
+    source is a data_sources spec such as 'synthetic:100000' (Yahoo when None).
+    """
+    transport, store = _resources(cache_path, source)
+    raw_df, meta = market_data.fetch_chart(symbol, period, interval, store=store, transport=transport)
+    df = indicators.calculate_indicators(raw_df)
+
+    result = {'symbol': symbol, 'summary': analysis.summarize(symbol, df, meta)}
+    if include_bars:
+        result['bars'] = df
+    if include_report:
+        result['snapshot'] = reports.snapshot(df, symbol)
+    return result
+
+
+def run_batch(symbols, period="1y", interval="1d", workers=None, cache_path=CACHE_PATH,
+              include_bars=False, include_report=False, source=None):
+    """Analyze symbols across worker processes, yielding (symbol, result or Exception) as they finish"""
+    options = dict(period=period, interval=interval, cache_path=cache_path,
+                   include_bars=include_bars, include_report=include_report, source=source)
+
+    if workers == 1 or len(symbols) == 1:
+        for symbol in symbols:
+            try:
+                yield symbol, analyze_symbol(symbol, **options)
+            except Exception as e:
+                yield symbol, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_symbol, symbol, **options): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                yield symbol, future.result()
+            except Exception as e:
+                yield symbol, e
+
+
+def write_table(df, path, fmt):
+    """Write a frame as CSV, JSON records or Parquet"""
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'json':
+        df.to_json(path, orient='records', date_format='iso', indent=2)
+    elif fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unknown output format: {fmt}")
+
+
+def read_symbols(args):
+    symbols = [s.upper() for s in args.symbols]
+    if args.symbols_file:
+        with open(args.symbols_file, encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    symbols.append(line.upper())
+
+    # Keep the first occurrence of each symbol
+    return list(dict.fromkeys(symbols))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the technical analysis pipeline for many symbols")
+    parser.add_argument('symbols', nargs='*', help="ticker symbols, e.g. AAPL MSFT")
+    parser.add_argument('-f', '--symbols-file', help="file with one symbol per line")
+    parser.add_argument('--period', default="1y", choices=list(market_data.PERIOD_MAP))
+    parser.add_argument('--interval', default="1d")
+    parser.add_argument('--format', default='csv', choices=OUTPUT_FORMATS)
+    parser.add_argument('-o', '--output', default='results', help="output directory")
+    parser.add_argument('--bars', action='store_true', help="also write each symbol's bars with indicators")
+    parser.add_argument('--report', action='store_true',
+                        help="also write each symbol's report, plus all reports in one file")
+    parser.add_argument('--report-format', default='text', choices=reports.REPORT_FORMATS)
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or update the local bar cache")
+    parser.add_argument('--source', default=None,
+                        help="data source: yahoo (default), synthetic[:bars][@latency], replay:<dir>[@latency] "
+                             "or record:<dir>")
+    args = parser.parse_args(argv)
+
+    symbols = read_symbols(args)
+    if not symbols:
+        parser.error("no symbols given")
+
+    if args.format == 'parquet' and not (importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet')):
+        parser.error("parquet output requires pyarrow or fastparquet (pip install pyarrow)")
+
+    try:
+        simulated = data_sources.is_simulated(data_sources.source_from_spec(args.source))
+    except ValueError as e:
+        parser.error(str(e))
+
+    os.makedirs(args.output, exist_ok=True)
+    if args.bars:
+        os.makedirs(os.path.join(args.output, 'bars'), exist_ok=True)
+    if args.report:
+        os.makedirs(os.path.join(args.output, 'reports'), exist_ok=True)
+
+    start = time.perf_counter()
+    rows = []
+    snapshots = []
+    failed = 0
+
+    for symbol, result in run_batch(symbols, args.period, args.interval, args.workers,
+                                    cache_path=None if args.no_cache or simulated else CACHE_PATH,
+                                    include_bars=args.bars, include_report=args.report, source=args.source):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"{symbol:<10} FAILED  {result}", file=sys.stderr)
+            continue
+
+        summary = result['summary']
+        rows.append(summary)
+        print(f"{symbol:<10} {summary['price']:>12.2f} {summary['change_pct']:>+8.2f}%  {summary['rating']}",
+              file=sys.stderr)
+
+        if args.bars:
+            write_table(result['bars'], os.path.join(args.output, 'bars', f"{symbol}.{args.format}"), args.format)
+        if args.report:
+            snapshots.append(result['snapshot'])
+            extension = reports.FILE_EXTENSIONS[args.report_format]
+            with open(os.path.join(args.output, 'reports', f"{symbol}.{extension}"), 'w', encoding='utf-8') as f:
+                f.write(reports.render(result['snapshot'], args.report_format))
+
+    # Restore the requested symbol order (workers finish in any order)
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    if rows:
+        rows.sort(key=lambda row: order[row['symbol']])
+        write_table(pd.DataFrame(rows), os.path.join(args.output, f"summary.{args.format}"), args.format)
+    if snapshots:
+        snapshots.sort(key=lambda snap: order[snap['symbol']])
+        extension = reports.FILE_EXTENSIONS[args.report_format]
+        reports.export_reports(snapshots, os.path.join(args.output, f"reports.{extension}"), args.report_format)
+
+    elapsed = time.perf_counter() - start
+    print(f"Analyzed {len(rows)}/{len(symbols)} symbols in {elapsed:.1f}s -> {args.output}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
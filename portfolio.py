@@ -0,0 +1,333 @@
+"""
+Portfolio engine
+Lots across many symbols held as columns, revalued with array operations
+"""
+
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.financial_analysis_pro', 'portfolio.json')
+
+# Ladder levels in percent from the buy price
+TARGET_LEVELS = [5, 10, 15, 20, 25, 50]
+STOP_LEVELS = [5, 10, 15, 20]
+
+LOT_FIELDS = ['symbol', 'shares', 'price', 'date']
+
+
+def ladder(shares, buy_price, current_price, levels, direction=1):
+    """Target (direction=1) or stop (direction=-1) ladder for every lot and level
+
+    Inputs are per-lot arrays (or scalars); each result is a (lots, levels)
+    array of level price, profit or loss at that price, and distance from the
+    current price in percent.
+    """
+    shares = np.asarray(shares, dtype=np.float64).reshape(-1, 1)
+    buy_price = np.asarray(buy_price, dtype=np.float64).reshape(-1, 1)
+    current_price = np.asarray(current_price, dtype=np.float64).reshape(-1, 1)
+    levels = np.asarray(levels, dtype=np.float64)
+
+    prices = buy_price * (1 + direction * levels / 100)
+    amounts = shares * np.abs(prices - buy_price)
+    distances = (prices / current_price - 1) * 100
+
+    return prices, amounts, distances
+
+
+class Portfolio:
+    """Lots of many symbols with cached last/previous closes
+
+    Lots are stored as parallel NumPy arrays and each lot points at its
+    symbol through an integer code, so revaluing the whole book after a
+    price update is a handful of vector operations.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.cash = 0.0
+        self.symbols = []
+        self._codes = {}
+        self.last = np.empty(0)
+        self.prev = np.empty(0)
+        self.set_lots([], [], [], [])
+
+    # Lots
+    def set_lots(self, symbols, shares, prices, dates):
+        """Replace every lot with the given columns"""
+        self.codes = np.array([self._symbol_code(s) for s in symbols], dtype=np.int64)
+        self.shares = np.asarray(shares, dtype=np.float64)
+        self.buy_prices = np.asarray(prices, dtype=np.float64)
+        self.dates = list(dates)
+
+    def _symbol_code(self, symbol):
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.last = np.append(self.last, np.nan)
+            self.prev = np.append(self.prev, np.nan)
+        return code
+
+    def __len__(self):
+        return len(self.shares)
+
+    @property
+    def lot_symbols(self):
+        return np.array(self.symbols, dtype=object)[self.codes] if len(self) else np.empty(0, dtype=object)
+
+    def add_lot(self, symbol, shares, price, lot_date=None):
+        if shares <= 0 or price <= 0:
+            raise ValueError("Shares and price must be positive")
+
+        code = self._symbol_code(symbol.upper())
+        self.codes = np.append(self.codes, code)
+        self.shares = np.append(self.shares, float(shares))
+        self.buy_prices = np.append(self.buy_prices, float(price))
+        self.dates.append(lot_date or date.today().isoformat())
+
+    def remove_lots(self, indices):
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(indices)] = False
+        self.codes = self.codes[keep]
+        self.shares = self.shares[keep]
+        self.buy_prices = self.buy_prices[keep]
+        self.dates = [d for d, k in zip(self.dates, keep) if k]
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'symbol': self.lot_symbols,
+            'shares': self.shares,
+            'price': self.buy_prices,
+            'date': self.dates,
+        })
+
+    # File storage: JSON by default, CSV when the path ends in .csv
+    def load(self, path=None):
+        path = path or self.path
+        try:
+            if path.lower().endswith('.csv'):
+                frame = pd.read_csv(path)
+                cash = 0.0
+            else:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                frame = pd.DataFrame(data.get('lots', []), columns=LOT_FIELDS)
+                cash = float(data.get('cash', 0.0))
+        except FileNotFoundError:
+            return self
+
+        self.cash = cash
+        self.set_lots(frame['symbol'].astype(str).str.upper().tolist(), frame['shares'].to_numpy(),
+                       frame['price'].to_numpy(), frame['date'].fillna('').astype(str).tolist())
+        return self
+
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        frame = self.to_frame()
+        if path.lower().endswith('.csv'):
+            frame.to_csv(path, index=False)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'cash': self.cash, 'lots': frame.to_dict(orient='records')}, f, indent=2)
+
+    # Prices
+    def update_price(self, symbol, last, prev=None):
+        """Set the latest (and previous) close for one symbol, e.g. on each tick"""
+        code = self._symbol_code(symbol)
+        self.last[code] = last
+        if prev is not None:
+            self.prev[code] = prev
+
+    def update_prices(self, closes):
+        """Set prices from {symbol: (last, prev)}, e.g. BarStore.latest_closes"""
+        for symbol, (last, prev) in closes.items():
+            self.update_price(symbol, last, prev)
+
+    def refresh_from_store(self, store, interval="1d"):
+        self.update_prices(store.latest_closes(self.symbols, interval))
+
+    # Valuation
+    def valuation(self):
+        """Per-lot arrays and book totals at the current prices
+
+        Lots without a price yet have NaN values and are left out of the totals.
+        """
+        price = self.last[self.codes]
+        prev = self.prev[self.codes]
+
+        cost_basis = self.shares * self.buy_prices
+        value = self.shares * price
+        pnl = value - cost_basis
+        daily_pnl = self.shares * (price - prev)
+
+        total_value = np.nansum(value) + self.cash
+        priced = ~np.isnan(value)
+        total_cost = cost_basis[priced].sum()
+        total_pnl = np.nansum(pnl)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lots = {
+                'price': price,
+                'prev_price': prev,
+                'cost_basis': cost_basis,
+                'value': value,
+                'pnl': pnl,
+                'pnl_pct': pnl / cost_basis * 100,
+                'daily_pnl': daily_pnl,
+                'daily_pct': (price / prev - 1) * 100,
+                'weight': value / total_value * 100 if total_value else np.full(len(value), np.nan),
+            }
+
+        totals = {
+            'value': total_value,
+            'cash': self.cash,
+            'cost_basis': total_cost,
+            'pnl': total_pnl,
+            'pnl_pct': total_pnl / total_cost * 100 if total_cost else 0.0,
+            'daily_pnl': np.nansum(daily_pnl),
+            'lots': len(self),
+            'symbols': len(np.unique(self.codes)),
+        }
+
+        return lots, totals
+
+    def positions(self):
+        """Lots aggregated per symbol: shares, average cost, value, P&L and weight"""
+        lots, totals = self.valuation()
+        count = len(self.symbols)
+
+        def per_symbol(values):
+            return np.bincount(self.codes, weights=np.nan_to_num(values), minlength=count)
+
+        shares = per_symbol(self.shares)
+        cost_basis = per_symbol(lots['cost_basis'])
+        value = per_symbol(lots['value'])
+        daily_pnl = per_symbol(lots['daily_pnl'])
+        value[np.isnan(self.last)] = np.nan
+        daily_pnl[np.isnan(self.last)] = np.nan
+        held = shares > 0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame = pd.DataFrame({
+                'symbol': self.symbols,
+                'shares': shares,
+                'avg_price': cost_basis / shares,
+                'price': self.last,
+                'cost_basis': cost_basis,
+                'value': value,
+                'pnl': value - cost_basis,
+                'pnl_pct': (value / cost_basis - 1) * 100,
+                'daily_pnl': daily_pnl,
+                'weight': value / totals['value'] * 100 if totals['value'] else np.nan,
+            })
+
+        return frame[held].reset_index(drop=True)
+
+    def ladders(self, targets=TARGET_LEVELS, stops=STOP_LEVELS):
+        """Profit-target and stop-loss ladders for every lot at once"""
+        price = self.last[self.codes]
+        return (ladder(self.shares, self.buy_prices, price, targets, 1),
+                ladder(self.shares, self.buy_prices, price, stops, -1))
+
+
+def position_report(symbol, shares, buy_price, current_price, prev_price, portfolio_value):
+    """Text report for one position, sized against the whole portfolio value"""
+    total_cost = shares * buy_price
+    current_value = shares * current_price
+    pnl = current_value - total_cost
+    pnl_pct = (pnl / total_cost) * 100
+
+    # Daily P&L
+    daily_pnl = shares * (current_price - prev_price)
+    daily_pnl_pct = ((current_price / prev_price) - 1) * 100
+
+    # Risk metrics
+    position_size_pct = (current_value / portfolio_value) * 100
+
+    portfolio_report = f"""
+{'='*80}
+PORTFOLIO ANALYSIS
+{'='*80}
+Symbol:                 {symbol}
+Shares Owned:           {shares:,.0f}
+
+{'='*80}
+POSITION DETAILS
+{'='*80}
+Buy Price:              ${buy_price:.2f}
+Current Price:          ${current_price:.2f}
+Price Change:           ${current_price - buy_price:+.2f} ({((current_price/buy_price-1)*100):+.2f}%)
+
+{'='*80}
+PORTFOLIO VALUE
+{'='*80}
+Total Cost Basis:       ${total_cost:,.2f}
+Current Value:          ${current_value:,.2f}
+Unrealized P&L:         ${pnl:+,.2f}
+Return on Investment:   {pnl_pct:+.2f}%
+
+{'='*80}
+DAILY PERFORMANCE
+{'='*80}
+Yesterday's Close:      ${prev_price:.2f}
+Today's Change:         ${current_price - prev_price:+.2f}
+Daily P&L:              ${daily_pnl:+,.2f}
+Daily Return:           {daily_pnl_pct:+.2f}%
+
+{'='*80}
+RISK ANALYSIS
+{'='*80}
+Position Size:          {position_size_pct:.2f}% of portfolio (${portfolio_value:,.2f})
+Risk per Share:         ${current_price - buy_price:.2f}
+
+Breakeven Price:        ${buy_price:.2f}
+Current Distance:       {((current_price/buy_price-1)*100):+.2f}%
+
+{'='*80}
+PROFIT TARGETS
+{'='*80}
+"""
+
+    prices, profits, distances = ladder(shares, buy_price, current_price, TARGET_LEVELS, 1)
+    for target_pct, target_price, target_profit, distance in zip(TARGET_LEVELS, prices[0], profits[0], distances[0]):
+        portfolio_report += f"+{target_pct}% Target:          ${target_price:.2f} (Profit: ${target_profit:,.2f}, Distance: {distance:+.2f}%)\n"
+
+    portfolio_report += f"""
+{'='*80}
+STOP LOSS LEVELS
+{'='*80}
+"""
+
+    prices, losses, distances = ladder(shares, buy_price, current_price, STOP_LEVELS, -1)
+    for stop_pct, stop_price, stop_loss, distance in zip(STOP_LEVELS, prices[0], losses[0], distances[0]):
+        portfolio_report += f"-{stop_pct}% Stop:           ${stop_price:.2f} (Loss: -${stop_loss:,.2f}, Distance: {distance:+.2f}%)\n"
+
+    portfolio_report += f"""
+{'='*80}
+RECOMMENDATION
+{'='*80}
+"""
+
+    if pnl_pct > 20:
+        portfolio_report += "Position is UP significantly. Consider taking partial profits.\n"
+    elif pnl_pct > 10:
+        portfolio_report += "Position is profitable. Consider trailing stop loss.\n"
+    elif pnl_pct > 0:
+        portfolio_report += "Position is slightly profitable. Monitor closely.\n"
+    elif pnl_pct > -5:
+        portfolio_report += "Position is near breakeven. Wait for clearer direction.\n"
+    elif pnl_pct > -10:
+        portfolio_report += "Position is DOWN. Review your thesis and consider stop loss.\n"
+    else:
+        portfolio_report += "Position is significantly DOWN. Consider cutting losses.\n"
+
+    portfolio_report += f"""
+{'='*80}
+"""
+
+    return portfolio_report
@@ -0,0 +1,166 @@
+"""
+Profiling
+Per-stage latency histograms, download byte counts and a Chrome trace of recent calls
+
+Stages are recorded through @timed(name), `with stage(name)` or
+instrument(obj, method, name). While the profiler is disabled (the default)
+a timed call costs one attribute check.
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Upper bounds of the latency histogram buckets, in milliseconds (plus one overflow bucket)
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class StageStats:
+    """Call count, total time, histogram and recent samples of one stage"""
+
+    def __init__(self, name, samples=512):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=samples)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.histogram[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+
+    def summary(self):
+        recent = np.array(self.recent) if self.recent else np.array([np.nan])
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'total_s': self.total,
+            'mean_ms': self.total / self.calls * 1000 if self.calls else np.nan,
+            'p50_ms': float(np.percentile(recent, 50)),
+            'p95_ms': float(np.percentile(recent, 95)),
+            'max_ms': self.max * 1000,
+            'histogram': list(self.histogram),
+        }
+
+
+class Profiler:
+    """Thread-safe collector shared by the UI thread and the fetch workers"""
+
+    def __init__(self, trace_events=20000):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._trace_events = trace_events
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.bytes_downloaded = 0
+            self.requests = 0
+            self.events = deque(maxlen=self._trace_events)
+            self.started = time.perf_counter()
+
+    def record(self, name, start, end):
+        """Add one call of `name` that ran from start to end (perf_counter seconds)"""
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(name)
+            stats.add(end - start)
+            self.events.append((name, start, end, threading.get_ident()))
+
+    def count_bytes(self, size):
+        """Add one download of `size` bytes"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.bytes_downloaded += size
+            self.requests += 1
+
+    def summary(self):
+        """Per-stage summaries, slowest total first"""
+        with self._lock:
+            rows = [stats.summary() for stats in self.stages.values()]
+        return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+    def export_trace(self, path):
+        """Write the recent calls as a Chrome trace (chrome://tracing, ui.perfetto.dev)"""
+        with self._lock:
+            events = list(self.events)
+            started = self.started
+            counters = {'bytes_downloaded': self.bytes_downloaded, 'requests': self.requests}
+
+        pid = os.getpid()
+        threads = {}
+        trace = []
+        for name, start, end, thread in events:
+            tid = threads.setdefault(thread, len(threads))
+            trace.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                          'ts': (start - started) * 1e6, 'dur': (end - start) * 1e6})
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms',
+                       'otherData': dict(counters, stages=self.summary())}, f)
+
+
+profiler = Profiler()
+
+
+def timed(name):
+    """Decorator recording every call of the function as stage `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+class stage:
+    """Context manager recording the block as stage `name`"""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if profiler.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            profiler.record(self.name, self.start, time.perf_counter())
+
+
+def instrument(obj, method, name):
+    """Time an existing object's method, e.g. a canvas's draw, as stage `name`"""
+    setattr(obj, method, timed(name)(getattr(obj, method)))
+
+
+def histogram_labels():
+    """Bucket labels matching StageStats.histogram"""
+    labels = []
+    lower = 0
+    for upper in BUCKETS_MS:
+        labels.append(f"{lower:g}-{upper:g} ms")
+        lower = upper
+    labels.append(f">{lower:g} ms")
+    return labels
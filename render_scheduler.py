@@ -0,0 +1,78 @@
+"""
+Tab render scheduler
+Redraws only the notebook tab on screen and catches the others up when shown or idle
+"""
+
+
+class RenderScheduler:
+    """Dirty flags per notebook tab, flushed on the Tk event loop
+
+    invalidate() marks tabs dirty and schedules one flush; further calls
+    before it runs, including ones made while a render is in progress, only
+    set flags, so a burst of refreshes costs a single redraw. A flush renders
+    the selected tab, and hidden tabs are rendered when they are selected or,
+    one per idle callback, once the data has been quiet for idle_delay ms.
+    """
+
+    def __init__(self, root, notebook, idle_delay=500):
+        self.root = root
+        self.notebook = notebook
+        self.idle_delay = idle_delay
+        self.tabs = {}
+        self.dirty = set()
+        self._flush_job = None
+        self._idle_job = None
+
+        notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+    def register(self, name, frame, render):
+        """Redraw `frame` with render() whenever `name` is dirty and shown"""
+        self.tabs[name] = (str(frame), render)
+
+    def invalidate(self, *names):
+        """Mark tabs (all registered ones by default) as needing a redraw"""
+        self.dirty.update(names or self.tabs)
+        if self._idle_job is not None:
+            self.root.after_cancel(self._idle_job)
+            self._idle_job = None
+        if self._flush_job is None:
+            self._flush_job = self.root.after_idle(self.flush)
+
+    def visible_tab(self):
+        selected = self.notebook.select()
+        for name, (frame, _) in self.tabs.items():
+            if frame == selected:
+                return name
+        return None
+
+    def render(self, name):
+        """Redraw one tab now if it is dirty"""
+        if name not in self.dirty:
+            return
+        self.dirty.discard(name)
+        self.tabs[name][1]()
+
+    def flush(self):
+        self._flush_job = None
+        self.render(self.visible_tab())
+        self._schedule_idle()
+
+    def on_tab_changed(self, event=None):
+        self.render(self.visible_tab())
+
+    # Hidden tabs, one per idle callback so input is handled in between
+    def _schedule_idle(self):
+        if self.dirty and self._idle_job is None:
+            self._idle_job = self.root.after(self.idle_delay, self._render_idle)
+
+    def _render_idle(self):
+        self._idle_job = None
+        if self.dirty:
+            self._idle_job = self.root.after_idle(self._render_next)
+
+    def _render_next(self):
+        self._idle_job = None
+        if self.dirty:
+            self.render(next(name for name in self.tabs if name in self.dirty))
+        if self.dirty:
+            self._idle_job = self.root.after_idle(self._render_next)
@@ -0,0 +1,329 @@
+"""
+Technical analysis reports
+One snapshot of the latest-bar values per symbol, rendered through templates built once at import
+
+    snap = reports.snapshot(df, 'AAPL')
+    reports.render(snap, 'text')
+    reports.export_reports(snaps, 'reports.html', 'html')
+"""
+
+import html
+import json
+import math
+from datetime import datetime
+
+import numpy as np
+
+import analysis
+import risk
+
+RULE = '=' * 80
+
+REPORT_FORMATS = ('text', 'html', 'json')
+FILE_EXTENSIONS = {'text': 'txt', 'html': 'html', 'json': 'json'}
+
+DISCLAIMER = """This analysis is for informational purposes only and should not be considered
+as financial advice. Always do your own research and consult with a qualified
+financial advisor before making investment decisions."""
+
+# (title, lines) per section; a line is (label, format of snapshot fields) or
+# None for a blank line. TRADING SIGNALS and DISCLAIMER are free text.
+REPORT_SECTIONS = [
+    ('PRICE ACTION', [
+        ('Current Price', '${close:.2f}'),
+        ('Previous Close', '${prev_close:.2f}'),
+        ('Change', '${change:+.2f}'),
+        ('Change %', '{change_pct:+.2f}%'),
+        None,
+        ('High (Today)', '${high:.2f}'),
+        ('Low (Today)', '${low:.2f}'),
+        ('Volume', '{volume:,.0f}'),
+    ]),
+    ('MOVING AVERAGES', [
+        ('SMA 20', '${sma_20:.2f}'),
+        ('SMA 50', '${sma_50:.2f}'),
+        ('SMA 200', '${sma_200:.2f}'),
+        None,
+        ('EMA 12', '${ema_12:.2f}'),
+        ('EMA 26', '${ema_26:.2f}'),
+        None,
+        None,
+        ('Trend Signal', '{trend}'),
+        ('Price vs SMA20', '{vs_sma_20} ({sma_20_distance:+.2f}%)'),
+        ('Price vs SMA50', '{vs_sma_50} ({sma_50_distance:+.2f}%)'),
+        ('Price vs SMA200', '{vs_sma_200} ({sma_200_distance:+.2f}%)'),
+    ]),
+    ('MOMENTUM INDICATORS', [
+        None,
+        ('RSI (14)', '{rsi:.2f}'),
+        ('RSI Signal', '{rsi_signal}'),
+        None,
+        None,
+        ('MACD', '{macd:.4f}'),
+        ('MACD Signal', '{macd_signal:.4f}'),
+        ('MACD Histogram', '{macd_hist:.4f}'),
+        ('MACD Signal', '{macd_trend} ({macd_action})'),
+        None,
+        None,
+        ('Stochastic %K', '{stoch_k:.2f}'),
+        ('Stochastic %D', '{stoch_d:.2f}'),
+        ('Stochastic Signal', '{stoch_signal}'),
+    ]),
+    ('VOLATILITY', [
+        ('ATR (14)', '${atr:.2f}'),
+        ('BB Upper', '${bb_upper:.2f}'),
+        ('BB Middle', '${bb_middle:.2f}'),
+        ('BB Lower', '${bb_lower:.2f}'),
+        ('BB Width', '${bb_width:.2f}'),
+        None,
+        None,
+        ('Daily Volatility', '{daily_volatility:.2f}%'),
+        ('Annual Volatility', '{annual_volatility:.2f}%'),
+    ]),
+    ('SUPPORT & RESISTANCE LEVELS', [
+        None,
+        ('Pivot Point', '${pivot:.2f}'),
+        None,
+        ('Resistance 3', '${r3:.2f}'),
+        ('Resistance 2', '${r2:.2f}'),
+        ('Resistance 1', '${r1:.2f}'),
+        None,
+        ('Support 1', '${s1:.2f}'),
+        ('Support 2', '${s2:.2f}'),
+        ('Support 3', '${s3:.2f}'),
+    ]),
+    ('TRADING SIGNALS', '{signals}'),
+    ('RISK METRICS', [
+        None,
+        ('Total Return', '{total_return:+.2f}%'),
+        ('Max Drawdown', '{max_drawdown:.2f}%'),
+        ('Sharpe Ratio', '{sharpe:.2f}'),
+        ('Best Day', '{best_day:+.2f}%'),
+        ('Worst Day', '{worst_day:+.2f}%'),
+    ]),
+    ('RECOMMENDATION', [
+        None,
+        ('Overall Rating', '{rating}'),
+        ('Bullish Signals', '{bullish_signals}/5'),
+        ('Bearish Signals', '{bearish_signals}/5'),
+    ]),
+    ('DISCLAIMER', DISCLAIMER),
+]
+
+# Snapshot fields read from the last bar of the indicator frame
+LAST_BAR_COLUMNS = {
+    'close': 'Close', 'high': 'High', 'low': 'Low', 'volume': 'Volume',
+    'sma_20': 'SMA_20', 'sma_50': 'SMA_50', 'sma_200': 'SMA_200',
+    'ema_12': 'EMA_12', 'ema_26': 'EMA_26',
+    'rsi': 'RSI', 'macd': 'MACD', 'macd_signal': 'MACD_Signal', 'macd_hist': 'MACD_Hist',
+    'stoch_k': 'Stoch_K', 'stoch_d': 'Stoch_D', 'atr': 'ATR',
+    'bb_upper': 'BB_Upper', 'bb_middle': 'BB_Middle', 'bb_lower': 'BB_Lower',
+}
+
+
+def snapshot(df, symbol, generated=None):
+    """Every value the report shows, computed once from an indicator DataFrame
+
+    Values are plain Python floats, ints and strings, so a snapshot pickles
+    cheaply between processes and renders to any format without the frame.
+    """
+    # One row read instead of a lookup per column
+    last = dict(zip(df.columns, df.iloc[-1].tolist()))
+    snap = {'symbol': symbol,
+            'generated': generated or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'date': str(last['Date']),
+            'bars': len(df)}
+    for key, column in LAST_BAR_COLUMNS.items():
+        snap[key] = float(last[column])
+
+    closes = df['Close'].to_numpy(dtype=np.float64)
+    close = snap['close']
+    prev_close = float(closes[-2])
+    snap.update(prev_close=prev_close, change=close - prev_close,
+                change_pct=(close / prev_close - 1) * 100, bb_width=snap['bb_upper'] - snap['bb_lower'])
+
+    # Trend
+    sma20, sma50, sma200 = snap['sma_20'], snap['sma_50'], snap['sma_200']
+    snap['trend'] = "BULLISH" if close > sma20 > sma50 > sma200 else \
+                    "BEARISH" if close < sma20 < sma50 < sma200 else "NEUTRAL"
+    for key in ('sma_20', 'sma_50', 'sma_200'):
+        snap[f'vs_{key}'] = 'ABOVE' if close > snap[key] else 'BELOW'
+        snap[f'{key}_distance'] = (close / snap[key] - 1) * 100
+
+    # Momentum
+    rsi, macd, macd_signal, stoch_k = snap['rsi'], snap['macd'], snap['macd_signal'], snap['stoch_k']
+    snap['rsi_signal'] = "OVERBOUGHT (>70)" if rsi > 70 else "OVERSOLD (<30)" if rsi < 30 else "NEUTRAL"
+    snap['macd_trend'] = "BULLISH" if macd > macd_signal else "BEARISH"
+    snap['macd_action'] = 'BUY' if macd > macd_signal else 'SELL'
+    snap['stoch_signal'] = "OVERBOUGHT (>80)" if stoch_k > 80 else "OVERSOLD (<20)" if stoch_k < 20 else "NEUTRAL"
+
+    # Return statistics, each computed once
+    all_returns = df['Returns'].to_numpy(dtype=np.float64)
+    returns = all_returns[~np.isnan(all_returns)]
+    if len(returns):
+        mean = float(returns.mean())
+        daily_vol = float(returns.std(ddof=1)) if len(returns) > 1 else math.nan
+        best_day, worst_day = float(returns.max()), float(returns.min())
+    else:
+        mean = daily_vol = best_day = worst_day = math.nan
+    snap.update(
+        daily_volatility=daily_vol * 100,
+        annual_volatility=daily_vol * math.sqrt(252) * 100,
+        total_return=(close / float(closes[0]) - 1) * 100,
+        max_drawdown=float(risk.drawdowns(all_returns).min()) * 100,
+        sharpe=mean / daily_vol * math.sqrt(252) if daily_vol != 0 else 0.0,
+        best_day=best_day * 100,
+        worst_day=worst_day * 100,
+    )
+
+    # Pivot points
+    high, low = snap['high'], snap['low']
+    pivot = (high + low + close) / 3
+    snap.update(pivot=pivot,
+                r1=2 * pivot - low, r2=pivot + (high - low), r3=high + 2 * (pivot - low),
+                s1=2 * pivot - high, s2=pivot - (high - low), s3=low - 2 * (high - pivot))
+
+    snap['signals'] = trading_signals(snap)
+    bullish_signals, bearish_signals = analysis.count_signals(
+        close, sma20, rsi, macd, macd_signal, stoch_k, snap['bb_lower'], snap['bb_upper'])
+    snap.update(bullish_signals=int(bullish_signals), bearish_signals=int(bearish_signals),
+                rating=analysis.rating(bullish_signals, bearish_signals))
+
+    return snap
+
+
+def trading_signals(snap):
+    """Signal lines for the TRADING SIGNALS section"""
+    close, sma20, sma50 = snap['close'], snap['sma_20'], snap['sma_50']
+    rsi, macd, macd_signal, macd_hist = snap['rsi'], snap['macd'], snap['macd_signal'], snap['macd_hist']
+    stoch_k = snap['stoch_k']
+    signals = []
+
+    if rsi < 30:
+        signals.append("✓ RSI indicates OVERSOLD - Potential BUY signal")
+    elif rsi > 70:
+        signals.append("✗ RSI indicates OVERBOUGHT - Potential SELL signal")
+
+    if macd > macd_signal and macd_hist > 0:
+        signals.append("✓ MACD Bullish Crossover - BUY signal")
+    elif macd < macd_signal and macd_hist < 0:
+        signals.append("✗ MACD Bearish Crossover - SELL signal")
+
+    if close > sma20 and sma20 > sma50:
+        signals.append("✓ Price above SMA20 and SMA50 - Bullish trend")
+    elif close < sma20 and sma20 < sma50:
+        signals.append("✗ Price below SMA20 and SMA50 - Bearish trend")
+
+    if stoch_k < 20:
+        signals.append("✓ Stochastic OVERSOLD - Potential reversal UP")
+    elif stoch_k > 80:
+        signals.append("✗ Stochastic OVERBOUGHT - Potential reversal DOWN")
+
+    if close <= snap['bb_lower']:
+        signals.append("✓ Price at Lower Bollinger Band - Potential BUY")
+    elif close >= snap['bb_upper']:
+        signals.append("✗ Price at Upper Bollinger Band - Potential SELL")
+
+    return signals
+
+
+# Templates, built once from REPORT_SECTIONS
+def _escape_braces(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def _text_template():
+    parts = [f"\n{RULE}\nTECHNICAL ANALYSIS REPORT - {{symbol}}\n{RULE}\nGenerated: {{generated}}\n"]
+    for title, lines in REPORT_SECTIONS:
+        parts.append(f"\n{RULE}\n{_escape_braces(title)}\n{RULE}\n")
+        if isinstance(lines, str):
+            body = lines if lines == '{signals}' else _escape_braces(lines)
+            parts.append(body + "\n")
+            continue
+        for line in lines:
+            parts.append("\n" if line is None else f"{line[0] + ':':<20}{line[1]}\n")
+    parts.append(f"\n{RULE}\n")
+    return ''.join(parts)
+
+
+def _html_template():
+    parts = ['<section class="report">\n<h1>Technical Analysis Report - {symbol}</h1>\n'
+             '<p class="generated">Generated: {generated}</p>\n']
+    for title, lines in REPORT_SECTIONS:
+        parts.append(f'<h2>{_escape_braces(html.escape(title.title()))}</h2>\n')
+        if isinstance(lines, str):
+            body = lines if lines == '{signals}' else _escape_braces(html.escape(lines))
+            parts.append(f'<ul>{body}</ul>\n' if lines == '{signals}' else f'<p>{body}</p>\n')
+            continue
+        parts.append('<table>\n')
+        for line in lines:
+            if line is not None:
+                parts.append(f'<tr><th>{_escape_braces(html.escape(line[0]))}</th><td>{line[1]}</td></tr>\n')
+        parts.append('</table>\n')
+    parts.append('</section>\n')
+    return ''.join(parts)
+
+
+TEXT_TEMPLATE = _text_template()
+HTML_TEMPLATE = _html_template()
+
+HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Technical Analysis Reports</title>
+<style>
+body { font-family: Arial, sans-serif; background: #0a0e27; color: #e0e0e0; }
+h1, h2 { color: #00ff88; }
+th { text-align: left; padding-right: 2em; font-weight: normal; color: #a0a0a0; }
+.report { border-bottom: 1px solid #2e3350; padding-bottom: 1em; }
+</style>
+</head>
+<body>
+"""
+
+HTML_PAGE_END = "</body>\n</html>\n"
+
+
+def render_text(snap):
+    """Plain-text report, the same layout as the Technical Analysis tab"""
+    return TEXT_TEMPLATE.format_map(dict(snap, signals=''.join(f"{s}\n" for s in snap['signals']).rstrip('\n')))
+
+
+def render_html(snap):
+    """HTML fragment (one <section>) for the report"""
+    fields = {key: html.escape(value) if isinstance(value, str) else value for key, value in snap.items()}
+    fields['signals'] = ''.join(f"<li>{html.escape(s)}</li>" for s in snap['signals'])
+    return HTML_TEMPLATE.format_map(fields)
+
+
+def to_record(snap):
+    """JSON-safe copy of a snapshot (NaN becomes null)"""
+    return {key: None if isinstance(value, float) and math.isnan(value) else value
+            for key, value in snap.items()}
+
+
+def render(snap, fmt='text'):
+    """One report as text, a standalone HTML page or a JSON object"""
+    if fmt == 'text':
+        return render_text(snap)
+    elif fmt == 'html':
+        return HTML_PAGE + render_html(snap) + HTML_PAGE_END
+    elif fmt == 'json':
+        return json.dumps(to_record(snap), ensure_ascii=False, indent=2)
+    raise ValueError(f"Unknown report format: {fmt}")
+
+
+def export_reports(snapshots, path, fmt='text'):
+    """Write many reports to one file: concatenated text, one HTML page or a JSON array"""
+    with open(path, 'w', encoding='utf-8') as f:
+        if fmt == 'text':
+            f.writelines(map(render_text, snapshots))
+        elif fmt == 'html':
+            f.write(HTML_PAGE)
+            f.writelines(map(render_html, snapshots))
+            f.write(HTML_PAGE_END)
+        elif fmt == 'json':
+            json.dump([to_record(snap) for snap in snapshots], f, ensure_ascii=False, indent=2)
+        else:
+            raise ValueError(f"Unknown report format: {fmt}")
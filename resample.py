@@ -0,0 +1,108 @@
+"""
+Timeframe resampling
+Coarser OHLCV bars derived locally from a finer download
+
+    hourly = resample(five_minute_df, "1h")
+"""
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Intraday bar lengths; these bins are laid out from each day's first bar
+INTRADAY_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800,
+    "60m": 3600, "90m": 5400, "1h": 3600
+}
+
+# Calendar bars, finest first; each can be built from any finer interval
+CALENDAR_INTERVALS = ["1d", "1wk", "1mo", "3mo"]
+
+# Most days a period may start before a base download's first bar (weekend plus holiday)
+COVERAGE_SLACK = np.timedelta64(4, 'D')
+
+
+def interval_rank(interval):
+    """Sort key from finest to coarsest interval"""
+    if interval in INTRADAY_SECONDS:
+        return INTRADAY_SECONDS[interval]
+    return 86400 * (1 + CALENDAR_INTERVALS.index(interval))
+
+
+def can_resample(base, interval):
+    """True when bars of `interval` can be built exactly from bars of `base`"""
+    if base == interval:
+        return True
+    if base in INTRADAY_SECONDS:
+        if interval in INTRADAY_SECONDS:
+            return INTRADAY_SECONDS[interval] > INTRADAY_SECONDS[base] and \
+                INTRADAY_SECONDS[interval] % INTRADAY_SECONDS[base] == 0
+        return interval in CALENDAR_INTERVALS
+    if base == "1d":
+        return interval in CALENDAR_INTERVALS[1:]
+    # Weeks do not split into months; months group into quarters
+    return base == "1mo" and interval == "3mo"
+
+
+def covers(df, start):
+    """True when a frame's first bar is close enough to a period's start datetime"""
+    return len(df) > 0 and df['Date'].iloc[0] <= np.datetime64(start, 'us') + COVERAGE_SLACK
+
+
+def bin_keys(dates, interval):
+    """Bin label of each bar: the bin's start for intraday bins, the bin's period for calendar ones"""
+    dates = np.asarray(dates, dtype='datetime64[s]')
+    if interval in INTRADAY_SECONDS:
+        seconds = dates.astype(np.int64)
+        days = seconds // 86400
+        # Bins follow the session: hourly bars from a 9:30 open start at 9:30,
+        # 10:30, ... The open is the usual time of each day's first bar, so a
+        # day missing its first minute keeps the same grid
+        opens = seconds[np.flatnonzero(np.diff(days, prepend=days[0] - 1))] % 86400
+        times, counts = np.unique(opens, return_counts=True)
+        anchor = days * 86400 + times[np.argmax(counts)]
+        step = INTRADAY_SECONDS[interval]
+        return anchor + (seconds - anchor) // step * step
+
+    days = dates.astype('datetime64[D]')
+    if interval == "1d":
+        return days.astype(np.int64)
+    if interval == "1wk":
+        # datetime64 day 0 is a Thursday; weeks start on Monday
+        return (days.astype(np.int64) + 3) // 7
+    months = days.astype('datetime64[M]').astype(np.int64)
+    return months if interval == "1mo" else months // 3
+
+
+def resample(df, interval):
+    """OHLCV frame of `interval` bars from a finer frame sorted by Date
+
+    Open is the first bar's, High the max, Low the min, Close the last bar's
+    and Volume the sum. Intraday bars are labelled with their bin start,
+    calendar bars with their first bar's time, so daily bars built from
+    intraday ones carry the session open like downloaded daily bars do.
+    The last bar may still be forming, as in a download.
+    """
+    if not len(df):
+        return df[['Date'] + OHLCV_COLUMNS].copy()
+
+    dates = df['Date'].to_numpy(dtype='datetime64[us]')
+    keys = bin_keys(dates, interval)
+    starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+    ends = np.append(starts[1:], len(keys)) - 1
+
+    if interval in INTRADAY_SECONDS:
+        labels = keys[starts].astype('datetime64[s]').astype('datetime64[us]')
+    else:
+        labels = dates[starts]
+
+    volume = np.nan_to_num(df['Volume'].to_numpy(dtype=np.float64))
+    return pd.DataFrame({
+        'Date': labels,
+        'Open': df['Open'].to_numpy(dtype=np.float64)[starts],
+        'High': np.fmax.reduceat(df['High'].to_numpy(dtype=np.float64), starts),
+        'Low': np.fmin.reduceat(df['Low'].to_numpy(dtype=np.float64), starts),
+        'Close': df['Close'].to_numpy(dtype=np.float64)[ends],
+        'Volume': np.add.reduceat(volume, starts),
+    })
@@ -0,0 +1,188 @@
+"""
+Risk analytics
+Aligned multi-symbol returns, rolling covariance/correlation, VaR/CVaR and drawdowns
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def align_returns(frames, unit='D'):
+    """Align per-symbol close-to-close returns on a common date index
+
+    frames maps symbol -> DataFrame (or CompactBars) with Date and Close. Dates are
+    truncated to `unit` (calendar days by default) so exchanges stamping their
+    daily bars at different times still line up. Returns (dates, symbols,
+    matrix) where matrix is (dates, symbols) with NaN where a symbol has no bar.
+    """
+    symbols = list(frames)
+    dates = [np.asarray(frames[s]['Date']).astype(f'datetime64[{unit}]') for s in symbols]
+    index = np.unique(np.concatenate(dates)) if dates else np.array([], dtype=f'datetime64[{unit}]')
+
+    matrix = np.full((len(index), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        close = np.asarray(frames[symbol]['Close'], dtype=np.float64)
+        if len(close) < 2:
+            continue
+        rows = np.searchsorted(index, dates[j][1:])
+        matrix[rows, j] = close[1:] / close[:-1] - 1
+
+    # The earliest date only ever has the first bar of a series, never a return
+    return index[1:], symbols, matrix[1:]
+
+
+def _pairwise_covariance(centered, present):
+    """Covariance of (..., symbols, observations) rows over the observations both rows have
+
+    Each pair is centred on its own means over the shared observations, as
+    DataFrame.cov does. `centered` has missing values as 0; centring every
+    row on its overall mean beforehand only keeps the sums small.
+    """
+    counts = present @ np.swapaxes(present, -1, -2)
+    sums = centered @ np.swapaxes(present, -1, -2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        products = centered @ np.swapaxes(centered, -1, -2) - sums * np.swapaxes(sums, -1, -2) / counts
+        cov = products / (counts - 1)
+    return cov, counts
+
+
+def covariance(returns, min_periods=2):
+    """Pairwise covariance of the columns, using every date both columns have"""
+    present = ~np.isnan(returns)
+    centered = np.where(present, returns - np.nanmean(returns, axis=0), 0.0)
+    cov, counts = _pairwise_covariance(centered.T, present.T.astype(np.float64))
+    cov[counts < min_periods] = np.nan
+    return cov
+
+
+def rolling_covariance(returns, window=63, step=1):
+    """Covariance matrices of each trailing window, every `step` bars
+
+    Returns a (windows, symbols, symbols) array computed with one batched
+    matrix product; the last entry is the window ending at the latest bar.
+    """
+    if len(returns) < window:
+        return np.empty((0, returns.shape[1], returns.shape[1]))
+
+    # (windows, symbols, window) views, newest window last
+    windows = sliding_window_view(returns, window, axis=0)[::-1][::step][::-1]
+    present = ~np.isnan(windows)
+    means = np.nanmean(windows, axis=2, keepdims=True)
+    centered = np.where(present, windows - means, 0.0)
+
+    cov, counts = _pairwise_covariance(centered, present.astype(np.float64))
+    cov[counts < 2] = np.nan
+    return cov
+
+
+def correlation(cov):
+    """Correlation matrix (or stack of matrices) from covariance"""
+    std = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / (std[..., :, None] * std[..., None, :])
+    # Pairwise covariances over partly missing data can overshoot slightly
+    return np.clip(corr, -1, 1)
+
+
+def portfolio_returns(returns, weights):
+    """Weighted return per date; a symbol without a bar that date contributes 0"""
+    return np.nan_to_num(returns) @ np.asarray(weights, dtype=np.float64)
+
+
+def historical_var(returns, confidence=0.95):
+    """Historical VaR and CVaR per column, as positive loss fractions"""
+    quantile = np.nanquantile(returns, 1 - confidence, axis=0)
+    tail = np.where(returns <= quantile, returns, np.nan)
+    with np.errstate(invalid='ignore'):
+        return -quantile, -np.nanmean(tail, axis=0)
+
+
+def parametric_var(returns, confidence=0.95):
+    """Gaussian (variance-covariance) VaR and CVaR per column, as positive loss fractions"""
+    mean = np.nanmean(returns, axis=0)
+    std = np.nanstd(returns, axis=0, ddof=1)
+    z = NormalDist().inv_cdf(1 - confidence)
+    tail_density = NormalDist().pdf(z) / (1 - confidence)
+    return -(mean + z * std), -(mean - std * tail_density)
+
+
+def drawdowns(returns):
+    """Running peak-to-trough drawdown of the compounded returns, per column"""
+    equity = np.cumprod(1 + np.nan_to_num(returns), axis=0)
+    peak = np.maximum.accumulate(equity, axis=0)
+    return equity / peak - 1
+
+
+def max_drawdown(returns):
+    """Deepest drawdown and its (peak, trough) row positions per column"""
+    returns = np.asarray(returns, dtype=np.float64)
+    single = returns.ndim == 1
+    if single:
+        returns = returns[:, None]
+
+    dd = drawdowns(returns)
+    trough = np.argmin(dd, axis=0)
+
+    # Row of the running peak at every point, read at each trough
+    equity = np.cumprod(1 + np.nan_to_num(returns), axis=0)
+    at_peak = equity >= np.maximum.accumulate(equity, axis=0)
+    rows = np.arange(len(returns))[:, None]
+    peak_rows = np.maximum.accumulate(np.where(at_peak, rows, 0), axis=0)
+    peak = peak_rows[trough, np.arange(returns.shape[1])]
+
+    depth = dd[trough, np.arange(returns.shape[1])]
+    if single:
+        return depth[0], peak[0], trough[0]
+    return depth, peak, trough
+
+
+def risk_report(frames, weights=None, confidence=0.95, window=63, periods_per_year=252):
+    """Risk statistics for every symbol and for the weighted portfolio
+
+    weights maps symbol -> weight (normalized here); equal weights when None.
+    """
+    dates, symbols, returns = align_returns(frames)
+    if weights is None:
+        w = np.full(len(symbols), 1.0 / len(symbols)) if symbols else np.empty(0)
+    else:
+        w = np.array([weights.get(s, 0.0) for s in symbols], dtype=np.float64)
+        w = w / w.sum() if w.sum() else w
+
+    book = portfolio_returns(returns, w)
+    combined = np.column_stack([returns, book])
+
+    mean = np.nanmean(combined, axis=0)
+    std = np.nanstd(combined, axis=0, ddof=1)
+    hist_var, hist_cvar = historical_var(combined, confidence)
+    param_var, param_cvar = parametric_var(combined, confidence)
+    depth, peak, trough = max_drawdown(combined)
+
+    cov = covariance(returns)
+    rolling = rolling_covariance(returns, window, step=window)
+    latest = rolling[-1] if len(rolling) else cov
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+
+    return {
+        'dates': dates,
+        'symbols': symbols + ['PORTFOLIO'],
+        'weights': np.append(w, w.sum()),
+        'observations': np.append(np.count_nonzero(~np.isnan(returns), axis=0), len(book)),
+        'annual_volatility': std * np.sqrt(periods_per_year),
+        'sharpe': sharpe,
+        'historical_var': hist_var,
+        'historical_cvar': hist_cvar,
+        'parametric_var': param_var,
+        'parametric_cvar': param_cvar,
+        'max_drawdown': depth,
+        'drawdown_peak': dates[peak] if len(dates) else peak,
+        'drawdown_trough': dates[trough] if len(dates) else trough,
+        'covariance': cov,
+        'correlation': correlation(latest),
+        'portfolio_volatility': np.sqrt(w @ np.nan_to_num(cov) @ w * periods_per_year),
+        'confidence': confidence,
+        'window': window,
+    }
@@ -0,0 +1,365 @@
+"""
+Technical screener
+Filter expressions evaluated over the cached bars of a whole universe at once
+
+    python screener.py "RSI < 30 and Close < BB_Lower and Close > SMA_200"
+    python screener.py "MACD > MACD_Signal and MACD[1] <= MACD_Signal[1]" --interval 1h
+"""
+
+import argparse
+import ast
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import market_data
+from bar_store import DEFAULT_PATH as CACHE_PATH, BarStore
+from indicators import INDICATOR_COLUMNS
+from profiling import timed
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Columns shown for every match, ahead of the ones the expression uses
+RESULT_COLUMNS = ['Close', 'Returns', 'RSI', 'Volume']
+
+# Symbols per block; blocks are screened in parallel
+CHUNK_SIZE = 256
+
+_COMPARE = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal
+}
+_BINARY = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+    ast.Div: np.true_divide, ast.Pow: np.power
+}
+_FUNCTIONS = {'abs': np.abs, 'min': np.fmin, 'max': np.fmax}
+
+# Arguments taken by each function: abs exactly one, min/max two or more
+_ARITY = {'abs': (1, 1), 'min': (2, None), 'max': (2, None)}
+
+
+class Expression:
+    """A parsed filter such as `RSI < 30 and Close > SMA_200`
+
+    Names are bar columns (OHLCV and indicators) at each symbol's last bar;
+    NAME[n] is the value n bars earlier. and/or/not, comparisons (chained
+    too), + - * / **, abs(), min() and max() are supported. Anything else is
+    rejected, so expressions typed into the UI are never executed as code.
+    A comparison involving a missing value is False.
+    """
+
+    def __init__(self, text):
+        self.text = text.strip()
+        try:
+            self.tree = ast.parse(self.text, mode='eval').body
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e.msg}") from None
+
+        self.names = []
+        self.lookback = 0
+        self._check(self.tree)
+
+    def _check(self, node):
+        if isinstance(node, ast.Name):
+            if node.id not in OHLCV_COLUMNS and node.id not in INDICATOR_COLUMNS:
+                raise ValueError(f"Unknown column: {node.id}")
+            if node.id not in self.names:
+                self.names.append(node.id)
+        elif isinstance(node, ast.Subscript):
+            lag = node.slice
+            if not (isinstance(node.value, ast.Name) and isinstance(lag, ast.Constant)
+                    and type(lag.value) is int and lag.value >= 0):
+                raise ValueError("Only COLUMN[bars ago] subscripts are supported")
+            self.lookback = max(self.lookback, lag.value)
+            self._check(node.value)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported function: {ast.unparse(node.func)}")
+            low, high = _ARITY[node.func.id]
+            if len(node.args) < low or (high is not None and len(node.args) > high):
+                expected = f"{low}" if low == high else f"at least {low}"
+                raise ValueError(f"{node.func.id}() takes {expected} argument{'s' if low > 1 else ''}, "
+                                 f"got {len(node.args)}")
+            for arg in node.args:
+                self._check(arg)
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ValueError(f"Unsupported constant: {node.value!r}")
+        elif isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self._check(value)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub, ast.UAdd)):
+            self._check(node.operand)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+            for value in [node.left] + node.comparators:
+                self._check(value)
+        else:
+            raise ValueError(f"Unsupported syntax: {ast.unparse(node)}")
+
+    def evaluate(self, value):
+        """Boolean array of matches; value(name, lag) returns one float per symbol"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.asarray(self._eval(self.tree, value), dtype=bool)
+
+    def _eval(self, node, value):
+        if isinstance(node, ast.Name):
+            return value(node.id, 0)
+        if isinstance(node, ast.Subscript):
+            return value(node.value.id, node.slice.value)
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Call):
+            function = _FUNCTIONS[node.func.id]
+            args = [self._eval(arg, value) for arg in node.args]
+            # The ufuncs take two operands (a third would be `out`): fold longer min/max calls
+            return function(args[0]) if len(args) == 1 else functools.reduce(function, args)
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = self._eval(node.values[0], value)
+            for operand in node.values[1:]:
+                result = combine(result, self._eval(operand, value))
+            return result
+        if isinstance(node, ast.UnaryOp):
+            operand = self._eval(node.operand, value)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.BinOp):
+            return _BINARY[type(node.op)](self._eval(node.left, value), self._eval(node.right, value))
+
+        # Chained comparison: a < b < c is a < b and b < c
+        left = self._eval(node.left, value)
+        result = True
+        for op, comparator in zip(node.ops, node.comparators):
+            right = self._eval(comparator, value)
+            result = np.logical_and(result, _COMPARE[type(op)](left, right))
+            left = right
+        return result
+
+
+def _shift(values, periods=1):
+    shifted = np.full_like(values, np.nan)
+    shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def _rolling_mean(values, window):
+    """Mean over the last `window` rows of each column, NaN unless all of them are valid"""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    return np.where(counts == window, sums / window, np.nan)
+
+
+def _rolling(values, window, reduce, **kwargs):
+    """reduce() over sliding windows down each column (NaN if the window holds one)"""
+    result = np.full_like(values, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        result[window - 1:] = reduce(windows, axis=-1, **kwargs)
+    return result
+
+
+def _ewm(values, span):
+    """ewm(span, adjust=False).mean() down each column, starting at each column's first value"""
+    alpha = 2 / (span + 1)
+    result = np.empty_like(values)
+    previous = np.full(values.shape[1:], np.nan)
+    for i, row in enumerate(values):
+        blended = (1 - alpha) * previous + alpha * row
+        previous = np.where(np.isnan(previous), row, np.where(np.isnan(row), previous, blended))
+        result[i] = previous
+    return result
+
+
+class StackedBars:
+    """OHLCV of many symbols as (bars, symbols) arrays, aligned on each symbol's last bar
+
+    Shorter histories are padded with NaN at the start, so row -1 is every
+    symbol's latest bar. Indicators are computed for all symbols at once,
+    with NumPy kernels working down the bar axis, the first time they are read.
+    """
+
+    def __init__(self, symbols, series):
+        self.symbols = list(symbols)
+        length = max((len(series[symbol][0]) for symbol in self.symbols), default=0)
+
+        block = np.full((len(OHLCV_COLUMNS), length, len(self.symbols)), np.nan)
+        self.last_timestamps = np.zeros(len(self.symbols), dtype=np.int64)
+        self.bars = np.zeros(len(self.symbols), dtype=np.int64)
+        for j, symbol in enumerate(self.symbols):
+            timestamps, values = series[symbol]
+            if len(timestamps):
+                block[:, length - len(timestamps):, j] = values
+                self.last_timestamps[j] = timestamps[-1]
+            self.bars[j] = len(timestamps)
+
+        self.columns = dict(zip(OHLCV_COLUMNS, block))
+
+    def __getitem__(self, name):
+        if name not in self.columns:
+            if name not in INDICATOR_COLUMNS:
+                raise KeyError(name)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._compute(name)
+        return self.columns[name]
+
+    def at(self, name, lag=0):
+        """Each symbol's value `lag` bars before its last bar"""
+        values = self[name]
+        if lag >= len(values):
+            return np.full(len(self.symbols), np.nan)
+        return values[-1 - lag]
+
+    # Same formulas as indicators.calculate_indicators, one column per symbol
+    def _compute(self, name):
+        close = self['Close']
+
+        if name in ('SMA_20', 'SMA_50', 'SMA_200'):
+            self.columns[name] = _rolling_mean(close, int(name[4:]))
+
+        elif name in ('EMA_12', 'EMA_26'):
+            self.columns[name] = _ewm(close, int(name[4:]))
+
+        elif name in ('MACD', 'MACD_Signal', 'MACD_Hist'):
+            macd = self['EMA_12'] - self['EMA_26']
+            signal = _ewm(macd, 9)
+            self.columns.update(MACD=macd, MACD_Signal=signal, MACD_Hist=macd - signal)
+
+        elif name == 'RSI':
+            # The first bar of each symbol counts as no change, padding stays missing
+            delta = close - _shift(close)
+            padding = np.isnan(close)
+            gain = _rolling_mean(np.where(padding, np.nan, np.where(delta > 0, delta, 0)), 14)
+            loss = _rolling_mean(np.where(padding, np.nan, np.where(delta < 0, -delta, 0)), 14)
+            self.columns['RSI'] = 100 - (100 / (1 + gain / loss))
+
+        elif name in ('BB_Middle', 'BB_Upper', 'BB_Lower'):
+            middle = self['SMA_20']
+            bb_std = _rolling(close, 20, np.std, ddof=1)
+            self.columns.update(BB_Middle=middle, BB_Upper=middle + (bb_std * 2),
+                                BB_Lower=middle - (bb_std * 2))
+
+        elif name == 'ATR':
+            high = self['High']
+            low = self['Low']
+            prev_close = _shift(close)
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            self.columns['ATR'] = _rolling_mean(true_range, 14)
+
+        elif name in ('Stoch_K', 'Stoch_D'):
+            low_14 = _rolling(self['Low'], 14, np.min)
+            high_14 = _rolling(self['High'], 14, np.max)
+            stoch_k = 100 * ((close - low_14) / (high_14 - low_14))
+            self.columns.update(Stoch_K=stoch_k, Stoch_D=_rolling_mean(stoch_k, 3))
+
+        elif name == 'OBV':
+            # Padding rows count as no change, like the first bar of a history
+            flow = np.sign(close - _shift(close)) * self['Volume']
+            self.columns['OBV'] = np.cumsum(np.nan_to_num(flow, nan=0.0), axis=0)
+
+        elif name == 'Returns':
+            self.columns['Returns'] = close / _shift(close) - 1
+
+
+def result_columns(expression):
+    return list(dict.fromkeys(RESULT_COLUMNS + expression.names))
+
+
+def screen_block(symbols, series, expression):
+    """Matches among one block of symbols, as a DataFrame with one row per match"""
+    bars = StackedBars(symbols, series)
+    matches = expression.evaluate(bars.at) & (bars.bars > expression.lookback)
+    index = np.flatnonzero(matches)
+
+    rows = {'Symbol': [bars.symbols[i] for i in index],
+            'Date': market_data.local_datetimes(bars.last_timestamps[index])}
+    for name in result_columns(expression):
+        rows[name] = bars.at(name)[index]
+    return pd.DataFrame(rows)
+
+
+@timed('screen')
+def screen(series, expression, workers=None):
+    """Screen {symbol: (timestamps, (5, n) OHLCV block)} with an Expression (or its text)
+
+    Symbols are stacked into blocks of CHUNK_SIZE and the blocks are
+    screened on a thread pool; the NumPy kernels release the GIL, so the
+    blocks run on separate cores. Returns the matches sorted by symbol.
+    """
+    if isinstance(expression, str):
+        expression = Expression(expression)
+
+    symbols = sorted(series)
+    chunks = [symbols[i:i + CHUNK_SIZE] for i in range(0, len(symbols), CHUNK_SIZE)]
+    columns = ['Symbol', 'Date'] + result_columns(expression)
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        frames = [screen_block(chunk, series, expression) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            frames = list(pool.map(lambda chunk: screen_block(chunk, series, expression), chunks))
+
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def load_universe(store, period="1y", interval="1d", symbols=None):
+    """{symbol: (timestamps, block)} of the cached bars covering a period"""
+    start_date, _ = market_data.period_range(period)
+    return store.load_many(interval, int(start_date.timestamp()), symbols)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen the cached bars of many symbols with a filter expression")
+    parser.add_argument('expression', help="e.g. \"RSI < 30 and Close < BB_Lower and Close > SMA_200\"")
+    parser.add_argument('symbols', nargs='*', help="symbols to screen (default: every cached symbol)")
+    parser.add_argument('--period', default="1y", choices=list(market_data.PERIOD_MAP))
+    parser.add_argument('--interval', default="1d")
+    parser.add_argument('--sort', default='Symbol', help="result column to sort by (descending unless Symbol)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="threads (default: one per CPU)")
+    parser.add_argument('--cache', default=CACHE_PATH, help="bar cache to screen")
+    parser.add_argument('-o', '--output', help="also write the matches to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        expression = Expression(args.expression)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.sort not in ['Symbol', 'Date'] + result_columns(expression):
+        parser.error(f"cannot sort by {args.sort}")
+
+    start = time.perf_counter()
+    series = load_universe(BarStore(args.cache), args.period, args.interval,
+                           [s.upper() for s in args.symbols] or None)
+    loaded = time.perf_counter()
+    results = screen(series, expression, args.workers)
+    results = results.sort_values(args.sort, ascending=args.sort == 'Symbol', ignore_index=True)
+    elapsed = time.perf_counter()
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(results.to_string(index=False, float_format=lambda x: f"{x:,.2f}") if len(results) else "No matches")
+    print(f"\n{len(results)} of {len(series)} symbols match | load {loaded - start:.2f}s, "
+          f"screen {elapsed - loaded:.2f}s")
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+"""
+Streaming quotes
+Tick sources (SSE, websocket, replay file) and aggregation of ticks into live bars
+
+    stream = TickStream(source_from_spec("replay:ticks.csv"))
+    stream.start()
+    ... stream.drain() from the UI loop ...
+"""
+
+import csv
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from transport import json_loads
+
+try:
+    import websocket
+except ImportError:  # optional, only needed for ws:// and wss:// sources
+    websocket = None
+
+# Bar length of each interval that ticks can be aggregated into
+INTERVAL_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "1d": 86400
+}
+
+
+def parse_tick(message, symbol=None):
+    """(symbol, timestamp, price, volume) from a JSON message or dict, or None
+
+    Accepts the usual field names of quote feeds: symbol/s, price/p/last,
+    volume/size/v and time/t/timestamp in seconds or milliseconds.
+    """
+    if isinstance(message, (str, bytes)):
+        message = json_loads(message)
+    if not isinstance(message, dict):
+        return None
+
+    def field(*names):
+        for name in names:
+            if message.get(name) is not None:
+                return message[name]
+        return None
+
+    price = field('price', 'p', 'last', 'regularMarketPrice')
+    if price is None:
+        return None
+
+    timestamp = field('time', 't', 'timestamp')
+    timestamp = float(timestamp) if timestamp is not None else time.time()
+    if timestamp > 1e11:
+        timestamp /= 1000.0
+
+    return (str(field('symbol', 's', 'id') or symbol or '').upper(), timestamp,
+            float(price), float(field('volume', 'size', 'v') or 0.0))
+
+
+# Sources: each yields ticks until stop is set
+class TickSource:
+    """Base class for tick feeds; ticks() yields (symbol, timestamp, price, volume)"""
+
+    def ticks(self, stop):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ReplaySource(TickSource):
+    """Ticks from a recorded file, paced by their timestamps
+
+    CSV files need time, symbol, price and volume columns; .jsonl files hold
+    one feed message per line. speed=0 replays as fast as possible.
+    """
+
+    def __init__(self, path, speed=1.0, symbol=None):
+        self.path = path
+        self.speed = speed
+        self.symbol = symbol
+
+    def _rows(self):
+        with open(self.path, encoding='utf-8') as f:
+            if self.path.lower().endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield parse_tick(line, self.symbol)
+            else:
+                for row in csv.DictReader(f):
+                    yield parse_tick(row, self.symbol)
+
+    def ticks(self, stop):
+        first = started = None
+        for tick in self._rows():
+            if stop.is_set():
+                return
+            if tick is None:
+                continue
+
+            if self.speed:
+                if first is None:
+                    first, started = tick[1], time.monotonic()
+                delay = (tick[1] - first) / self.speed - (time.monotonic() - started)
+                if delay > 0 and stop.wait(delay):
+                    return
+            yield tick
+
+
+class SSESource(TickSource):
+    """Server-sent events feed; every data: line is one JSON tick message"""
+
+    def __init__(self, url, symbol=None, headers=None, timeout=30):
+        self.url = url
+        self.symbol = symbol
+        self.headers = dict(headers or {}, Accept='text/event-stream')
+        self.timeout = timeout
+        self._response = None
+
+    def ticks(self, stop):
+        self._response = requests.get(self.url, headers=self.headers, stream=True, timeout=self.timeout)
+        self._response.raise_for_status()
+        data = []
+        for line in self._response.iter_lines(decode_unicode=True):
+            if stop.is_set():
+                return
+            if line.startswith('data:'):
+                data.append(line[5:].strip())
+            elif not line and data:
+                # A blank line ends the event
+                tick = parse_tick('\n'.join(data), self.symbol)
+                data = []
+                if tick is not None:
+                    yield tick
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+
+
+class WebSocketSource(TickSource):
+    """Websocket feed of JSON tick messages (needs websocket-client)"""
+
+    def __init__(self, url, symbol=None, subscribe=None, timeout=30):
+        if websocket is None:
+            raise RuntimeError("websocket streams require websocket-client (pip install websocket-client)")
+        self.url = url
+        self.symbol = symbol
+        self.subscribe = subscribe
+        self.timeout = timeout
+        self._socket = None
+
+    def ticks(self, stop):
+        self._socket = websocket.create_connection(self.url, timeout=self.timeout)
+        if self.subscribe:
+            self._socket.send(self.subscribe)
+        while not stop.is_set():
+            try:
+                message = self._socket.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            if not message:
+                return
+            tick = parse_tick(message, self.symbol)
+            if tick is not None:
+                yield tick
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+
+
+def source_from_spec(spec, symbol=None):
+    """Build a source from 'replay:<file>[@speed]', an http(s) SSE URL or a ws(s) URL"""
+    spec = spec.strip()
+    if spec.startswith('replay:'):
+        path, _, speed = spec[len('replay:'):].rpartition('@')
+        if not path:
+            path, speed = speed, ''
+        return ReplaySource(path, float(speed) if speed else 1.0, symbol)
+    if spec.startswith(('ws://', 'wss://')):
+        return WebSocketSource(spec.replace('{symbol}', symbol or ''), symbol)
+    if spec.startswith(('http://', 'https://')):
+        return SSESource(spec.replace('{symbol}', symbol or ''), symbol)
+    raise ValueError(f"Unknown stream source: {spec}")
+
+
+class TickStream:
+    """Runs a tick source on a background thread and queues its ticks for the UI
+
+    The UI drains the queue at its own frame rate, so a fast feed costs one
+    redraw per frame rather than one per tick.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.ticks = queue.Queue()
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stream', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for tick in self.source.ticks(self._stop):
+                self.ticks.put(tick)
+        except Exception as e:
+            if not self._stop.is_set():
+                self.error = e
+        finally:
+            self.source.close()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def drain(self):
+        """Return every tick received since the last call (call from the UI thread)"""
+        ticks = []
+        while True:
+            try:
+                ticks.append(self.ticks.get_nowait())
+            except queue.Empty:
+                return ticks
+
+    def stop(self):
+        self._stop.set()
+        self.source.close()
+
+
+class BarAggregator:
+    """Folds ticks into the current bar of an interval
+
+    Bar boundaries follow the seeded history: intraday bars open every
+    `interval` after the seed bar's time (so hourly bars starting at :30 stay
+    on :30) and daily bars open each local day at the seed bar's time of day.
+    Dates are naive local datetime64 values like the chart frames.
+    """
+
+    def __init__(self, interval):
+        if interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Streaming supports {', '.join(INTERVAL_SECONDS)} bars, not {interval}")
+        self.seconds = INTERVAL_SECONDS[interval]
+        self.anchor = 0
+        self.bar = None
+
+    def bar_start(self, timestamp):
+        """Local datetime64 at which the bar containing the epoch timestamp opens"""
+        local = int(timestamp) + time.localtime(timestamp).tm_gmtoff
+        if self.seconds == 86400:
+            start = local - local % 86400 + self.anchor % 86400
+        else:
+            start = local - (local - self.anchor) % self.seconds
+        return np.datetime64(start, 's').astype('datetime64[us]')
+
+    def seed(self, bar):
+        """Continue from an existing bar (a mapping with Date and OHLCV)"""
+        self.bar = {col: bar[col] for col in ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')}
+        self.bar['Date'] = np.datetime64(self.bar['Date'], 'us')
+        self.anchor = int(self.bar['Date'].astype('datetime64[s]').astype(np.int64))
+
+    def add(self, timestamp, price, volume=0.0):
+        """Apply one tick; returns (bar, is_new), or None for a tick older than the current bar"""
+        start = self.bar_start(timestamp)
+        if self.bar is not None and start < self.bar['Date']:
+            return None
+
+        if self.bar is None or start > self.bar['Date']:
+            self.bar = {'Date': start, 'Open': price, 'High': price, 'Low': price,
+                        'Close': price, 'Volume': volume}
+            return self.bar, True
+
+        bar = self.bar
+        bar['High'] = max(bar['High'], price)
+        bar['Low'] = min(bar['Low'], price)
+        bar['Close'] = price
+        bar['Volume'] += volume
+        return bar, False
+
+    def add_ticks(self, ticks):
+        """Apply (symbol, timestamp, price, volume) ticks; returns the final state of each bar touched
+
+        Returns a list of (bar, is_new) in bar order, so a frame's worth of
+        ticks costs one indicator update per bar instead of one per tick.
+        """
+        changes = []
+        for _, timestamp, price, volume in ticks:
+            update = self.add(timestamp, price, volume)
+            if update is None:
+                continue
+            bar, is_new = update
+            if is_new or not changes:
+                changes.append((dict(bar), is_new))
+            else:
+                changes[-1] = (dict(bar), changes[-1][1])
+        return changes
+
+
+class LiveFrame:
+    """Indicator frame that grows in place as live bars arrive
+
+    Columns are kept in NumPy buffers with spare rows, so a new bar writes
+    one row and the buffers are only reallocated (doubling) when full.
+    frame() wraps the filled rows in a DataFrame without copying them.
+    """
+
+    def __init__(self, df, spare=1024):
+        self.columns = list(df.columns)
+        self.length = len(df)
+        self._buffers = {}
+        for col in self.columns:
+            values = df[col].to_numpy()
+            buffer = np.empty(len(values) + spare, dtype=values.dtype)
+            buffer[:len(values)] = values
+            self._buffers[col] = buffer
+
+    def append(self, row):
+        if self.length == len(self._buffers[self.columns[0]]):
+            self._grow()
+        self.length += 1
+        self.set_last(row)
+
+    def set_last(self, row):
+        """Overwrite the latest row with the row's values (missing columns become NaN)"""
+        for col, buffer in self._buffers.items():
+            buffer[self.length - 1] = row.get(col, np.nan)
+
+    def frame(self):
+        return pd.DataFrame({col: buffer[:self.length] for col, buffer in self._buffers.items()}, copy=False)
+
+    def _grow(self):
+        for col, buffer in self._buffers.items():
+            grown = np.empty(max(2 * len(buffer), 1), dtype=buffer.dtype)
+            grown[:self.length] = buffer[:self.length]
+            self._buffers[col] = grown
+
+
+def apply_bar(frame, engine, bar, is_new):
+    """Fold a live bar into a LiveFrame through its IndicatorEngine
+
+    A new bar is appended; a revision of the current bar overwrites the last
+    row in place. Only that bar's indicators are computed either way, and
+    neither copies the history.
+    """
+    values = engine.append(bar) if is_new else engine.update_last(bar)
+    row = dict(bar, **values)
+
+    if is_new:
+        frame.append(row)
+    else:
+        frame.set_last(row)
@@ -0,0 +1,132 @@
+"""
+Incremental indicator engine against the batch calculate_indicators path
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from indicators import INDICATOR_COLUMNS, IndicatorEngine
+
+OHLCV_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+TOLERANCE = dict(rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def make_bars(n, seed=0):
+    """Random-walk OHLCV frame with n daily bars"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.003, n))
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=n, freq='D'),
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n)),
+        'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n)),
+        'Close': close,
+        'Volume': rng.integers(1000, 100000, n).astype(np.float64),
+    })
+
+
+def batch(raw):
+    return indicators.calculate_indicators(raw[OHLCV_COLUMNS].copy())
+
+
+def assert_row_matches(values, expected):
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(values[col], expected[col], err_msg=col, **TOLERANCE)
+
+
+def test_append_matches_batch():
+    raw = make_bars(400)
+    expected = batch(raw)
+
+    engine = IndicatorEngine()
+    for i, (_, bar) in enumerate(raw.iterrows()):
+        assert_row_matches(engine.append(bar), expected.iloc[i])
+
+
+def test_update_last_matches_batch():
+    raw = make_bars(300)
+    engine = IndicatorEngine.from_frame(batch(raw))
+
+    # The forming bar moves several times before it completes
+    revised = raw.copy()
+    for factor in (1.01, 0.98, 1.002):
+        revised.iloc[-1, revised.columns.get_loc('Close')] = raw['Close'].iloc[-1] * factor
+        revised.iloc[-1, revised.columns.get_loc('High')] = max(raw['High'].iloc[-1], revised['Close'].iloc[-1])
+        revised.iloc[-1, revised.columns.get_loc('Low')] = min(raw['Low'].iloc[-1], revised['Close'].iloc[-1])
+        assert_row_matches(engine.update_last(revised.iloc[-1]), batch(revised).iloc[-1])
+
+
+def test_from_frame_continues_like_batch():
+    raw = make_bars(600)
+    expected = batch(raw)
+
+    engine = IndicatorEngine.from_frame(batch(raw.iloc[:500]))
+    for i in range(500, 600):
+        assert_row_matches(engine.append(raw.iloc[i]), expected.iloc[i])
+
+
+def test_streaming_revisions_match_batch():
+    raw = make_bars(1500, seed=1)
+    expected = batch(raw)
+
+    # Every bar is first seen forming, revised, then completed by the next append
+    engine = IndicatorEngine()
+    for i, (_, bar) in enumerate(raw.iterrows()):
+        forming = bar.copy()
+        forming['Close'] *= 1.02
+        forming['High'] = max(bar['High'], forming['Close'])
+        engine.append(forming)
+        forming['Close'] = forming['Low'] = bar['Low'] * 0.98
+        engine.update_last(forming)
+        assert_row_matches(engine.update_last(bar), expected.iloc[i])
+
+
+def test_flat_bars_match_batch():
+    raw = make_bars(60)
+    flat = raw.index[20:40]
+    raw.loc[flat, ['Open', 'High', 'Low', 'Close']] = 100.0
+    expected = batch(raw)
+
+    # Stoch_K is 0/0 on the flat stretch; Stoch_D recovers once it leaves the window
+    engine = IndicatorEngine()
+    for i, (_, bar) in enumerate(raw.iterrows()):
+        assert_row_matches(engine.append(bar), expected.iloc[i])
+
+
+def test_update_indicators_matches_batch():
+    raw = make_bars(500)
+
+    # The earlier download ended on a bar that was still forming
+    earlier = raw.iloc[:450].copy()
+    earlier.iloc[-1, earlier.columns.get_loc('Close')] *= 1.005
+    df = batch(earlier)
+    engine = IndicatorEngine.from_frame(df)
+
+    updated = indicators.update_indicators(df, raw, engine)
+    expected = batch(raw)
+
+    assert updated is not None
+    assert len(updated) == len(expected)
+    assert (updated['Date'].to_numpy() == expected['Date'].to_numpy()).all()
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(updated[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                                   err_msg=col, **TOLERANCE)
+
+
+def test_update_indicators_needs_full_recompute_after_revision():
+    raw = make_bars(300)
+    df = batch(raw.iloc[:250])
+    engine = IndicatorEngine.from_frame(df)
+
+    revised = raw.copy()
+    revised.iloc[248, revised.columns.get_loc('Close')] *= 1.1
+    assert indicators.update_indicators(df, revised, engine) is None
+
+
+def test_update_last_needs_a_bar():
+    with pytest.raises(ValueError):
+        IndicatorEngine().update_last(make_bars(1).iloc[0])
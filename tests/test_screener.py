@@ -0,0 +1,83 @@
+"""
+Screener kernels against calculate_indicators, and the expression validator
+"""
+
+import numpy as np
+import pytest
+
+import screener
+from indicators import INDICATOR_COLUMNS
+from screener import Expression, StackedBars
+from tests.test_indicators import OHLCV_COLUMNS, TOLERANCE, batch, make_bars
+
+# Histories of different lengths, so the shorter ones are padded at the start
+LENGTHS = {'AAA': 400, 'BBB': 250, 'CCC': 120, 'DDD': 30}
+
+
+def make_universe():
+    frames = {symbol: make_bars(n, seed=i) for i, (symbol, n) in enumerate(LENGTHS.items())}
+    series = {}
+    for symbol, raw in frames.items():
+        timestamps = raw['Date'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        series[symbol] = (timestamps, raw[screener.OHLCV_COLUMNS].to_numpy().T)
+    return frames, series
+
+
+def test_stacked_bars_match_calculate_indicators():
+    frames, series = make_universe()
+    bars = StackedBars(list(LENGTHS), series)
+
+    for j, (symbol, raw) in enumerate(frames.items()):
+        expected = batch(raw)
+        n = len(raw)
+        for col in INDICATOR_COLUMNS:
+            column = bars[col][:, j]
+            # OBV counts padding rows as no change; everything else leaves them missing
+            padding = 0.0 if col == 'OBV' else np.nan
+            np.testing.assert_array_equal(column[:len(column) - n], padding, err_msg=f"{symbol} {col} padding")
+            np.testing.assert_allclose(column[-n:], expected[col].to_numpy(dtype=float),
+                                       err_msg=f"{symbol} {col}", **TOLERANCE)
+
+
+def test_screen_matches_pandas():
+    frames, series = make_universe()
+    text = "RSI > 50 and Close > SMA_20 and Close[1] < Close"
+    matches = screener.screen(series, text, workers=2)
+
+    expected = []
+    for symbol, raw in frames.items():
+        last = batch(raw[OHLCV_COLUMNS].copy())
+        if last['RSI'].iloc[-1] > 50 and last['Close'].iloc[-1] > last['SMA_20'].iloc[-1] \
+                and last['Close'].iloc[-2] < last['Close'].iloc[-1]:
+            expected.append(symbol)
+    assert list(matches['Symbol']) == expected
+
+
+def test_expression_names_and_lookback():
+    expression = Expression("min(RSI, Stoch_K, 40) < 30 and Close > SMA_200[5]")
+    assert expression.names == ['RSI', 'Stoch_K', 'Close', 'SMA_200']
+    assert expression.lookback == 5
+
+
+@pytest.mark.parametrize('text', [
+    "__import__('os').system('ls')",    # unsafe call
+    "open('x')",
+    "os",                               # unknown name
+    "Close.real > 0",                   # attribute access
+    "Close.__class__",
+    "abs(RSI, 1) > 0",                  # arity
+    "abs() > 0",
+    "min(RSI) < 30",
+    "max() > 0",
+    "Close[-1] < Close",                # negative lag
+    "Close[1.5] < Close",
+    "Close[RSI] < Close",
+    "abs(x=RSI) > 0",                   # keywords
+    "'RSI' < 30",                       # non-numeric constant
+    "[RSI][0] < 30",
+    "(lambda: 1)()",
+    "RSI < ",                           # syntax error
+])
+def test_expression_rejects(text):
+    with pytest.raises(ValueError):
+        Expression(text)
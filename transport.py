@@ -0,0 +1,217 @@
+"""
+HTTP transport
+Pooled requests.Session with per-host rate limiting, retry with backoff,
+conditional requests and coalescing of identical in-flight requests
+"""
+
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from profiling import profiler
+
+try:
+    import orjson
+except ImportError:  # optional, several times faster on large chart payloads
+    orjson = None
+
+# Status codes worth retrying: rate limited or a transient server error
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def json_loads(content):
+    """Decode a JSON body (bytes or str), using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class TokenBucket:
+    """Allows bursts of up to `burst` requests, refilled at `rate` tokens per second"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """Take a token and return how long to wait before using it
+
+        Tokens may go negative: each caller reserves the next one to refill,
+        so waiting requests go out in order at `rate` per second.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    """Token bucket per host: `rate` requests per second on average, `burst` at once"""
+
+    def __init__(self, rate=10.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def wait(self, host):
+        if not self.rate:
+            return
+
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            delay = bucket.reserve(time.monotonic())
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _Call:
+    """One request in flight, shared by every caller asking for the same URL meanwhile"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class HttpTransport:
+    """Shared keep-alive session used by every download
+
+    Safe to use from many threads at once; the connection pool is sized for
+    `max_connections` concurrent requests per host. Bodies are gzip-encoded
+    (the session's default Accept-Encoding). A GET identical to one already
+    in flight waits for that one's response instead of going out again, and
+    responses carrying an ETag or Last-Modified are revalidated with a
+    conditional request, a 304 reusing the stored body.
+    """
+
+    def __init__(self, max_connections=8, rate=10.0, burst=5, retries=3, backoff=0.5,
+                 headers=None, validated_responses=32):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.limiter = HostRateLimiter(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._validated = OrderedDict()
+        self._validated_max = validated_responses
+        self.coalesced = 0
+
+    def get(self, url, params=None, timeout=10):
+        """GET with rate limiting; retries connection errors, 429 and 5xx with exponential backoff
+
+        Callers asking for the same URL and params while it is in flight get
+        the same response (or exception) without a request of their own.
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            call.response = self._get(url, params, timeout, key)
+            return call.response
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def _get(self, url, params, timeout, key):
+        host = urlsplit(url).netloc
+        attempt = 0
+
+        while True:
+            self.limiter.wait(host)
+            with self._lock:
+                stored = self._validated.get(key)
+            try:
+                response = self.session.get(url, params=params, timeout=timeout,
+                                            headers=self._conditional_headers(stored))
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status_code == 304 and stored is not None:
+                    self._store_validated(key, stored)
+                    return stored
+                if response.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    response.raise_for_status()
+                    profiler.count_bytes(len(response.content))
+                    self._store_validated(key, response)
+                    return response
+                delay = self._retry_after(response) or self._backoff_delay(attempt)
+
+            attempt += 1
+            time.sleep(delay)
+
+    def get_json(self, url, params=None, timeout=10):
+        return json_loads(self.get(url, params=params, timeout=timeout).content)
+
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with jitter, so clients throttled together do not retry together"""
+        delay = self.backoff * (2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _conditional_headers(stored):
+        if stored is None:
+            return None
+        headers = {}
+        if 'ETag' in stored.headers:
+            headers['If-None-Match'] = stored.headers['ETag']
+        if 'Last-Modified' in stored.headers:
+            headers['If-Modified-Since'] = stored.headers['Last-Modified']
+        return headers
+
+    def _store_validated(self, key, response):
+        """Keep the latest responses that can be revalidated (least recently used dropped first)"""
+        if 'ETag' not in response.headers and 'Last-Modified' not in response.headers:
+            return
+        with self._lock:
+            self._validated[key] = response
+            self._validated.move_to_end(key)
+            while len(self._validated) > self._validated_max:
+                self._validated.popitem(last=False)
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get('Retry-After')
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    def close(self):
+        self.session.close()
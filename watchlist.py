@@ -0,0 +1,104 @@
+"""
+Watchlist
+Monitors many symbols by fetching them concurrently over a shared HTTP transport
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import analysis
+import market_data
+from compact import CompactBars
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.financial_analysis_pro', 'watchlist.json')
+
+
+class Watchlist:
+    """Saved list of symbols refreshed in parallel with bounded concurrency
+
+    The summary uses 1y of daily bars so the 52-week metrics match the
+    dashboard; with a BarStore each refresh only downloads the newest bars.
+    With an AlertEngine every refreshed symbol's new bars are checked
+    against the alert rules.
+    """
+
+    def __init__(self, transport, store=None, path=DEFAULT_PATH, max_workers=8,
+                 period="1y", interval="1d", alerts=None):
+        self.transport = transport
+        self.store = store
+        self.alerts = alerts
+        self.path = path
+        self.period = period
+        self.interval = interval
+        self.symbols = []
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='watchlist')
+
+    def load(self):
+        """Load saved symbols, if any"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.symbols = json.load(f).get('symbols', [])
+        except (OSError, ValueError):
+            self.symbols = []
+        return self.symbols
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'symbols': self.symbols}, f, indent=2)
+
+    def add(self, text):
+        """Add comma/space separated symbols and return the ones that were new"""
+        added = []
+        for symbol in text.replace(',', ' ').upper().split():
+            if symbol not in self.symbols:
+                self.symbols.append(symbol)
+                added.append(symbol)
+        if added:
+            self.save()
+        return added
+
+    def remove(self, symbols):
+        self.symbols = [s for s in self.symbols if s not in symbols]
+        self.save()
+
+    def fetch_metrics(self, symbol):
+        """Fetch one symbol and compute its dashboard metrics"""
+        df, meta = market_data.fetch_chart(symbol, self.period, self.interval,
+                                           store=self.store, transport=self.transport)
+        if self.alerts is not None:
+            self.alerts.update((symbol, self.interval), df)
+        return analysis.compute_metrics(df, meta)
+
+    def fetch_frame(self, symbol, period=None, compact=False):
+        """Fetch one symbol's bars (through the cache) as a DataFrame, or CompactBars"""
+        df, _ = market_data.fetch_chart(symbol, period or self.period, self.interval,
+                                        store=self.store, transport=self.transport)
+        return CompactBars.from_frame(df) if compact else df
+
+    def refresh(self, symbols=None):
+        """Fetch all symbols in parallel; returns {symbol: metrics dict or Exception}"""
+        symbols = list(self.symbols if symbols is None else symbols)
+        return self.map(self.fetch_metrics, symbols)
+
+    def fetch_frames(self, symbols, period=None, compact=False):
+        """Bars for many symbols in parallel; returns {symbol: DataFrame/CompactBars or Exception}"""
+        return self.map(self.fetch_frame, symbols, period, compact)
+
+    def map(self, func, symbols, *args):
+        """Run func(symbol, *args) for every symbol on the pool, collecting results or exceptions"""
+        futures = {self.executor.submit(func, symbol, *args): symbol for symbol in symbols}
+
+        results = {}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                results[symbol] = e
+
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)